@@ -0,0 +1,123 @@
+"""
+Memory Backends Benchmark
+
+Compares the flat Memory with PagedMemory on instruction throughput,
+and on the resident memory (RSS) of a process running many simulators at once.
+
+Each backend is measured in its own process so that their RSS don't mix:
+
+    python benchmarks/memory_backends.py [--sessions N] [--instructions N]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from easier68k.core.models.list_file import ListFile
+from easier68k.core.enum.stop_reason import StopReason
+
+# the body of the program, which is repeated to make a long run of straight line code
+#     MOVE.L D0,D1
+#     LEA ($100000).L,A0
+#     MOVE.L D1,(A0)
+#     ADD.L (A0),D2
+#     ADD.L D3,D0
+BODY = '220041f9001000002081d490d083'
+BODY_INSTRUCTIONS = 5
+
+# MOVE.L #$00004000,D0 and MOVE.L #$FFFFFFFF,D3 before the body, and SIMHALT after it
+SETUP = '203c00004000263cffffffff'
+SIMHALT = 'ffffffff'
+START = 0x1000
+
+BACKENDS = ['flat', 'paged']
+
+
+def _rss() -> float:
+    """
+    Gets the current RSS of this process in MB, or the peak RSS where /proc isn't available
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load(paged_memory: bool, translate_blocks: bool = False, repeats: int = 1):
+    # must be here or we get circular dependency issues
+    from easier68k.simulator.m68k import M68K
+
+    list_file = ListFile()
+    list_file.set_starting_execution_address(START)
+    list_file.insert_data(START, SETUP + BODY * repeats + SIMHALT)
+
+    m68k = M68K(translate_blocks=translate_blocks, paged_memory=paged_memory)
+    m68k.load_list_file(list_file)
+    return m68k
+
+
+def measure(backend: str, sessions: int, repeats: int, runs: int):
+    """
+    Prints the throughput and RSS of a single backend, this runs in its own process
+    """
+    paged_memory = backend == 'paged'
+
+    for translate_blocks in [False, True]:
+        m68k = _load(paged_memory, translate_blocks, repeats)
+        loaded = m68k.snapshot()
+
+        # the first run decodes (and translates) the instructions, which isn't measured
+        m68k.run_for()
+
+        instructions = 0
+        elapsed = 0
+        for _ in range(runs):
+            m68k.restore(loaded)
+            start = time.perf_counter()
+            result = m68k.run_for()
+            elapsed += time.perf_counter() - start
+            instructions += result.instructions
+            assert result.reason is StopReason.HALTED, result
+
+        print('{:<6} translate_blocks={:<5} {:>10.0f} instructions/s'.format(
+            backend, str(translate_blocks), instructions / elapsed))
+
+    del m68k
+    before = _rss()
+    simulators = [_load(paged_memory) for _ in range(sessions)]
+    for m68k in simulators:
+        m68k.run_for(max_instructions=100)
+    after = _rss()
+
+    print('{:<6} {} sessions: RSS {:.1f} MB, {:.2f} MB per session'.format(
+        backend, sessions, after, (after - before) / sessions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=50, help='number of simulators alive at once')
+    parser.add_argument('--repeats', type=int, default=1000, help='times the body of the program is repeated')
+    parser.add_argument('--runs', type=int, default=5, help='times the program is run for the throughput')
+    parser.add_argument('--backend', choices=BACKENDS, help='measure only this backend in this process')
+    args = parser.parse_args()
+
+    if args.backend is not None:
+        measure(args.backend, args.sessions, args.repeats, args.runs)
+        return
+
+    for backend in BACKENDS:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--backend', backend,
+                        '--sessions', str(args.sessions), '--repeats', str(args.repeats),
+                        '--runs', str(args.runs)],
+                       check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,9 @@ from easier68k.simulator.m68k import M68K
 from easier68k.simulator.memory import Memory
 from easier68k.core.models.list_file import ListFile
 from easier68k.core.enum.register import Register
+from easier68k.core.enum.watch_kind import WatchKind
+from easier68k.core.enum.dump_compression import DumpCompression
+from easier68k.simulator.dump import InvalidDumpError
 from util import split_args, long_hex, autocomplete_file, autocomplete_getarg
 
 class Run_CLI(cmd.Cmd):
@@ -19,10 +22,49 @@ class Run_CLI(cmd.Cmd):
     def do_run(self, args):
         self.simulator.clock_auto_cycle = True
         self.simulator.run()
+        self.print_stop()
         
     def do_step(self, args):
         self.simulator.clock_auto_cycle = False
         self.simulator.run()
+
+    def do_step_back(self, args):
+        args = split_args(args, 0, 1)
+        if(args == None):
+            return False
+
+        if(self.simulator.history == None):
+            print('[ERROR] the history is off, turn it on with: history on')
+            return False
+
+        count = int(args[0], 0) if len(args) > 0 else 1
+        undone = self.simulator.step_back(count)
+        if(undone < count):
+            print('only stepped back ' + str(undone) + ' instructions, the history does not go back further')
+
+    def help_step_back(self):
+        print('syntax: step_back [count]')
+        print('undoes the last count instructions that were run, or just the last one if no count is given')
+        print('only the instructions run since the history was turned on with history on can be undone')
+
+    def do_history(self, args):
+        args = split_args(args, 1, 0)
+        if(args == None):
+            return False
+
+        command = args[0].lower()
+        if(command == 'on'):
+            self.simulator.enable_history()
+        elif(command == 'off'):
+            self.simulator.disable_history()
+        else:
+            print('[ERROR] unrecognized history command ' + args[0])
+            return False
+
+    def help_history(self):
+        print('syntax: history on | off')
+        print('on starts keeping the changes made by each instruction, so that step_back can undo them')
+        print('and off stops keeping them, translated blocks do not run while it is on')
     
     
     def do_set_register(self, args):
@@ -129,6 +171,52 @@ class Run_CLI(cmd.Cmd):
         
     
     
+    def do_save_dump(self, args):
+        args = split_args(args, 1, 1)
+        if(args == None):
+            return False
+
+        try:
+            compression = DumpCompression[args[1].upper()] if len(args) > 1 else DumpCompression.ZLIB
+        except KeyError:
+            print('[ERROR] unrecognized compression ' + args[1])
+            return False
+
+        out_file = open(args[0], 'wb')
+        self.simulator.save_dump(out_file, compression)
+        out_file.close()
+
+    def help_save_dump(self):
+        print('syntax: save_dump out_file, [zlib|lzma|none]')
+        print('saves the registers and the memory that is in use to the out_file, compressed with zlib by default')
+        print('this is much smaller than dump_memory, which always writes all 16 MB of memory')
+
+    def complete_save_dump(self, text, line, begidx, endidx):
+        return autocomplete_file(line)
+
+    def do_load_dump(self, args):
+        args = split_args(args, 1, 0)
+        if(args == None):
+            return False
+
+        try:
+            in_file = open(args[0], 'rb')
+            self.simulator.load_dump(in_file)
+
+            in_file.close()
+
+        except FileNotFoundError as not_found:
+            print('[Error] file: ' + str(not_found) + ' does not exist')
+        except InvalidDumpError as invalid:
+            print('[Error] ' + str(invalid))
+
+    def help_load_dump(self):
+        print('syntax: load_dump in_file')
+        print('loads the registers and memory from a dump made by save_dump')
+
+    def complete_load_dump(self, text, line, begidx, endidx):
+        return autocomplete_file(line)
+
     def do_get_memory(self, args):
         args = split_args(args, 2, 0)
         if(args == None):
@@ -142,6 +230,7 @@ class Run_CLI(cmd.Cmd):
         # round down to nearest multiple of 8 to keep alignment
         start -= start % 8
         
+        data = memory.read_block(start, length)
         for i in range(length):
             loc = start + i
             
@@ -154,7 +243,7 @@ class Run_CLI(cmd.Cmd):
             if(i % 8 == 7):
                 ending = '\n'
             
-            value_str = bytes(memory.get(Memory.Byte, loc)).hex()
+            value_str = '{:02x}'.format(data[i])
             print(value_str, end=ending)
         print('') # newline
         
@@ -187,9 +276,7 @@ class Run_CLI(cmd.Cmd):
             print('length of value and given length do not match')
             return False
             
-        for i in range(length):
-            loc = start + i
-            memory.set(Memory.Byte, loc, bytearray.fromhex(value[i*2:i*2+2]))
+        memory.write_block(start, bytes.fromhex(value))
         
     def help_set_memory(self, args):
         print('syntax: get_memory start_idx, length, value')
@@ -197,8 +284,131 @@ class Run_CLI(cmd.Cmd):
         print('accessing values outside of memory causes an error')
         print('assigning a value larger or smaller than the range can hold is an error')
     
-    # break points when we add that too!
-    
+    def print_stop(self):
+        """Prints where the simulator stopped, if it stopped at a breakpoint or watchpoint"""
+        hit = self.simulator.memory.watch_hit
+        if hit is not None:
+            kind, location, length = hit
+            print('watchpoint: {} of {} byte(s) at {}'.format(kind.name.lower(), length, long_hex(location)))
+        elif not self.simulator.halted:
+            pc = self.simulator.get_program_counter_value()
+            if pc in self.simulator.breakpoints:
+                print('breakpoint at ' + long_hex(pc))
+
+    def do_break(self, args):
+        args = split_args(args, 0, 1)
+        if(args == None):
+            return False
+
+        if(len(args) == 0):
+            for location in sorted(self.simulator.breakpoints):
+                print(long_hex(location))
+        else:
+            self.simulator.add_breakpoint(int(args[0], 0))
+
+    def help_break(self):
+        print('syntax: break [location]')
+        print('stops running before the instruction at location')
+        print('if no location is given then all of the breakpoints are printed')
+
+    def do_clear_break(self, args):
+        args = split_args(args, 0, 1)
+        if(args == None):
+            return False
+
+        if(len(args) == 0):
+            self.simulator.clear_breakpoints()
+        else:
+            self.simulator.remove_breakpoint(int(args[0], 0))
+
+    def help_clear_break(self):
+        print('syntax: clear_break [location]')
+        print('removes the breakpoint at location, or all of them if no location is given')
+
+    def do_watch(self, args):
+        args = split_args(args, 0, 3)
+        if(args == None):
+            return False
+
+        if(len(args) == 0):
+            for start, end, kind in self.simulator.memory.watchpoints:
+                print('{} {} {}'.format(long_hex(start), end - start, kind.name.lower()))
+            return
+
+        start = int(args[0], 0)
+        length = int(args[1], 0) if len(args) > 1 else 1
+        try:
+            kind = WatchKind[args[2].upper()] if len(args) > 2 else WatchKind.WRITE
+        except KeyError:
+            print('[ERROR] unrecognized watch kind ' + args[2])
+            return False
+        self.simulator.memory.add_watchpoint(start, length, kind)
+
+    def help_watch(self):
+        print('syntax: watch [start_idx, [length, [read|write|access]]]')
+        print('stops running after an instruction accesses the memory in the range [start_idx, start_idx+length)')
+        print('length defaults to 1 and the kind of access defaults to write')
+        print('if no range is given then all of the watchpoints are printed')
+
+    def do_clear_watch(self, args):
+        args = split_args(args, 0, 2)
+        if(args == None):
+            return False
+
+        if(len(args) == 0):
+            self.simulator.memory.clear_watchpoints()
+        else:
+            length = int(args[1], 0) if len(args) > 1 else 1
+            self.simulator.memory.remove_watchpoint(int(args[0], 0), length)
+
+    def help_clear_watch(self):
+        print('syntax: clear_watch [start_idx, [length]]')
+        print('removes the watchpoints on the range, or all of them if no range is given')
+
+    def do_heatmap(self, args):
+        args = split_args(args, 0, 2)
+        if(args == None):
+            return False
+
+        memory = self.simulator.memory
+        command = args[0].lower() if len(args) > 0 else 'all'
+
+        if(command == 'on'):
+            bucket_size = int(args[1], 0) if len(args) > 1 else 64
+            try:
+                memory.enable_heatmap(bucket_size)
+            except AssertionError as error:
+                print('[ERROR] ' + str(error))
+            return
+        if(command == 'off'):
+            memory.disable_heatmap()
+            return
+
+        if(memory.heatmap == None):
+            print('[ERROR] the heatmap is off, turn it on with: heatmap on')
+            return False
+
+        if(command == 'csv'):
+            if(len(args) < 2):
+                print('[ERROR] no out_file was given')
+                return False
+            out_file = open(args[1], 'w')
+            memory.heatmap.to_csv(out_file)
+            out_file.close()
+        elif(command in ['all', 'reads', 'writes']):
+            output = memory.heatmap.render(reads=command != 'writes', writes=command != 'reads')
+            print(output if output else 'no memory has been accessed')
+        else:
+            print('[ERROR] unrecognized heatmap command ' + args[0])
+            return False
+
+    def help_heatmap(self):
+        print('syntax: heatmap [on, [bucket_size] | off | all | reads | writes | csv, out_file]')
+        print('on starts counting the reads and writes to each bucket of bucket_size bytes (64 by default)')
+        print('and off stops counting them, translated blocks do not run while it is on')
+        print('all, reads or writes draws the counts, one line of 64 buckets at a time, from . to @ for the most used')
+        print('csv writes the location, reads and writes of each bucket that was accessed to out_file')
+
 
 def subcommandline_run(file_name):
     simulator = M68K()
@@ -1,3 +1,4 @@
 __all__ = [
-    'assembler'
+    'assembler',
+    'incremental'
 ]
\ No newline at end of file
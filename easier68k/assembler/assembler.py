@@ -1,10 +1,11 @@
 from ..core.util.parsing import strip_comments, has_label, get_label, strip_label, get_opcode, strip_opcode, \
-    parse_literal
+    parse_literal, split_line
 import types
 import re
 import binascii
 from ..core import opcodes
 from ..core.models.list_file import ListFile
+from ..core.models.instruction_line import InstructionLine
 
 from ..core.util.find_module import find_opcode_cls
 # This *is* actually a necessary import due to using "reflection" style code further down
@@ -13,6 +14,14 @@ from ..core.opcodes import *
 
 MAX_MEMORY_LOCATION = 16777216  # 2^24
 
+# the parts of an operand that aren't symbols (strings, hex and binary literals, sizes like .L)
+# and the names that may be symbols, the symbols are the ones that aren't registers
+OPERAND_TOKENS = re.compile(r"'[^']*'|\$[0-9A-Fa-f]*|%[01]*|\.[A-Za-z]+|([A-Za-z_][A-Za-z0-9_]*)")
+
+# names in operands which are never symbols
+REGISTER_NAMES = {'D{}'.format(i) for i in range(8)} | {'A{}'.format(i) for i in range(8)} | \
+    {'SP', 'PC', 'SR', 'CCR', 'USP'}
+
 
 def for_line_stripped_comments(full_text: str):
     for line_index, line in enumerate(full_text.splitlines()):
@@ -29,8 +38,10 @@ def for_line_opcode_parse(full_text: str):
     :param full_text: The file text to parse
     :return: Yields the label (or None), opcode, and opcode contents (returns nothing)
     """
-    for line_index, stripped in for_line_stripped_comments(full_text):
-        yield get_label(stripped) if has_label(stripped) else None, get_opcode(stripped), strip_opcode(stripped)
+    for line in full_text.splitlines():
+        split = split_line(line)
+        if split is not None:
+            yield split
 
 
 def find_labels(text: str) -> (dict, dict, list):
@@ -62,18 +73,64 @@ def find_labels(text: str) -> (dict, dict, list):
     return labels, equates, issues
 
 
-def replace_equates(contents: str, equates: dict) -> str:
-    for equate in equates.items():
-        contents = contents.replace(equate[0], equate[1])
+def find_equates(text: str) -> (dict, list):
+    """
+    Finds all of the equates in a file, without splitting the lines which can't be equates
 
-    return contents
+    >>> find_equates('size EQU 4\\n    MOVE.L #size, D0\\nsize equ 5')
+    ({'size': '4'}, [('Label size already declared', 'ERROR')])
 
+    :param text: The text to search through for equates
+    :return: In order, equates (dict of label to contents) and issues (list of message + severity)
+    """
+    equates = {}
+    issues = []
+
+    for line in text.splitlines():
+        if 'EQU' not in line.upper():
+            continue
+        split = split_line(line)
+        if split is None or split[0] is None or split[1] != 'EQU':
+            continue
+
+        label, _, contents = split
+        if label in equates:
+            issues.append(('Label {} already declared'.format(label), 'ERROR'))
+        else:
+            # equates can be made from the ones before them
+            equates[label] = replace_equates(contents, equates)
+
+    return equates, issues
+
+
+def replace_symbols(contents: str, symbols: dict, to_text) -> str:
+    """
+    Replaces every symbol in the contents of a line which is in symbols,
+    looking at whole names so that a symbol is never replaced inside of a longer one
+
+    >>> replace_symbols('LOOP2, LOOP', {'LOOP': 8}, '(${0:08x}).L'.format)
+    'LOOP2, ($00000008).L'
+
+    :param contents: The contents of the line, after the opcode
+    :param symbols: The symbols to replace and their values
+    :param to_text: Makes the text that a symbol is replaced with from its value
+    :return: The contents with the symbols replaced
+    """
+    def replace(match):
+        name = match.group(1)
+        if name is None or name not in symbols or name.upper() in REGISTER_NAMES:
+            return match.group(0)
+        return to_text(symbols[name])
+
+    return OPERAND_TOKENS.sub(replace, contents)
+
+
+def replace_equates(contents: str, equates: dict) -> str:
+    return replace_symbols(contents, equates, str)
 
-def replace_label_addresses(contents: str, label_addresses: dict) -> str:
-    for label in label_addresses.items():
-        contents = contents.replace(label[0], '(${0:08x}).L'.format(label[1]))
 
-    return contents
+def replace_label_addresses(contents: str, label_addresses: dict) -> str:
+    return replace_symbols(contents, label_addresses, '(${0:08x}).L'.format)
 
 
 def replace_labels_with_temps(contents: str, labels: dict) -> str:
@@ -83,135 +140,222 @@ def replace_labels_with_temps(contents: str, labels: dict) -> str:
     :param labels: The labels
     :return: The string with labels replaced
     """
-    for label in labels.items():
-        contents = contents.replace(label[0], '($00000000).L')
+    return replace_symbols(contents, labels, lambda _: '($00000000).L')
+
+
+def find_symbols(contents: str) -> list:
+    """
+    Finds the names in the contents of a line which may be symbols (labels or equates)
 
-    return contents
+    >>> find_symbols('#size, (A0)')
+    ['size']
+
+    >>> find_symbols("($0000ABCD).L, D0, 'text'")
+    []
+
+    :param contents: The contents of the line, after the opcode
+    :return: The names which aren't registers, in order
+    """
+    return [m.group(1) for m in OPERAND_TOKENS.finditer(contents)
+            if m.group(1) is not None and m.group(1).upper() not in REGISTER_NAMES]
 
 
 def parse(text: str) -> (ListFile, list):
     """
     Parses an assembly file and returns a list file, along with errors/warnings from the parsing process.
+
+    This goes through the text once, splitting each line and assembling it right away.
+    Lines which use a label that isn't defined yet are assembled with ($00000000).L in its place,
+    which is the size that a label takes up in most instructions, and are kept as fixups to assemble again
+    at the end once every label is known. If that changes the size of a line, like the offset of a branch,
+    the lines after it are already in the wrong place, so that is an error. Equates can be used anywhere
+    in the file, so the lines with EQU are found before that.
     :param text: The assembly file text to parse
     :return: The parsed list file
     """
-    # --- PART 1: process for labels and equates ---
-    labels, equates, issues = find_labels(text)
-
-    # --- PART 2: process operations for sizing and lay out memory ---
     to_return = ListFile()
     current_memory_location = 0x00000000
+    equates, issues = find_equates(text)  # Stores the text that each equate stands for
     label_addresses = {}  # Stores all of the label memory locations
+    end_contents = None
+
+    # (location, length, opcode, op class, contents, names of the labels that weren't defined yet)
+    fixups = []
 
     for label, opcode, contents in for_line_opcode_parse(text):
         # Equates have already been processed, skip them
-        # ENDs aren't processed until phase 3, skip them for now
-        # (this idea could be expanded for more preprocessor directives)
-        if opcode == 'EQU' or opcode == 'END':
+        if opcode == 'EQU':
+            continue
+
+        if opcode == 'END':
+            # the starting address is worked out at the end, since it is usually the label of a later line
+            end_contents = contents
             continue
 
         # Replace all substitutions in the current line with their corresponding values
         contents = replace_equates(contents, equates)
-        # Replace all labels with temporary addresses because we don't know their actual values yet
-        contents = replace_labels_with_temps(contents, labels)
-
-        if label is not None:
-            label_addresses[label] = current_memory_location
-            to_return.define_symbol(label, current_memory_location)
 
         if opcode == 'ORG':  # This will shift our current memory location, it's a special case
-            try:
-                new_memory_location = parse_literal(contents)
-            except:
-                issues.append(('Error parsing ORG value', 'ERROR'))
-                continue
-            if not (0 <= new_memory_location < MAX_MEMORY_LOCATION):
-                issues.append(('ORG address must be between 0 and 2^24!', 'ERROR'))
-                continue
-            current_memory_location = new_memory_location
-            # Update the label with the new address, if it exists
-            if label is not None:
+            new_memory_location = parse_org(contents, issues)
+            if new_memory_location is not None:
+                current_memory_location = new_memory_location
+
+        if label is not None:
+            if label in equates or label in label_addresses:
+                issues.append(('Label {} already declared'.format(label), 'ERROR'))
+            else:
                 label_addresses[label] = current_memory_location
                 to_return.define_symbol(label, current_memory_location)
+
+        if opcode == 'ORG':
             continue
 
-        # TODO: Possibly cache this (and the module search) for Part 3 later so we don't have to redo introspection?
+        # Replace all memory labels that are known with their proper values
+        contents = replace_label_addresses(contents, label_addresses)
+        undefined = find_symbols(contents)
+
         op_class = find_opcode_cls(opcode)
-        # We don't know this opcode, there's no module for it
         if op_class is None:
             issues.append(('Opcode {} is not known: skipping and continuing'.format(opcode), 'ERROR'))
             continue
 
-        length = op_class.get_word_length(opcode, contents)
+        # for BRA and probably in the future JMP ops...
+        # addr must be handed off so that they can pull an offset out of the operand address.
+        if issubclass(op_class, bcc.branch_code):
+            contents += ", " + str(current_memory_location)
 
+        if undefined:
+            # Assemble it with temporary addresses, which usually take up the same space as the real ones
+            length = _assemble_line(to_return, issues, current_memory_location, opcode, op_class,
+                                    replace_labels_with_temps(contents, {name: None for name in undefined}))
+            if length is not None:
+                fixups.append((current_memory_location, length, opcode, op_class, contents, undefined))
+        else:
+            length = _assemble_line(to_return, issues, current_memory_location, opcode, op_class, contents)
+        if length is None:
+            continue
+
+        # Increment our memory counter
         current_memory_location += length * 2
 
-    current_memory_location = 0x00000000
+    # --- patch the lines which used labels that weren't defined yet ---
+    for location, length, opcode, op_class, contents, undefined in fixups:
+        if str(location) in to_return.data:
+            to_return.clear_location(location)
 
-    # --- PART 3: actually create the list file ---
-    for l, opcode, contents in for_line_opcode_parse(text):
-        # Equates have already been processed, skip them
-        # (this idea could be expanded for more preprocessor directives)
-        if opcode == 'EQU':
+        missing = [name for name in undefined if name not in label_addresses]
+        for name in missing:
+            issues.append(('Symbol {} is not defined'.format(name), 'ERROR'))
+        if missing:
             continue
 
-        # Replace all substitutions in the current line with their corresponding values
-        contents = replace_equates(contents, equates)
+        contents = replace_label_addresses(contents, {name: label_addresses[name] for name in undefined})
+        new_length = _assemble_line(to_return, issues, location, opcode, op_class, contents)
 
-        if opcode == 'END':
-            # End doesn't take an absolute long address, replace it differently
-            for label in label_addresses.items():
-                contents = contents.replace(label[0], '${:x}'.format(label[1]))
-        else:
-            # Replace all memory labels with their proper values (that's the difference in this step)
-            contents = replace_label_addresses(contents, label_addresses)
+        # the lines after it were laid out with the size it had with the temporary addresses
+        if new_length is not None and new_length != length:
+            issues.append((size_changed_issue(location), 'ERROR'))
 
-        if opcode == 'ORG':  # This will shift our current memory location, it's a special case
-            try:
-                new_memory_location = parse_literal(contents)
-            except:
-                # Don't need to print assertion, we already did that earlier
-                continue
-            if not (0 <= new_memory_location < MAX_MEMORY_LOCATION):
-                continue
-            current_memory_location = new_memory_location
-            continue
+    if end_contents is not None:
+        set_start(to_return, end_contents, equates, label_addresses)
 
-        if opcode == 'END':  # This will set our end memory location, it's a special case
-            start_location = parse_literal(contents)
-            if not (0 <= start_location < MAX_MEMORY_LOCATION):
-                continue
-            to_return.set_starting_execution_address(start_location)
-            continue
+    return to_return, issues
 
-        # TODO: Possibly use a cached version?
-        op_class = find_opcode_cls(opcode)
 
-        if op_class is None:
-            issues.append(('Opcode {} is not known: skipping and continuing'.format(opcode), 'ERROR'))
-            continue
+def size_changed_issue(location: int) -> str:
+    """
+    Gets the issue for a line which changed size once the labels it used were known
 
-        # check that the input is valid the opcode at the module level
-        is_valid, issues = op_class.is_valid(opcode, contents)
+    >>> size_changed_issue(0x400)
+    'The line at $400 changed size once its labels were known, so the lines after it are in the wrong place'
 
-        # for BRA and probably in the future JMP ops...
-        # addr must be handed off so that they can pull an offset out of the operand address.
-        if issubclass(op_class, bcc.branch_code):
-            contents += ", " + str(current_memory_location)
+    :param location: The memory location of the line
+    :return: The text of the issue
+    """
+    return 'The line at ${:x} changed size once its labels were known, so the lines after it are in the ' \
+           'wrong place'.format(location)
+
+
+def parse_org(contents: str, issues: list) -> int:
+    """
+    Parses the location that an ORG moves to
+    :param contents: The contents of the ORG line, with the equates replaced
+    :param issues: The list to add any issues with the location to
+    :return: The location, or None if it isn't valid
+    """
+    try:
+        new_memory_location = parse_literal(contents)
+    except:
+        issues.append(('Error parsing ORG value', 'ERROR'))
+        return None
+    if not (0 <= new_memory_location < MAX_MEMORY_LOCATION):
+        issues.append(('ORG address must be between 0 and 2^24!', 'ERROR'))
+        return None
+    return new_memory_location
+
+
+def set_start(list_file: ListFile, end_contents: str, equates: dict, label_addresses: dict):
+    """
+    Sets the starting execution address of the list file to the one given to END
+    :param list_file: The list file to set the address of
+    :param end_contents: The contents of the END line
+    :param equates: The equates in the file
+    :param label_addresses: The locations of all of the labels in the file
+    :return:
+    """
+    # End doesn't take an absolute long address, replace it differently
+    contents = replace_symbols(replace_equates(end_contents, equates), label_addresses, '${:x}'.format)
 
-        # if valid, then actually construct the opcode
-        if is_valid:
-            # get the length of the operation in # of words
-            length = op_class.get_word_length(opcode, contents)
-            # make the opcode
-            data = op_class.from_str(opcode, contents)
+    start_location = parse_literal(contents)
+    if 0 <= start_location < MAX_MEMORY_LOCATION:
+        list_file.set_starting_execution_address(start_location)
 
-            # ensure that the data was built correctly and append it
-            if data is not None:
-                # instead of converting to a string here, we should make this a method of the base opcode class
-                to_return.insert_data(current_memory_location, str(binascii.hexlify(data.assemble()))[2:-1])
 
-                # Increment our memory counter
-                current_memory_location += length * 2
+def _assemble_line(list_file: ListFile, issues: list, location: int, opcode: str, op_class: type, contents: str):
+    """
+    Assembles a single line into the list file
+    :param list_file: The list file to insert the assembled data into
+    :param issues: The list to add any issues with the line to
+    :param location: The memory location of the line
+    :param opcode: The opcode of the line
+    :param op_class: The opcode class found for the opcode
+    :param contents: The contents of the line, with every symbol replaced
+    :return: The length of the line in words, or None if it isn't valid
+    """
+    length, line_issues, data, is_code = assemble_instruction(location, opcode, op_class, contents)
+    issues.extend(line_issues)
 
-    return to_return, issues
+    # ensure that the data was built correctly and append it
+    if data is not None:
+        list_file.insert_data(location, data, is_code)
+
+    return length
+
+
+def assemble_instruction(location: int, opcode: str, op_class: type, contents: str) -> (int, list, str, bool):
+    """
+    Assembles a single line, without adding it to a list file
+    :param location: The memory location of the line
+    :param opcode: The opcode of the line
+    :param op_class: The opcode class found for the opcode
+    :param contents: The contents of the line, with every symbol replaced
+    :return: The length of the line in words (or None if it isn't valid), the issues with the line,
+             the assembled data as hex (or None if there isn't any) and whether the data is an instruction
+    """
+    # split the line once, so the operands are only parsed once for all three steps
+    line = InstructionLine(opcode, contents, location)
+
+    # check that the input is valid the opcode at the module level
+    is_valid, issues = op_class.is_valid_ir(line)
+    if not is_valid:
+        return None, issues, None, False
+
+    # get the length of the operation in # of words
+    length = op_class.get_word_length_ir(line)
+    # make the opcode
+    data = op_class.from_ir(line)
+    if data is None:
+        return length, issues, None, False
+
+    # instead of converting to a string here, we should make this a method of the base opcode class
+    return length, issues, str(binascii.hexlify(data.assemble()))[2:-1], not isinstance(data, dc.DC)
@@ -0,0 +1,573 @@
+"""
+Incremental Assembler
+
+Assembles the same file over and over as it is edited, like an editor which assembles on every keystroke,
+and only does the work again for the lines which changed.
+
+Each line is split once for as long as its text is in the file. Its size and encoding are kept with a key
+of everything that they depend on: the text of the line, the values of the equates it uses,
+its location if it is a branch and the addresses of the labels it uses. Lines are laid out with the size
+they have with their labels known, or with temporary addresses if a label is only defined after them,
+in which case a line which changes size once the label is known is an error, the same as in parse.
+
+After an edit, the lines before the first changed line are the same as before. If the changed lines
+still end at the same address and define the same labels, nothing after them moves either,
+so only the changed lines are assembled and put in place of the old ones. Otherwise the addresses
+are laid out again, using the sizes and encodings that were kept, which only assembles the lines
+whose text or symbols changed.
+
+The list file and issues are equal to the ones from assembler.parse for the same text,
+though the data of the list file may be in a different order.
+"""
+
+from itertools import chain
+
+from ..core.models.list_file import ListFile
+from ..core.util.find_module import find_opcode_cls
+from ..core.util.parsing import split_line
+from ..core.opcodes import bcc
+from .assembler import find_equates, find_symbols, replace_equates, replace_label_addresses, \
+    replace_labels_with_temps, parse_org, set_start, assemble_instruction, size_changed_issue
+
+# the opcodes which change how the lines after them are assembled, so a file can't be patched
+# when they are edited
+LAYOUT_OPCODES = {'EQU', 'ORG', 'END'}
+
+
+def _count_same(first: list, second: list) -> int:
+    """
+    Counts how many of the items at the start of two lists are the same
+    :param first: The first list
+    :param second: The second list
+    :return: The number of items before the first one that is different
+    """
+    shortest = min(len(first), len(second))
+    # compare a block at a time, which is much faster than one item at a time
+    count = 0
+    while count < shortest and first[count:count + 256] == second[count:count + 256]:
+        count += 256
+    count = min(count, shortest)
+    while count < shortest and first[count] == second[count]:
+        count += 1
+    return count
+
+
+class _Line:
+    """
+    A line of the file, split into its parts
+    """
+
+    def __init__(self, text: str):
+        split = split_line(text)
+
+        # lines without an opcode, like comments, are None
+        self.label, self.opcode, self.contents = split if split is not None else (None, None, None)
+
+        if self.opcode is not None:
+            # the names which may be equates or labels
+            self.names = tuple(find_symbols(self.contents))
+            self.op_class = find_opcode_cls(self.opcode)
+            self.is_branch = self.op_class is not None and issubclass(self.op_class, bcc.branch_code)
+
+
+class _SizedLine:
+    """
+    A line assembled with temporary addresses in place of its labels, which is how it is laid out
+    when its labels aren't known yet. The real addresses usually take up the same space, but not always,
+    so the line is checked once they are known.
+
+    Only branches depend on their location, so the same one is used for every line with the same text
+    and equates, wherever they are
+    """
+
+    def __init__(self, line: _Line, equates: dict, location: int):
+        self.line = line
+
+        # Replace all substitutions in the current line with their corresponding values
+        self.contents = replace_equates(line.contents, equates)
+        # the names of the labels that the line uses, which are only all known once the file has been laid out
+        self.labels = tuple(find_symbols(self.contents))
+
+        contents = replace_labels_with_temps(self.contents, {name: None for name in self.labels})
+        self.length, self.issues, self.data, self.is_code = self.assemble(contents, location)
+
+    def assemble(self, contents: str, location: int) -> tuple:
+        """
+        Assembles the line with the symbols in the contents replaced
+        :param contents: The contents of the line, with every symbol replaced
+        :param location: The memory location of the line
+        :return: The length, issues, data and whether the data is an instruction, like assemble_instruction
+        """
+        # for BRA and probably in the future JMP ops...
+        # addr must be handed off so that they can pull an offset out of the operand address.
+        if self.line.is_branch:
+            contents += ", " + str(location)
+
+        return assemble_instruction(location, self.line.opcode, self.line.op_class, contents)
+
+
+class _AssembledFile:
+    """
+    What each line of an assembled file became, kept so the file can be patched after the next edit
+
+    Every list has an entry for each line, and the data of the lines never overlap
+    """
+
+    def __init__(self, text_lines: list):
+        self.text_lines = text_lines
+
+        # the location of each line, with one more at the end for the location after the last line
+        self.locations = []
+        # the key in the data of the list file that each line put its data at, or None for lines without data
+        self.data_keys = []
+        # the same, but also for the lines which used labels defined after them, since parse clears their location
+        # even if they end up without data
+        self.placed_keys = []
+        # the issues with each line, and the ones added for the lines that used labels defined after them
+        self.line_issues = []
+        self.label_issues = []
+
+        self.equates = None
+        # the number of the line that defined each label
+        self.label_lines = None
+
+        # what assemble gave back, which is copied each time so it can't be changed by the caller
+        self.list_file = ListFile()
+        self.issues = []
+
+    def patch(self, first: int, old_end: int, patch) -> '_AssembledFile':
+        """
+        Makes the file with the lines [first, old_end) replaced by the lines in a patch
+        :param first: The first line replaced
+        :param old_end: The line after the last one replaced
+        :param patch: A file with the lists for the new lines, and their data in its list file
+        :return: The new file
+        """
+        def splice(old: list, new: list) -> list:
+            return old[:first] + new + old[old_end:]
+
+        patched = _AssembledFile(patch.text_lines)
+        patched.locations = splice(self.locations, patch.locations)
+        patched.data_keys = splice(self.data_keys, patch.data_keys)
+        patched.placed_keys = splice(self.placed_keys, patch.placed_keys)
+        patched.line_issues = splice(self.line_issues, patch.line_issues)
+        patched.label_issues = splice(self.label_issues, patch.label_issues)
+
+        patched.equates = self.equates
+        # the labels are on the same lines, but the ones after the patch may have moved
+        moved = len(patch.line_issues) - (old_end - first)
+        patched.label_lines = {name: line + moved if line >= old_end else line
+                               for name, line in self.label_lines.items()} if moved else self.label_lines
+
+        list_file = patched.list_file
+        list_file.data = self.list_file.data.copy()
+        list_file.code = self.list_file.code.copy()
+        # the data that is put back keeps its place in the order, the same as parse
+        for key in self.data_keys[first:old_end]:
+            if key is not None:
+                if key not in patch.list_file.data:
+                    del list_file.data[key]
+                list_file.code.discard(key)
+        list_file.data.update(patch.list_file.data)
+        list_file.code.update(patch.list_file.code)
+        list_file.symbols = self.list_file.symbols
+        list_file.starting_execution_address = self.list_file.starting_execution_address
+
+        # the issues are the equate issues, then the issues of each line, then the label issues of each line
+        if not any(chain(self.line_issues[first:old_end], self.label_issues[first:old_end],
+                         patch.line_issues, patch.label_issues)):
+            patched.issues = self.issues
+            return patched
+
+        line_start = len(self.issues) - sum(map(len, self.line_issues)) - sum(map(len, self.label_issues))
+        line_first = line_start + sum(map(len, self.line_issues[:first]))
+        line_end = line_first + sum(map(len, self.line_issues[first:old_end]))
+        label_first = line_start + sum(map(len, self.line_issues)) + sum(map(len, self.label_issues[:first]))
+        label_end = label_first + sum(map(len, self.label_issues[first:old_end]))
+        patched.issues = self.issues[:line_first] + list(chain.from_iterable(patch.line_issues)) + \
+            self.issues[line_end:label_first] + list(chain.from_iterable(patch.label_issues)) + \
+            self.issues[label_end:]
+        return patched
+
+    def get_result(self) -> (ListFile, list):
+        """
+        Gets a copy of the list file and issues, which the caller can change
+        :return: The list file and the errors/warnings, like assembler.parse
+        """
+        list_file = ListFile()
+        list_file.data = self.list_file.data.copy()
+        list_file.code = self.list_file.code.copy()
+        list_file.symbols = self.list_file.symbols.copy()
+        list_file.starting_execution_address = self.list_file.starting_execution_address
+        return list_file, list(self.issues)
+
+
+class IncrementalAssembler:
+    """
+    Assembles a file again after it is edited, reusing the work done for the lines which didn't change
+
+    >>> session = IncrementalAssembler()
+    >>> list_file, issues = session.assemble('    ORG $400\\nstart MOVE.W #1, D0\\n    SIMHALT\\n    END start')
+    >>> list_file.data
+    {'1024': '303c0001', '1028': 'ffffffff'}
+
+    >>> list_file, issues = session.assemble('    ORG $400\\nstart MOVE.W #2, D0\\n    SIMHALT\\n    END start')
+    >>> list_file.data
+    {'1024': '303c0002', '1028': 'ffffffff'}
+
+    >>> session.assembled_lines
+    1
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # line text to _Line
+        self.__lines = {}
+
+        # (line text, equate values, location of a branch) to _SizedLine
+        self.__sized = {}
+
+        # (sized key, label addresses) to the result of assemble_instruction with the labels replaced
+        self.__encoded = {}
+
+        # the file from the last time, or None if it can't be patched
+        self.__file = None
+
+        # the number of lines which had to be assembled by the last call to assemble,
+        # to see how much of the work was reused
+        self.assembled_lines = 0
+
+    def assemble(self, text: str) -> (ListFile, list):
+        """
+        Assembles the full text of the file, the same as assembler.parse
+        :param text: The assembly file text to parse
+        :return: The parsed list file and the errors/warnings from the parsing process
+        """
+        self.assembled_lines = 0
+        text_lines = text.splitlines()
+
+        # the caches only keep what is used by a full layout, so patching grows them until the next one
+        assembled = None
+        if self.__file is not None and len(self.__lines) <= 2 * len(text_lines) + 1024:
+            assembled = self.__patch(text_lines)
+
+        if assembled is not None:
+            self.__file = assembled
+            return assembled.get_result()
+
+        return self.__layout(text, text_lines)
+
+    def __get_line(self, text_line: str) -> _Line:
+        """
+        Gets the split line, splitting it the first time
+        """
+        line = self.__lines.get(text_line)
+        if line is None:
+            line = _Line(text_line)
+            self.__lines[text_line] = line
+        return line
+
+    def __get_sized(self, key: tuple, line: _Line, equates: dict, location: int, sized: dict) -> _SizedLine:
+        """
+        Gets the line assembled with temporary addresses, assembling it if it's key is new
+        :param key: (line text, equate values, location of a branch)
+        :param line: The split line
+        :param equates: The equates in the file
+        :param location: The memory location of the line
+        :param sized: The sized lines to keep for next time
+        :return: The sized line
+        """
+        sized_line = sized.get(key)
+        if sized_line is None:
+            sized_line = self.__sized.get(key)
+            if sized_line is None:
+                sized_line = _SizedLine(line, equates, location)
+                self.assembled_lines += 1
+            sized[key] = sized_line
+        return sized_line
+
+    def __encode(self, location: int, key: tuple, sized_line: _SizedLine, label_addresses: dict,
+                 encoded: dict) -> tuple:
+        """
+        Assembles a line with the addresses of its labels, unless it was already assembled with the same ones
+        :param location: The memory location of the line
+        :param key: The key of the sized line
+        :param sized_line: The line assembled with temporary addresses
+        :param label_addresses: The locations of the labels, which must have every label that the line uses
+        :param encoded: The encoded lines to keep for next time
+        :return: The length, issues, data and whether the data is an instruction, like assemble_instruction
+        """
+        addresses = {name: label_addresses[name] for name in sized_line.labels}
+        encoded_key = (key, tuple(addresses.values()))
+
+        result = encoded.get(encoded_key)
+        if result is None:
+            result = self.__encoded.get(encoded_key)
+            if result is None:
+                result = sized_line.assemble(replace_label_addresses(sized_line.contents, addresses), location)
+                self.assembled_lines += 1
+            encoded[encoded_key] = result
+        return result
+
+    def __layout(self, text: str, text_lines: list) -> (ListFile, list):
+        """
+        Assembles the whole file the same way as assembler.parse, with the lines that were assembled before
+        :param text: The assembly file text to parse
+        :param text_lines: The lines of the text
+        :return: The parsed list file and the errors/warnings from the parsing process
+        """
+        # what is used this time, which replaces the caches at the end so they don't grow as the file is edited
+        old_lines = self.__lines
+        self.__lines = {}
+        sized = {}
+        encoded = {}
+
+        to_return = ListFile()
+        current_memory_location = 0x00000000
+        equates, issues = find_equates(text)
+        label_addresses = {}
+        label_lines = {}
+        end_contents = None
+
+        assembled = _AssembledFile(text_lines)
+        assembled.equates = equates
+        data_keys = assembled.data_keys
+        line_issues = assembled.line_issues
+
+        # (line number, location, sized key, sized line) of the lines which used labels that weren't defined yet
+        fixups = []
+        placed_keys = assembled.placed_keys
+
+        for line_number, text_line in enumerate(text_lines):
+            line = self.__lines.get(text_line)
+            if line is None:
+                line = old_lines.get(text_line) or _Line(text_line)
+                self.__lines[text_line] = line
+
+            assembled.locations.append(current_memory_location)
+            data_keys.append(None)
+            placed_keys.append(None)
+            issue_count = len(issues)
+
+            opcode = line.opcode
+            if opcode is None or opcode == 'EQU':
+                line_issues.append(())
+                continue
+
+            if opcode == 'END':
+                end_contents = line.contents
+                line_issues.append(())
+                continue
+
+            if opcode == 'ORG':
+                new_memory_location = parse_org(replace_equates(line.contents, equates), issues)
+                if new_memory_location is not None:
+                    current_memory_location = new_memory_location
+                    assembled.locations[line_number] = current_memory_location
+
+            label = line.label
+            if label is not None:
+                if label in equates or label in label_addresses:
+                    issues.append(('Label {} already declared'.format(label), 'ERROR'))
+                else:
+                    label_addresses[label] = current_memory_location
+                    label_lines[label] = line_number
+                    to_return.define_symbol(label, current_memory_location)
+
+            if opcode == 'ORG' or line.op_class is None:
+                if opcode != 'ORG':
+                    issues.append(('Opcode {} is not known: skipping and continuing'.format(opcode), 'ERROR'))
+                line_issues.append(tuple(issues[issue_count:]))
+                continue
+
+            key = (text_line,
+                   tuple([equates.get(name) for name in line.names]),
+                   current_memory_location if line.is_branch else None)
+            sized_line = self.__get_sized(key, line, equates, current_memory_location, sized)
+
+            if sized_line.labels and all(name in label_addresses for name in sized_line.labels):
+                length, line_issue, data, is_code = self.__encode(current_memory_location, key, sized_line,
+                                                                  label_addresses, encoded)
+            else:
+                # lines with labels that aren't defined yet are put in with the temporary addresses
+                # until the labels are known, the same as parse
+                length, line_issue, data, is_code = \
+                    sized_line.length, sized_line.issues, sized_line.data, sized_line.is_code
+                if sized_line.labels and length is not None:
+                    fixups.append((line_number, current_memory_location, key, sized_line))
+
+            issues.extend(line_issue)
+            line_issues.append(tuple(issues[issue_count:]) if len(issues) > issue_count else ())
+            if length is None:
+                continue
+
+            if data is not None:
+                to_return.insert_data(current_memory_location, data, is_code)
+                data_keys[line_number] = str(current_memory_location)
+            if data is not None or fixups and fixups[-1][0] == line_number:
+                placed_keys[line_number] = str(current_memory_location)
+
+            # Increment our memory counter
+            current_memory_location += length * 2
+
+        assembled.locations.append(current_memory_location)
+        assembled.label_issues = [()] * len(text_lines)
+
+        # --- patch the lines which used labels that weren't defined yet ---
+        for line_number, location, key, sized_line in fixups:
+            issue_count = len(issues)
+            data_keys[line_number] = None
+            if str(location) in to_return.data:
+                to_return.clear_location(location)
+
+            missing = [name for name in sized_line.labels if name not in label_addresses]
+            for name in missing:
+                issues.append(('Symbol {} is not defined'.format(name), 'ERROR'))
+            if not missing:
+                length, line_issue, data, is_code = self.__encode(location, key, sized_line,
+                                                                  label_addresses, encoded)
+                issues.extend(line_issue)
+                if data is not None:
+                    to_return.insert_data(location, data, is_code)
+                    data_keys[line_number] = str(location)
+                if length is not None and length != sized_line.length:
+                    issues.append((size_changed_issue(location), 'ERROR'))
+            assembled.label_issues[line_number] = tuple(issues[issue_count:])
+
+        if end_contents is not None:
+            set_start(to_return, end_contents, equates, label_addresses)
+
+        self.__sized = sized
+        self.__encoded = encoded
+
+        # lines which put data in the same place can't be patched, since which one ends up there
+        # depends on the order that they were put in
+        placed = [key for key in placed_keys if key is not None]
+        if len(set(placed)) == len(placed):
+            assembled.label_lines = label_lines
+            assembled.list_file = to_return
+            assembled.issues = issues
+            self.__file = assembled
+            return assembled.get_result()
+
+        self.__file = None
+        return to_return, issues
+
+    def __patch(self, text_lines: list) -> _AssembledFile:
+        """
+        Assembles only the lines that changed since the last time, if nothing after them moved
+        :param text_lines: The lines of the text
+        :return: The assembled file, or None if it has to be laid out again
+        """
+        old = self.__file
+        old_lines = old.text_lines
+
+        # find the lines which changed
+        first = _count_same(old_lines, text_lines)
+        same_after = _count_same(old_lines[first:][::-1], text_lines[first:][::-1])
+        old_end = len(old_lines) - same_after
+        new_end = len(text_lines) - same_after
+
+        old_changed = [self.__get_line(text_line) for text_line in old_lines[first:old_end]]
+        new_changed = [self.__get_line(text_line) for text_line in text_lines[first:new_end]]
+
+        # changing these changes the lines after them
+        if any(line.opcode in LAYOUT_OPCODES for line in chain(old_changed, new_changed)):
+            return None
+
+        # the labels on the lines have to be the same, so all of the label addresses stay the same
+        if [line.label for line in old_changed if line.label is not None] != \
+                [line.label for line in new_changed if line.label is not None]:
+            return None
+
+        equates = old.equates
+        label_addresses = old.list_file.symbols
+        label_lines = old.label_lines
+
+        patch = _AssembledFile(text_lines)
+        current_memory_location = old.locations[first]
+        defined = set()
+
+        for line_number, line in enumerate(new_changed, first):
+            patch.locations.append(current_memory_location)
+            patch.data_keys.append(None)
+            patch.placed_keys.append(None)
+            patch.label_issues.append(())
+
+            opcode = line.opcode
+            if opcode is None:
+                patch.line_issues.append(())
+                continue
+
+            issues = []
+
+            label = line.label
+            if label is not None:
+                if label in equates or label in defined or label_lines.get(label, old_end) < first:
+                    issues.append(('Label {} already declared'.format(label), 'ERROR'))
+                elif label_addresses.get(label) != current_memory_location:
+                    return None
+                else:
+                    defined.add(label)
+
+            if line.op_class is None:
+                issues.append(('Opcode {} is not known: skipping and continuing'.format(opcode), 'ERROR'))
+                patch.line_issues.append(tuple(issues))
+                continue
+
+            key = (text_lines[line_number],
+                   tuple([equates.get(name) for name in line.names]),
+                   current_memory_location if line.is_branch else None)
+            sized_line = self.__get_sized(key, line, equates, current_memory_location, self.__sized)
+
+            # the lines which use labels defined after them are assembled again at the end by parse
+            fixup = sized_line.labels and \
+                not all(name in defined or label_lines.get(name, first) < first for name in sized_line.labels)
+            if sized_line.labels and not fixup:
+                length, line_issue, data, is_code = self.__encode(current_memory_location, key, sized_line,
+                                                                  label_addresses, self.__encoded)
+            else:
+                length, line_issue, data, is_code = \
+                    sized_line.length, sized_line.issues, sized_line.data, sized_line.is_code
+
+            issues.extend(line_issue)
+            patch.line_issues.append(tuple(issues))
+            if length is None:
+                continue
+
+            if fixup:
+                patch.placed_keys[-1] = str(current_memory_location)
+                missing = [name for name in sized_line.labels if name not in label_addresses]
+                if missing:
+                    patch.label_issues[-1] = tuple(('Symbol {} is not defined'.format(name), 'ERROR')
+                                                   for name in missing)
+                    data = None
+                else:
+                    new_length, label_issues, data, is_code = self.__encode(current_memory_location, key,
+                                                                            sized_line, label_addresses,
+                                                                            self.__encoded)
+                    if new_length is not None and new_length != length:
+                        label_issues = label_issues + [(size_changed_issue(current_memory_location), 'ERROR')]
+                    patch.label_issues[-1] = tuple(label_issues)
+
+            if data is not None:
+                patch.data_keys[-1] = str(current_memory_location)
+                patch.placed_keys[-1] = patch.data_keys[-1]
+                patch.list_file.insert_data(current_memory_location, data, is_code)
+
+            current_memory_location += length * 2
+
+        # everything after the changed lines has to stay where it was
+        if current_memory_location != old.locations[old_end]:
+            return None
+
+        # the data of the changed lines can't be put in the same place as the data of any others
+        new_keys = [key for key in patch.placed_keys if key is not None]
+        if new_keys:
+            if len(set(new_keys)) != len(new_keys) or \
+                    set(new_keys).intersection(old.placed_keys).difference(old.placed_keys[first:old_end]):
+                return None
+
+        return old.patch(first, old_end, patch)
@@ -1,10 +1,13 @@
 __all__ = ['condition',
            'condition_status_code',
+           'dump_compression',
            'ea_mode',
            'ea_mode_bin',
            'op_size',
            'register',
            'srecordtype',
+           'stop_reason',
            'system_status_code',
            'trap_task',
-           'trap_vector']
+           'trap_vector',
+           'watch_kind']
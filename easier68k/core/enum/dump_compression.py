@@ -0,0 +1,16 @@
+"""
+Dump Compression
+Represents the ways that the body of a dump written by M68K.save_dump can be compressed
+"""
+
+from enum import IntEnum
+
+class DumpCompression(IntEnum):
+    # the body is stored as it is
+    NONE = 0
+
+    # the body is compressed with zlib, which is fast and the default
+    ZLIB = 1
+
+    # the body is compressed with lzma, which is slower but makes smaller dumps
+    LZMA = 2
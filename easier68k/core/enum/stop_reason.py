@@ -0,0 +1,22 @@
+"""
+Stop Reason
+Represents the different reasons for the simulator to stop running a batch of instructions
+"""
+
+from enum import Enum
+
+class StopReason(Enum):
+    # SIMHALT or the Terminate trap task was run, or the simulator was halted
+    HALTED = 0
+
+    # the limit on the number of instructions, cycles or time was reached
+    BUDGET_EXHAUSTED = 1
+
+    # the program counter reached a breakpoint
+    BREAKPOINT = 2
+
+    # an instruction raised an error, or there was no instruction to decode
+    FAULT = 3
+
+    # a watched range of memory was read from or written to
+    WATCHPOINT = 4
@@ -0,0 +1,17 @@
+"""
+Watch Kind
+Represents the kinds of memory accesses that a watchpoint stops the simulator on
+The values are bit masks, which are combined with | as ints
+"""
+
+from enum import IntEnum
+
+class WatchKind(IntEnum):
+    # the watched memory is read from by an instruction
+    READ = 1
+
+    # the watched memory is written to by an instruction
+    WRITE = 2
+
+    # the watched memory is read from or written to
+    ACCESS = READ | WRITE
@@ -1 +1 @@
-__all__ = ['list_file', 'assembly_parameter']
\ No newline at end of file
+__all__ = ['list_file', 'assembly_parameter', 'instruction_line']
\ No newline at end of file
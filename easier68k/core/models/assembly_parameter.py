@@ -94,10 +94,10 @@ class AssemblyParameter:
             addr_register = Register(self.data + Register.A0.value)
             # this gets the value of the register, which points to a location
             # in memory where the target value is
-            register_value = simulator.get_register(addr_register)
+            location = simulator.get_register_value(addr_register)
             # now get the value in memory of that register
-            val = simulator.memory.get(length, register_value.get_value_unsigned())
-            return val
+            length = OpSize(length)
+            return MemoryValue(length, unsigned_int=simulator.memory.read(length.value, location))
 
         if self.mode is EAMode.AddressRegisterIndirectPostIncrement:
             # address register indirect gets the value that the register points to
@@ -107,14 +107,12 @@ class AssemblyParameter:
             addr_register = Register(self.data + Register.A0.value)
             # this gets the value of the register, which points to a location
             # in memory where the target value is
-            register_value = simulator.get_register(addr_register)
+            location = simulator.get_register_value(addr_register)
             # now get the value in memory of that register
-            val = simulator.memory.get(OpSize.LONG, register_value.get_value_unsigned())
-            total = register_value.get_value_unsigned() + OpSize.LONG.value
-            mv = MemoryValue(OpSize.LONG, unsigned_int=total)
+            val = MemoryValue(OpSize.LONG, unsigned_int=simulator.memory.read_u32(location))
 
             # do the post increment
-            simulator.set_register(addr_register, mv)
+            simulator.set_register_value(addr_register, location + OpSize.LONG.value)
 
             return val
 
@@ -126,17 +124,14 @@ class AssemblyParameter:
             addr_register = Register(self.data + Register.A0)
             # this gets the value of the register, which points to a location
             # in memory where the target value is
-            register_value = simulator.get_register(addr_register)
-
-            total = register_value.get_value_unsigned() - OpSize.LONG.value
-            mv = MemoryValue(OpSize.LONG, unsigned_int=total)
+            total = simulator.get_register_value(addr_register) - OpSize.LONG.value
 
-            # do the pre decrement (this does not update the value of register_value)
-            simulator.set_register(addr_register, mv)
+            # do the pre decrement
+            simulator.set_register_value(addr_register, total)
 
-            # now get the value in memory of that register
+            # now get the value in memory at the decremented location
             # and return that value
-            return simulator.memory.get(OpSize.LONG, register_value.get_value_unsigned())
+            return MemoryValue(OpSize.LONG, unsigned_int=simulator.memory.read_u32(total))
 
         if self.mode in [EAMode.AbsoluteLongAddress, EAMode.AbsoluteWordAddress]:
             # if mode is absolute long or word address
@@ -193,7 +188,7 @@ class AssemblyParameter:
             assert 0 <= value.get_value_unsigned() <= MAX_MEMORY_LOCATION, 'The value must fit in the memory space [0, 2^24]'
             addr_register = Register(self.data + Register.A0)
             location = simulator.get_register(addr_register).get_value_unsigned()
-            simulator.memory.set(value.length, location, value)
+            simulator.memory.write(value.length.get_number_of_bytes(), location, value.get_value_unsigned())
 
         if self.mode is EAMode.AddressRegisterIndirectPreDecrement:
             # sets the value in memory that the address register points to
@@ -203,7 +198,7 @@ class AssemblyParameter:
             location = simulator.get_register(addr_register).get_value_unsigned()
             location -= value.length.get_number_of_bytes()
             simulator.set_register(addr_register, MemoryValue(OpSize.LONG, unsigned_int=location))
-            simulator.memory.set(value.length, location, value)
+            simulator.memory.write(value.length.get_number_of_bytes(), location, value.get_value_unsigned())
 
         if self.mode is EAMode.AddressRegisterIndirectPostIncrement:
             # sets the value in memory that the address register points to
@@ -212,7 +207,7 @@ class AssemblyParameter:
 
             addr_register = Register(self.data + Register.A0)
             location = simulator.get_register(addr_register).get_value_unsigned()
-            simulator.memory.set(value.length, location, value)
+            simulator.memory.write(value.length.get_number_of_bytes(), location, value.get_value_unsigned())
             location += value.length.get_number_of_bytes()
             simulator.set_register(addr_register, MemoryValue(OpSize.LONG, unsigned_int=location))
 
@@ -228,4 +223,4 @@ class AssemblyParameter:
                 value = MemoryValue(value.length, unsigned_int=to_word(value.get_value_unsigned()))
 
             # set the value in memory to that
-            simulator.memory.set(value.length, self.data, value)
+            simulator.memory.write(value.length.get_number_of_bytes(), self.data, value.get_value_unsigned())
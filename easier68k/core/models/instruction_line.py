@@ -0,0 +1,59 @@
+"""
+Instruction Line
+
+A line of assembly code split into its parts once by the assembler, so that the opcode classes
+don't each have to split the command and parse the operands again to size, validate and encode it
+"""
+
+from .assembly_parameter import AssemblyParameter
+from ..util.parsing import from_str_util, parse_assembly_parameter
+
+# marks operands which haven't been parsed yet
+_UNPARSED = object()
+
+
+class InstructionLine:
+    """
+    The intermediate representation of a line of assembly code, which is given
+    to is_valid_ir, get_word_length_ir and from_ir of the opcode classes
+    """
+
+    def __init__(self, command: str, contents: str, location: int = 0):
+        """
+        Constructor
+        :param command: The command itself (e.g. 'MOVE.B', 'LEA', etc.)
+        :param contents: The parameters after the command (such as the source and destination of a move)
+        :param location: The memory location that the line is assembled to
+        """
+        self.command = command
+        self.contents = contents
+        self.location = location
+
+        # the size is WORD if the command doesn't have one, or None if it isn't a valid size
+        # and the operands are the parameters split by commas
+        self.size, self.operands, self.parts = from_str_util(command, contents)
+        self.mnemonic = self.parts[0]
+
+        self.__params = [_UNPARSED] * len(self.operands)
+
+    def get_param(self, index: int) -> AssemblyParameter:
+        """
+        Gets an operand parsed with parse_assembly_parameter, which only parses it the first time
+        if the operand can't be parsed, the error from parse_assembly_parameter is raised every time
+        :param index: The index of the operand
+        :return: The parsed operand, or None if it isn't an effective address
+        """
+        param = self.__params[index]
+        if param is _UNPARSED:
+            try:
+                param = parse_assembly_parameter(self.operands[index])
+            except Exception as e:
+                param = e
+            self.__params[index] = param
+
+        if isinstance(param, Exception):
+            raise param
+        return param
+
+    def __str__(self):
+        return '${:06x}: {} {}'.format(self.location, self.command, self.contents)
@@ -25,6 +25,9 @@ class ListFile:
         # but internally it will use strings
         self.data = {}
         self.symbols = {}
+        # the locations in data which hold instructions, rather than constants like DC,
+        # kept as strings the same as the keys of data
+        self.code = set()
         self.starting_execution_address = 0
 
     def set_starting_execution_address(self, location: int):
@@ -43,25 +46,29 @@ class ListFile:
         """
         return self.starting_execution_address
 
-    def insert_data(self, location: int, data: str):
+    def insert_data(self, location: int, data: str, is_code: bool = False):
         """
         Inserts the data at the given location into the list file
         This data should be a string of hexadecimal data
         :param location:
         :param data:
+        :param is_code: is the data an instruction, which the simulator can protect from being written to
         :return:
         """
         assert location >= 0, 'Location is invalid!'
         assert location < MAX_MEMORY_LOCATION, 'Location is beyond possible bounds!'
 
         # ensure that the data is valid
-        # loop through every 2 or 1 characters
-        for s in re.findall('..?', data):
-            # try to convert to an int of base 16
-            # just to ensure that it is valid
+        # try to convert to an int of base 16
+        # just to ensure that it is valid
+        if data:
             int(data, 16)
 
         self.data[str(location)] = data
+        if is_code:
+            self.code.add(str(location))
+        else:
+            self.code.discard(str(location))
 
     def insert_data_at_symbol(self, name: str, data: str):
         """
@@ -83,6 +90,15 @@ class ListFile:
         assert str(location) in self.data, 'Location not defined in data!'
 
         self.data.pop(str(location), None)
+        self.code.discard(str(location))
+
+    def is_code(self, location: int) -> bool:
+        """
+        Checks if the data at the given location is an instruction
+        :param location:
+        :return:
+        """
+        return str(location) in self.code
 
     def define_symbol(self, name: str, location: int):
         """
@@ -147,6 +163,8 @@ class ListFile:
         ret['data'] = self.data
         ret['symbols'] = self.symbols
         ret['startingExecutionAddress'] = self.starting_execution_address
+        if self.code:
+            ret['code'] = sorted(self.code, key=int)
         return json.dumps(ret, sort_keys=True)
 
     def load_from_json(self, json_str: str):
@@ -159,6 +177,8 @@ class ListFile:
         self.symbols = loaded['symbols']
         self.data = loaded['data']
         self.starting_execution_address = loaded['startingExecutionAddress']
+        # older list files don't say which data is code
+        self.code = set(loaded.get('code', []))
 
     def read_s_record_filename(self, filepath: str):
         """
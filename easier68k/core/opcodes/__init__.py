@@ -14,7 +14,7 @@ __all__ = [
     'cmpi',
     'sub',
     'subq',
-    'adda',
+    'ori',
     'jsr',
     'rts',
     'neg',
@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue
 
@@ -67,6 +68,11 @@ class Add(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'ADD'
+
+    # first word is 1101 xxx xxx xxx xxx
+    first_word_patterns = [(0xF000, 0xD000)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -183,36 +189,57 @@ class Add(Opcode):
 
         total = (raw_total & mask) | preserve
 
+        # set the CCR
+        simulator.set_ccr_deferred(Add.ccr_flags, self.size, src_val, raw_total, total)
+
+        # and set the value
+        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=(total & mask)))
+
+        # set the program counter value
+        simulator.increment_program_counter(to_increment)
+
+    @staticmethod
+    def ccr_flags(size: OpSize, src_val: MemoryValue, raw_total: int, total: int) -> tuple:
+        """
+        Computes the condition codes for an addition
+        :param size: the size of the operation
+        :param src_val: the value of the source
+        :param raw_total: the sum of the unsigned source and destination values
+        :param total: the masked total, including the preserved upper bits
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
+        mask = 0xFF
+
+        if size is OpSize.BYTE:
+            mask = 0xFF
+        if size is OpSize.WORD:
+            mask = 0xFFFF
+        if size is OpSize.LONG:
+            mask = 0xFFFFFFFF
+
         carry_bit = False
 
         # if the total is greater than the maximum size for the operation
         # then the carry bit will be set
-        if self.size is OpSize.BYTE and raw_total > 0xFF:
+        if size is OpSize.BYTE and raw_total > 0xFF:
             carry_bit = True
-        if self.size is OpSize.WORD and raw_total > 0xFFFF:
+        if size is OpSize.WORD and raw_total > 0xFFFF:
             carry_bit = True
-        if self.size is OpSize.LONG and raw_total > 0xFFFFFFFF:
+        if size is OpSize.LONG and raw_total > 0xFFFFFFFF:
             carry_bit = True
 
         negative = False
 
-        if self.size is OpSize.BYTE:
+        if size is OpSize.BYTE:
             negative = total & 0x80 > 0
-        elif self.size is OpSize.WORD:
+        elif size is OpSize.WORD:
             negative = total & 0x8000 > 0
-        elif self.size is OpSize.LONG:
+        elif size is OpSize.LONG:
             negative = total & 0x80000000 > 0
 
         original_negative = src_val.get_negative()
 
-        # set the CCR
-        simulator.set_ccr_reg(carry_bit, negative, ((total & mask) == 0), (negative != original_negative), carry_bit)
-
-        # and set the value
-        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=(total & mask)))
-
-        # set the program counter value
-        simulator.increment_program_counter(to_increment)
+        return carry_bit, negative, ((total & mask) == 0), (negative != original_negative), carry_bit
 
     def __str__(self):
         # Makes this a bit easier to read in doctest output
@@ -225,7 +252,7 @@ class Add(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'ADD')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -256,18 +283,19 @@ class Add(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        parts = command.split('.')  # Split the command by period to get the size of the command
-        if len(parts) == 1:  # Use the default size
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
-
-        # Split the parameters into EA modes
-        params = parameters.split(',')
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        size = line.size
 
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -318,9 +346,17 @@ class Add(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "ADD", 2, param_invalid_modes=[[EAMode.ARD],
-                                                                                                [EAMode.ARD,
-                                                                                                 EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "ADD", 2,
+                                               param_invalid_modes=[[EAMode.ARD], [EAMode.ARD, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -433,4 +469,13 @@ class Add(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Add, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Add, 2, OpSize.WORD)
@@ -4,6 +4,7 @@ from ...core.opcodes.opcode import Opcode
 from ...simulator.m68k import M68K
 from ...core.enum.ea_mode_bin import parse_ea_from_binary
 from ...core.models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ...core.enum.op_size import OpSize
@@ -37,6 +38,11 @@ class Adda(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'ADDA'
+
+    # first word is 1101 xxx x11 xxx xxx
+    first_word_patterns = [(0xF0C0, 0xD0C0)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -130,7 +136,7 @@ class Adda(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'ADDA')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -164,26 +170,31 @@ class Adda(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
-        valid, issues = cls.is_valid(command, parameters)
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        valid, issues = cls.is_valid_ir(line)
         if not valid:
             return 0
         # We can forego asserts in here because we've now confirmed this is valid assembly code
 
-        parts = command.split('.')  # Split the command by period to get the size of the command
-        if len(parts) == 1:  # Use the default size
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
+        size = line.size
 
         # Split the parameters into EA modes
-        params = parameters.split(',')
+        params = line.operands
 
         if len(params) != 2:  # We need exactly 2 parameters
             issues.append(('Invalid syntax (missing a parameter/too many parameters)', 'ERROR'))
             return 0
 
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        # dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        # dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -228,7 +239,16 @@ class Adda(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "ADDA", 2, Adda.valid_sizes)
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "ADDA", 2, Adda.valid_sizes)
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> (Adda, int):
@@ -324,4 +344,13 @@ class Adda(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Adda, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Adda, 2, OpSize.WORD)
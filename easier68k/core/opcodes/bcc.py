@@ -76,6 +76,9 @@ class branch_code(Opcode):
     cond_code = None
     offset = None
     size = None
+
+    # the number of clock cycles when the branch isn't taken, cycles is the time when it is
+    not_taken_cycles = 0
     
     def __init__(self, params: list):
         assert len(params) == 2
@@ -158,6 +161,16 @@ class branch_code(Opcode):
         return opword
 
     
+    def get_decoded_length(self) -> int:
+        """
+        Gets the number of bytes that this instruction was decoded from,
+        a byte offset is in the opcode word and larger ones follow it
+        :return: The length in bytes
+        """
+        if self.size == OpSize.BYTE:
+            return 2
+        return 2 + self.size.get_number_of_bytes()
+
     def execute(self, simulator: M68K):
         """
         Commands the Simulator according to this opcode
@@ -166,9 +179,13 @@ class branch_code(Opcode):
         """
 
         # check conditional
+        # the offset is relative to the address of the instruction plus two
+        # don't modify self.offset, the same instance can be executed again
         if self.conditional(simulator):
-            self.offset += 2
-            simulator.increment_program_counter(self.offset)
+            simulator.increment_program_counter(self.offset + 2)
+        else:
+            # the simulator counts the cycles of a branch that is taken
+            simulator.add_cycles(self.not_taken_cycles - self.cycles)
 
     def __str__(self):
         """
@@ -356,13 +373,15 @@ class Bra(branch_code):
     the conditional here is True, always.
     """
     cond_code = '\x00'
+    mnemonic = 'BRA'
+    first_word_patterns = [(0xFF00, 0x6000)]
 
     def conditional(self, simulator: M68K):
         return True
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BRA')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -380,6 +399,8 @@ class Bhi(branch_code):
     """
 
     cond_code = '\x02'
+    mnemonic = 'BHI'
+    first_word_patterns = [(0xFF00, 0x6200)]
 
     def conditional(self, simulator: M68K):
         c = simulator.get_condition_status_code(ConditionStatusCode.C)
@@ -392,7 +413,7 @@ class Bhi(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BHI')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -410,6 +431,8 @@ class Bls(branch_code):
     """
 
     cond_code = '\x03'
+    mnemonic = 'BLS'
+    first_word_patterns = [(0xFF00, 0x6300)]
 
     def conditional(self, simulator: M68K):
         c = simulator.get_condition_status_code(ConditionStatusCode.C)
@@ -422,7 +445,7 @@ class Bls(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BLS')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -440,13 +463,15 @@ class Bcc(branch_code):
     """
 
     cond_code = '\x04'
+    mnemonic = 'BCC'
+    first_word_patterns = [(0xFF00, 0x6400)]
 
     def conditional(self, simulator: M68K):
         return not simulator.get_condition_status_code(ConditionStatusCode.C)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BCC')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -464,13 +489,15 @@ class Bcs(branch_code):
     """
 
     cond_code = '\x05'
+    mnemonic = 'BCS'
+    first_word_patterns = [(0xFF00, 0x6500)]
 
     def conditional(self, simulator: M68K):
         return simulator.get_condition_status_code(ConditionStatusCode.C)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BCS')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -488,13 +515,15 @@ class Bne(branch_code):
     """
 
     cond_code = '\x06'
+    mnemonic = 'BNE'
+    first_word_patterns = [(0xFF00, 0x6600)]
 
     def conditional(self, simulator: M68K):
         return not simulator.get_condition_status_code(ConditionStatusCode.Z)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BNE')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -512,13 +541,15 @@ class Beq(branch_code):
     """
 
     cond_code = '\x07'
+    mnemonic = 'BEQ'
+    first_word_patterns = [(0xFF00, 0x6700)]
 
     def conditional(self, simulator: M68K):
         return simulator.get_condition_status_code(ConditionStatusCode.Z)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BEQ')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -536,13 +567,15 @@ class Bvc(branch_code):
     """
 
     cond_code = '\x08'
+    mnemonic = 'BVC'
+    first_word_patterns = [(0xFF00, 0x6800)]
 
     def conditional(self, simulator: M68K):
         return not simulator.get_condition_status_code(ConditionStatusCode.V)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BVC')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -560,13 +593,15 @@ class Bvs(branch_code):
     """
 
     cond_code = '\x09'
+    mnemonic = 'BVS'
+    first_word_patterns = [(0xFF00, 0x6900)]
 
     def conditional(self, simulator: M68K):
         return simulator.get_condition_status_code(ConditionStatusCode.V)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BVS')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -584,13 +619,15 @@ class Bpl(branch_code):
     """
 
     cond_code = '\x0A'
+    mnemonic = 'BPL'
+    first_word_patterns = [(0xFF00, 0x6A00)]
 
     def conditional(self, simulator: M68K):
         return not simulator.get_condition_status_code(ConditionStatusCode.N)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BPL')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -608,13 +645,15 @@ class Bmi(branch_code):
     """
 
     cond_code = '\x0B'
+    mnemonic = 'BMI'
+    first_word_patterns = [(0xFF00, 0x6B00)]
 
     def conditional(self, simulator: M68K):
         return simulator.get_condition_status_code(ConditionStatusCode.N)
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BMI')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -632,6 +671,8 @@ class Bge(branch_code):
     """
 
     cond_code = '\x0C'
+    mnemonic = 'BGE'
+    first_word_patterns = [(0xFF00, 0x6C00)]
 
     def conditional(self, simulator: M68K):
         n = simulator.get_condition_status_code(ConditionStatusCode.N)
@@ -641,7 +682,7 @@ class Bge(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BGE')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -659,6 +700,8 @@ class Blt(branch_code):
     """
 
     cond_code = '\x0D'
+    mnemonic = 'BLT'
+    first_word_patterns = [(0xFF00, 0x6D00)]
 
     def conditional(self, simulator: M68K):
         n = simulator.get_condition_status_code(ConditionStatusCode.N)
@@ -668,7 +711,7 @@ class Blt(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BLT')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -686,6 +729,8 @@ class Bgt(branch_code):
     """
 
     cond_code = '\x0E'
+    mnemonic = 'BGT'
+    first_word_patterns = [(0xFF00, 0x6E00)]
 
     def conditional(self, simulator: M68K):
         n = simulator.get_condition_status_code(ConditionStatusCode.N)
@@ -696,7 +741,7 @@ class Bgt(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BGT')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
@@ -714,6 +759,8 @@ class Ble(branch_code):
     """
 
     cond_code = '\x0F'
+    mnemonic = 'BLE'
+    first_word_patterns = [(0xFF00, 0x6F00)]
 
     def conditional(self, simulator: M68K):
         n = simulator.get_condition_status_code(ConditionStatusCode.N)
@@ -725,7 +772,7 @@ class Ble(branch_code):
 
     @classmethod
     def command_matches(cls, command: str):
-        return opcode_util.command_matches(command, 'BLE')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes):
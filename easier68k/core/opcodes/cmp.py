@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue, mask_value_for_length
 
@@ -49,6 +50,11 @@ class Cmp(Opcode):
     # the allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'CMP'
+
+    # first word is 1011 xxx xxx xxx xxx
+    first_word_patterns = [(0xF000, 0xB000)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         # ensure that the parameters are valid
         assert len(params) == 2
@@ -114,22 +120,47 @@ class Cmp(Opcode):
         comp_mv = MemoryValue(self.size,
                               unsigned_int=mask_value_for_length(self.size, comp_mv.get_value_unsigned()))
 
+        # set freakin ccr
+        simulator.set_ccr_deferred(Cmp.ccr_flags, self.size, comparison, raw_total, comp_mv, sets_extend=False)
+
+        # set the number of bytes to increment equal to the length of the
+        # instruction (1 word)
+        to_increment = OpSize.WORD.value
+
+        if self.src.mode is EAMode.AbsoluteLongAddress:
+            to_increment += OpSize.LONG.value
+        if self.src.mode is EAMode.AbsoluteWordAddress:
+            to_increment += OpSize.WORD.value
+
+        # increment PC
+        simulator.increment_program_counter(to_increment)
+
+    @staticmethod
+    def ccr_flags(size: OpSize, comparison: int, raw_total: int, comp_mv: MemoryValue) -> tuple:
+        """
+        Computes the condition codes for a comparison
+        :param size: the size of the operation
+        :param comparison: the signed destination value minus the signed source value
+        :param raw_total: the unsigned destination value minus the unsigned source value
+        :param comp_mv: the masked difference of the destination and source
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
         negative = False
 
-        if self.size is OpSize.BYTE:
+        if size is OpSize.BYTE:
             negative = comparison & 0x80 > 0
-        elif self.size is OpSize.WORD:
+        elif size is OpSize.WORD:
             negative = comparison & 0x8000 > 0
-        elif self.size is OpSize.LONG:
+        elif size is OpSize.LONG:
             negative = comparison & 0x80000000 > 0
 
         max_val = 0  # Maximum value allowed for the given memory size
 
-        if self.size is OpSize.BYTE:
+        if size is OpSize.BYTE:
             max_val = 0xFF
-        elif self.size is OpSize.WORD:
+        elif size is OpSize.WORD:
             max_val = 0xFFFF
-        elif self.size is OpSize.LONG:
+        elif size is OpSize.LONG:
             max_val = 0xFFFFFFFF
 
         # Overflow occurs if the result cannot be represented by the memory size
@@ -145,20 +176,7 @@ class Cmp(Opcode):
 
         # ignore the carry bit
 
-        # set freakin ccr
-        simulator.set_ccr_reg(None, negative, (comparison == 0), overflow, (raw_total < 0))
-
-        # set the number of bytes to increment equal to the length of the
-        # instruction (1 word)
-        to_increment = OpSize.WORD.value
-
-        if self.src.mode is EAMode.AbsoluteLongAddress:
-            to_increment += OpSize.LONG.value
-        if self.src.mode is EAMode.AbsoluteWordAddress:
-            to_increment += OpSize.WORD.value
-
-        # increment PC
-        simulator.increment_program_counter(to_increment)
+        return None, negative, (comparison == 0), overflow, (raw_total < 0)
 
     def __str__(self):
         return 'CMP Size {}, Src {}, Dest {}'.format(self.size, self.src, self.dest)
@@ -175,7 +193,7 @@ class Cmp(Opcode):
         :param command: The command string to check 'CMP.W', 'CMP'
         :return: Whether the string is an instance of CMP
         """
-        return opcode_util.command_matches(command, 'CMP')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -199,19 +217,21 @@ class Cmp(Opcode):
         :param parameters:
         :return:
         """
-        # split the command to get the size, if specified
-        parts = command.split('.')
-        if len(parts) == 1:
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        params = parameters.split(',')
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        # the size of the command, if specified
+        size = line.size
 
         # parse the src and dest parameters
-
-        src = parse_assembly_parameter(params[0].strip())
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)
+        dest = line.get_param(1)
 
         # minimum length is always 1
         length = 1
@@ -250,11 +270,16 @@ class Cmp(Opcode):
         :return:
         """
         # don't bother with param invalid modes
-        return opcode_util.n_param_is_valid(
-            command,
-            parameters,
-            "CMP",
-            2)
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "CMP", 2)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes) -> Opcode:
@@ -283,9 +308,9 @@ class Cmp(Opcode):
 
         if opmode_bin == 0b000:
             size = OpSize.BYTE
-        elif opcode_bin == 0b001:
+        elif opmode_bin == 0b001:
             size = OpSize.WORD
-        elif opcode_bin == 0b010:
+        elif opmode_bin == 0b010:
             size = OpSize.LONG
         else:
             return None
@@ -297,7 +322,7 @@ class Cmp(Opcode):
         return cls([src, dest], size)
     
     @classmethod
-    def from_str(self, command: str, parameters: str):
+    def from_str(cls, command: str, parameters: str):
         """
         Parses a CMP from text.
 
@@ -305,4 +330,13 @@ class Cmp(Opcode):
         :param parameters: The parameters after the command
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Cmp, 2, OpSize.WORD)
\ No newline at end of file
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Cmp, 2, OpSize.WORD)
\ No newline at end of file
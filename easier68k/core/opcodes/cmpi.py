@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue, mask_value_for_length
 
@@ -50,6 +51,11 @@ class Cmpi(Opcode):
     # the allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'CMPI'
+
+    # first word is 0000 1100 xx xxx xxx
+    first_word_patterns = [(0xFF00, 0x0C00)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         # ensure that the parameters are valid
         assert len(params) == 2
@@ -122,27 +128,9 @@ class Cmpi(Opcode):
         comp_mv = MemoryValue(self.size,
                               unsigned_int=mask_value_for_length(self.size, comp_mv.get_value_unsigned()))
 
-        negative = False
-
-        if self.size is OpSize.BYTE:
-            negative = comparison & 0x80 > 0
-        elif self.size is OpSize.WORD:
-            negative = comparison & 0x8000 > 0
-        elif self.size is OpSize.LONG:
-            negative = comparison & 0x80000000 > 0
-
-        # Overflow occurs when a sign change occurs where it shouldn't occur.
-        # For example: positive - negative != negative.
-        # This doesn't make sense, so an overflow occurs
-        overflow = False
-
-        if src_val.get_negative() is False:
-            if dest_val.get_negative() is True:
-                if raw_total > 0 and raw_total & 0x80000000 > 0:
-                    overflow = True
-
         # set register whomst have status
-        simulator.set_ccr_reg(None, negative, (comparison == 0), overflow, (raw_total < 0))
+        simulator.set_ccr_deferred(Cmpi.ccr_flags, self.size, src_val, dest_val, comparison, raw_total,
+                                   sets_extend=False)
 
         # set the number of bytes to increment equal to the length of the
         # instruction (1 word)
@@ -160,6 +148,39 @@ class Cmpi(Opcode):
         # increment PC
         simulator.increment_program_counter(to_increment)
 
+    @staticmethod
+    def ccr_flags(size: OpSize, src_val: MemoryValue, dest_val: MemoryValue,
+                  comparison: int, raw_total: int) -> tuple:
+        """
+        Computes the condition codes for an immediate comparison
+        :param size: the size of the operation
+        :param src_val: the immediate value
+        :param dest_val: the value of the destination
+        :param comparison: the signed destination value minus the signed source value
+        :param raw_total: the unsigned destination value minus the unsigned source value
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
+        negative = False
+
+        if size is OpSize.BYTE:
+            negative = comparison & 0x80 > 0
+        elif size is OpSize.WORD:
+            negative = comparison & 0x8000 > 0
+        elif size is OpSize.LONG:
+            negative = comparison & 0x80000000 > 0
+
+        # Overflow occurs when a sign change occurs where it shouldn't occur.
+        # For example: positive - negative != negative.
+        # This doesn't make sense, so an overflow occurs
+        overflow = False
+
+        if src_val.get_negative() is False:
+            if dest_val.get_negative() is True:
+                if raw_total > 0 and raw_total & 0x80000000 > 0:
+                    overflow = True
+
+        return None, negative, (comparison == 0), overflow, (raw_total < 0)
+
     def __str__(self):
         return 'CMPI Size {}, Src {}, Dest {}'.format(self.size, self.src, self.dest)
 
@@ -175,7 +196,7 @@ class Cmpi(Opcode):
         :param command: The command string to check 'CMPI.W', 'CMPI'
         :return: Whether the string is an instance of CMPI
         """
-        return opcode_util.command_matches(command, 'CMPI')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -205,19 +226,21 @@ class Cmpi(Opcode):
         :param parameters:
         :return:
         """
-        # split the command to get the size, if specified
-        parts = command.split('.')
-        if len(parts) == 1:
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        params = parameters.split(',')
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        # the size of the command, if specified
+        size = line.size
 
         # parse the src and dest parameters
-
-        src = parse_assembly_parameter(params[0].strip())
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)
+        dest = line.get_param(1)
 
         # length is at least either 2 or 3 depending on size
         length = 3 if size == OpSize.LONG else 2
@@ -248,11 +271,16 @@ class Cmpi(Opcode):
         :return:
         """
         # don't bother with param invalid modes
-        return opcode_util.n_param_is_valid(
-            command,
-            parameters,
-            "CMPI",
-            2)
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "CMPI", 2)
 
     @classmethod
     def disassemble_instruction(cls, data: bytes) -> Opcode:
@@ -309,7 +337,7 @@ class Cmpi(Opcode):
         return 'CMPI Size {}, Src {}, Dest {}'.format(self.size, self.src, self.dest)
     
     @classmethod
-    def from_str(self, command: str, parameters: str):
+    def from_str(cls, command: str, parameters: str):
         """
         Parses a CMPI from text.
 
@@ -320,4 +348,13 @@ class Cmpi(Opcode):
         :param parameters: The parameters after the command
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Cmpi, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Cmpi, 2, OpSize.WORD)
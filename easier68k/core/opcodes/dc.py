@@ -9,6 +9,11 @@ import math
 
 class DC(Opcode):
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
+
+    mnemonic = 'DC'
+
+    # DC is an assembler directive, it never disassembles
+    first_word_patterns = []
     QUOTE_DELIMETER = "'"
 
     def __init__(self, values: list, size=OpSize.WORD):
@@ -50,7 +55,7 @@ class DC(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'DC')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -7,6 +7,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..models.memory_value import MemoryValue
 from ..enum.register import Register
 from typing import Union
@@ -28,6 +29,11 @@ class Jsr(Opcode):
                                   Only control addressing modes can be used as listed in the following tables.
         Valid Modes - (An), (xxx).W, (xxx).L
     """
+    mnemonic = 'JSR'
+
+    # first word is 0100 1110 10 xxx xxx
+    first_word_patterns = [(0xFFC0, 0x4E80)]
+
     def __init__(self, params: list):
         assert len(params) == 1
         assert isinstance(params[0], AssemblyParameter)
@@ -103,7 +109,7 @@ class Jsr(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'JSR')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -131,8 +137,16 @@ class Jsr(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        dest = parse_assembly_parameter(parameters.strip())  # Parse the destination
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        dest = line.get_param(0)  # Parse the destination
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -174,11 +188,17 @@ class Jsr(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "JSR", 1, param_invalid_modes=[[EAMode.DRD,
-                                                                                                 EAMode.ARD,
-                                                                                                 EAMode.ARIPD,
-                                                                                                 EAMode.ARIPI,
-                                                                                                 EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "JSR", 1,
+                                               param_invalid_modes=[[EAMode.DRD, EAMode.ARD, EAMode.ARIPD, EAMode.ARIPI, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Union[Opcode, None]:
@@ -230,7 +250,9 @@ class Jsr(Opcode):
 
         if ea_mode_binary == 0b111:
             mode = EAMode.AWA if ea_reg_bin == 0 else EAMode.ALA
-            dest = AssemblyParameter(mode, int.from_bytes(data[2:], byteorder='big', signed=False))
+            # only the address itself, the data may go on past the end of the instruction
+            length = OpSize.WORD.value if mode == EAMode.AWA else OpSize.LONG.value
+            dest = AssemblyParameter(mode, int.from_bytes(data[2:2 + length], byteorder='big', signed=False))
         elif ea_mode_binary == 0b010:
             dest = AssemblyParameter(EAMode.ARI, ea_reg_bin)
         else:
@@ -253,4 +275,13 @@ class Jsr(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Jsr, 1, None)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Jsr, 1, None)
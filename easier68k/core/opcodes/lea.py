@@ -1,5 +1,6 @@
 from ...core.enum.ea_mode import EAMode
 from ...core.models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ...core.enum import ea_mode_bin
 from ...core.enum.ea_mode_bin import parse_ea_from_binary
 from ...simulator.m68k import M68K
@@ -29,7 +30,12 @@ class Lea(Opcode):
 
     Condition Codes: Not affected.
     """
-    
+
+    mnemonic = 'LEA'
+
+    # first word is 0100 xxx 111 xxx xxx
+    first_word_patterns = [(0xF1C0, 0x41C0)]
+
     def __init__(self, params: list):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -103,7 +109,7 @@ class Lea(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'LEA')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -128,20 +134,29 @@ class Lea(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
-        valid, issues = cls.is_valid(command, parameters)
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        valid, issues = cls.is_valid_ir(line)
         if not valid:
             return 0
         # We can forego asserts in here because we've now confirmed this is valid assembly code
 
         # Split the parameters into EA modes
-        params = parameters.split(',')
+        params = line.operands
 
         if len(params) != 2:  # We need exactly 2 parameters
             issues.append(('Invalid syntax (missing a parameter/too many parameters)', 'ERROR'))
             return 0
 
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -192,9 +207,18 @@ class Lea(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "LEA", 2, None, None,
-                                            [[EAMode.DRD, EAMode.ARD, EAMode.ARIPD, EAMode.ARIPI],
-                                             [mode for mode in EAMode if mode is not EAMode.ARD]])  # Select all but ARD
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "LEA", 2, None, None,
+                                               [[EAMode.DRD, EAMode.ARD, EAMode.ARIPD, EAMode.ARIPI],
+                                                [mode for mode in EAMode if mode is not EAMode.ARD]])  # Select all but ARD
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> (Lea, int):
@@ -245,4 +269,13 @@ class Lea(Opcode):
         :param command: The command itself (e.g. 'MOVE.B', 'LEA', etc.)
         :param parameters: The parameters after the command (such as the source and destination of a move)
         """
-        return opcode_util.n_param_from_str(command, parameters, Lea, 2, None)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Lea, 2, None)
@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter, from_str_util
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 
 
 class Move(Opcode):  # Forward declaration
@@ -51,6 +52,11 @@ class Move(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'MOVE'
+
+    # first word is 00 ss xxx xxx xxx xxx, where ss is not 00
+    first_word_patterns = [(0xF000, 0x1000), (0xF000, 0x2000), (0xF000, 0x3000)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -156,7 +162,7 @@ class Move(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'MOVE')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -188,23 +194,25 @@ class Move(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
-        valid, issues = cls.is_valid(command, parameters)
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        valid, issues = cls.is_valid_ir(line)
         if not valid:
             return None
         # We can forego asserts in here because we've now confirmed this is valid assembly code
 
         issues = []  # Set up our issues list (warnings + errors)
-        parts = command.split('.')  # Split the command by period to get the size of the command
-        if len(parts) == 1:  # Use the default size
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
+        size = line.size
 
-        # Split the parameters into EA modes
-        params = parameters.split(',')
-
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -255,9 +263,17 @@ class Move(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "MOVE", 2, param_invalid_modes=[[EAMode.ARD],
-                                                                                                 [EAMode.ARD,
-                                                                                                  EAMode.IMM]])
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "MOVE", 2,
+                                               param_invalid_modes=[[EAMode.ARD], [EAMode.ARD, EAMode.IMM]])
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -266,6 +282,10 @@ class Move(Opcode):
         >>> Move.disassemble_instruction(bytearray.fromhex('5E01'))
 
 
+        MOVEA.L D0,A1 is disassembled by Movea instead
+        >>> Move.disassemble_instruction(bytearray.fromhex('2240'))
+
+
         MOVE.B D1,D7
         >>> op = Move.disassemble_instruction(bytearray.fromhex('1E01'))
 
@@ -332,6 +352,10 @@ class Move(Opcode):
         if size not in Move.valid_sizes:
             return None
 
+        # moves to an address register are MOVEA
+        if destination_mode_bin == 0b001:
+            return None
+
         wordsUsed = 1
 
         src_EA = parse_ea_from_binary(source_mode_bin, source_register_bin, size, True, data[wordsUsed * 2:])
@@ -358,4 +382,13 @@ class Move(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Move, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Move, 2, OpSize.WORD)
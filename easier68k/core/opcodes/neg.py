@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue
 
@@ -40,6 +41,11 @@ class Neg(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'NEG'
+
+    # first word is 0100 0100 xx xxx xxx
+    first_word_patterns = [(0xFF00, 0x4400)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 1
         assert isinstance(params[0], AssemblyParameter)
@@ -118,13 +124,31 @@ class Neg(Opcode):
 
         total = (raw_total & mask) | preserve
 
+        # set me some heckin status
+        simulator.set_ccr_deferred(Neg.ccr_flags, self.size, dest_val, total)
+
+        # and set the value
+        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=total))
+
+        # set the program counter value
+        simulator.increment_program_counter(to_increment)
+
+    @staticmethod
+    def ccr_flags(size: OpSize, dest_val: MemoryValue, total: int) -> tuple:
+        """
+        Computes the condition codes for a negation
+        :param size: the size of the operation
+        :param dest_val: the value of the destination before it was negated
+        :param total: the masked total, including the preserved upper bits
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
         negative_bit = 0
 
-        if self.size is OpSize.BYTE:
+        if size is OpSize.BYTE:
             negative_bit = 0x80
-        elif self.size is OpSize.WORD:
+        elif size is OpSize.WORD:
             negative_bit = 0x8000
-        elif self.size is OpSize.LONG:
+        elif size is OpSize.LONG:
             negative_bit = 0x80000000
 
         negative = total & negative_bit > 0
@@ -146,14 +170,7 @@ class Neg(Opcode):
         # Cleared if the result is 0.
         carry_bit = total != 0
 
-        # set me some heckin status
-        simulator.set_ccr_reg(carry_bit, negative, (total == 0), overflow, carry_bit)
-
-        # and set the value
-        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=total))
-
-        # set the program counter value
-        simulator.increment_program_counter(to_increment)
+        return carry_bit, negative, (total == 0), overflow, carry_bit
 
     def __str__(self):
         # Makes this a bit easier to read in doctest output
@@ -166,7 +183,7 @@ class Neg(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'SUB')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -194,12 +211,17 @@ class Neg(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        # Split the parameters into EA modes
-        params = parameters.split(',')
-
-        # src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[0].strip())
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        # src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(0)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -241,8 +263,16 @@ class Neg(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "NEG", 1, param_invalid_modes=[[EAMode.ARD,
-                                                                                                 EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "NEG", 1, param_invalid_modes=[[EAMode.ARD, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -323,4 +353,13 @@ class Neg(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Neg, 1, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Neg, 1, OpSize.WORD)
@@ -1,7 +1,26 @@
 from ...simulator.m68k import M68K
+from ..models.instruction_line import InstructionLine
+from ..enum.op_size import OpSize
+from ..util import opcode_util
 from abc import ABC, ABCMeta, abstractmethod
 
-class Opcode(metaclass=ABCMeta):
+# every opcode class by its mnemonic (e.g. 'MOVE' for MOVE.B, MOVE.W and MOVE.L), in the order they were defined
+# the classes add themselves when their module is imported, see OpcodeMeta
+opcode_classes = {}
+
+
+class OpcodeMeta(ABCMeta):
+    """
+    The metaclass of Opcode, which registers every class that sets its own mnemonic in opcode_classes
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        if namespace.get('mnemonic') is not None:
+            opcode_classes[cls.mnemonic] = cls
+
+
+class Opcode(metaclass=OpcodeMeta):
     """
     Abstract
     The base class for all Opcodes. Each opcode is responsible for a few actions like
@@ -13,6 +32,20 @@ class Opcode(metaclass=ABCMeta):
     and disassembling the instruction from bytes.
     """
 
+    # the mnemonic of the command without its size, which the class is registered by in opcode_classes
+    # None for base classes that aren't opcodes themselves, like the forward declarations and branch_code
+    mnemonic = None
+
+    # (mask, value) pairs that the first word of an instruction must match
+    # (first_word & mask == value) for disassemble_instruction to be able to return an instance
+    # used to build the decode table used by the simulator
+    # None means that this opcode could match any first word
+    first_word_patterns = None
+
+    # the number of clock cycles that this instruction takes on the 68000
+    # set by the simulator from the tables in core.util.cycle_timing when it decodes the instruction
+    cycles = 0
+
     @abstractmethod
     def assemble(self) -> bytes:
         """
@@ -30,6 +63,20 @@ class Opcode(metaclass=ABCMeta):
         """
         pass
 
+    def get_decoded_length(self) -> int:
+        """
+        Gets the number of bytes that this instruction was decoded from, which the simulator uses
+        to know which writes to memory change a decoded instruction
+        by default this is the opcode word and the extension words of the src and dest parameters
+        :return: The length in bytes
+        """
+        size = getattr(self, 'size', None) or OpSize.WORD
+        length = OpSize.WORD.value
+        for param in (getattr(self, 'src', None), getattr(self, 'dest', None)):
+            if param is not None:
+                length += opcode_util.get_extension_length(param, size)
+        return length
+
     @abstractmethod
     def __str__(self):
         return "Generic command base"
@@ -88,4 +135,35 @@ class Opcode(metaclass=ABCMeta):
         :param command: The command itself (e.g. 'MOVE.B', 'LEA', etc.)
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
-        """
\ No newline at end of file
+        """
+        pass
+
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of this command will be in memory, the same as get_word_length
+        Opcodes which parse their operands override this to use the ones already parsed in the line
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        return cls.get_word_length(line.command, line.contents)
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        Opcodes which parse their operands override this to use the ones already parsed in the line
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return cls.is_valid(line.command, line.contents)
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        Opcodes which parse their operands override this to use the ones already parsed in the line
+        :param line: The line of assembly code, split into its parts, which must be valid
+        :return: The parsed command
+        """
+        return cls.from_str(line.command, line.contents)
@@ -1,5 +1,6 @@
 from ...core.enum.ea_mode import EAMode
 from ...core.models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ...core.enum import ea_mode_bin
 from ...core.enum.ea_mode_bin import parse_ea_from_binary
 from ...simulator.m68k import M68K
@@ -61,6 +62,11 @@ class Or(Opcode):
 
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'OR'
+
+    # first word is 1000 xxx xxx xxx xxx
+    first_word_patterns = [(0xF000, 0x8000)]
+
     def __init__(self, params: list, size: OpSize=OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -160,17 +166,8 @@ class Or(Opcode):
         result = src_val | dest_val
         result_unsigned = result.get_value_unsigned()
 
-        msb_bit = 0
-
-        if self.size is OpSize.BYTE:
-            msb_bit = 0x80
-        elif self.size is OpSize.WORD:
-            msb_bit = 0x8000
-        elif self.size is OpSize.LONG:
-            msb_bit = 0x80000000
-
         # set status codes
-        simulator.set_ccr_reg(None, (msb_bit & result_unsigned != 0), (result_unsigned == 0), False, False)
+        simulator.set_ccr_deferred(Or.ccr_flags, self.size, result_unsigned, sets_extend=False)
 
         # and set the value
         self.dest.set_value(simulator, result)
@@ -178,6 +175,25 @@ class Or(Opcode):
         # set the program counter value
         simulator.increment_program_counter(to_increment)
 
+    @staticmethod
+    def ccr_flags(size: OpSize, result_unsigned: int) -> tuple:
+        """
+        Computes the condition codes for an inclusive or
+        :param size: the size of the operation
+        :param result_unsigned: the result of the operation
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
+        msb_bit = 0
+
+        if size is OpSize.BYTE:
+            msb_bit = 0x80
+        elif size is OpSize.WORD:
+            msb_bit = 0x8000
+        elif size is OpSize.LONG:
+            msb_bit = 0x80000000
+
+        return None, (msb_bit & result_unsigned != 0), (result_unsigned == 0), False, False
+
     def __str__(self):
         return 'Or command: size {}, src {}, dest {}'.format(self.size, self.src, self.dest)
 
@@ -188,7 +204,7 @@ class Or(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'OR')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -216,17 +232,19 @@ class Or(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
-        parts = command.split('.')  # Split the command by period to get the size of the command
-        if len(parts) == 1:  # Use the default size
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        # Split the parameters into EA modes
-        params = parameters.split(',')
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        size = line.size
 
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -277,8 +295,17 @@ class Or(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "OR", 2, param_invalid_modes=[[EAMode.ARD],
-            [EAMode.ARD, EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "OR", 2,
+                                               param_invalid_modes=[[EAMode.ARD], [EAMode.ARD, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -379,4 +406,13 @@ class Or(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Or, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Or, 2, OpSize.WORD)
@@ -21,6 +21,11 @@ class Rts(Opcode):
     Condition Codes: Not affected
     Instruction Format: 0100111001110101
     """
+    mnemonic = 'RTS'
+
+    # first word is always 0100 1110 0111 0101
+    first_word_patterns = [(0xFFFF, 0x4E75)]
+
     def __init__(self):
         pass    # Doesn't need to do anything else
 
@@ -67,7 +72,7 @@ class Rts(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'RTS')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -149,7 +154,7 @@ class Rts(Opcode):
             the amount of data in words that was used (e.g. extra for immediate
             data) or 0 for not a match
         """
-        assert len(data) == 2, 'Opcode size is only one word'
+        assert len(data) >= 2, 'Opcode size is at least 1 word'
 
         first_word = int.from_bytes(data[0:2], 'big')
 
@@ -9,6 +9,11 @@ class Simhalt(Opcode):
 
 
 class Simhalt(Opcode):
+    mnemonic = 'SIMHALT'
+
+    # SIMHALT is always FFFF FFFF
+    first_word_patterns = [(0xFFFF, 0xFFFF)]
+
     def __init__(self):
         pass  # Nothing to initialize: SIMHALT is parameterless
 
@@ -19,6 +24,13 @@ class Simhalt(Opcode):
         """
         return bytearray.fromhex('FFFFFFFF')
 
+    def get_decoded_length(self) -> int:
+        """
+        Gets the number of bytes that this instruction was decoded from, which is always two words
+        :return: The length in bytes
+        """
+        return 4
+
     def execute(self, simulator: M68K):
         """
         Executes this command in a simulator
@@ -43,7 +55,7 @@ class Simhalt(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'SIMHALT')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
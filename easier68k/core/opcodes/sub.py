@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue
 
@@ -68,6 +69,11 @@ class Sub(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'SUB'
+
+    # first word is 1001 xxx xxx xxx xxx
+    first_word_patterns = [(0xF000, 0x9000)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -182,10 +188,6 @@ class Sub(Opcode):
 
         total = (raw_total & mask) | preserve
 
-        # If the subtraction of the masked destination and source value is
-        # negative, then a borrow has been generated.
-        borrow_bit = (mask & dest_val.get_value_unsigned()) - src_val.get_value_unsigned() < 0
-
         negative_bit = 0
 
         if self.size is OpSize.BYTE:
@@ -195,8 +197,6 @@ class Sub(Opcode):
         elif self.size is OpSize.LONG:
             negative_bit = 0x80000000
 
-        negative = total & negative_bit > 0
-
         set_val = total & mask   # The value that will be set in destination
 
         # Overflow occurs when a sign change occurs where it shouldn't occur.
@@ -210,7 +210,7 @@ class Sub(Opcode):
                     set_val = total      # The value overflowed, so return the entire amount
 
         # set the heckin CCR
-        simulator.set_ccr_reg(borrow_bit, negative, (set_val == 0), overflow, borrow_bit)
+        simulator.set_ccr_deferred(Sub.ccr_flags, self.size, src_val, dest_val, total, set_val, overflow)
 
         # and set the value
         self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=set_val))
@@ -218,6 +218,45 @@ class Sub(Opcode):
         # set the program counter value
         simulator.increment_program_counter(to_increment)
 
+    @staticmethod
+    def ccr_flags(size: OpSize, src_val: MemoryValue, dest_val: MemoryValue,
+                  total: int, set_val: int, overflow: bool) -> tuple:
+        """
+        Computes the condition codes for a subtraction
+        :param size: the size of the operation
+        :param src_val: the value of the source
+        :param dest_val: the value of the destination before the subtraction
+        :param total: the masked total, including the preserved upper bits
+        :param set_val: the value that was set in the destination
+        :param overflow: whether the subtraction overflowed
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
+        mask = 0xFF
+
+        if size is OpSize.BYTE:
+            mask = 0xFF
+        if size is OpSize.WORD:
+            mask = 0xFFFF
+        if size is OpSize.LONG:
+            mask = 0xFFFFFFFF
+
+        # If the subtraction of the masked destination and source value is
+        # negative, then a borrow has been generated.
+        borrow_bit = (mask & dest_val.get_value_unsigned()) - src_val.get_value_unsigned() < 0
+
+        negative_bit = 0
+
+        if size is OpSize.BYTE:
+            negative_bit = 0x80
+        elif size is OpSize.WORD:
+            negative_bit = 0x8000
+        elif size is OpSize.LONG:
+            negative_bit = 0x80000000
+
+        negative = total & negative_bit > 0
+
+        return borrow_bit, negative, (set_val == 0), overflow, borrow_bit
+
     def __str__(self):
         # Makes this a bit easier to read in doctest output
         return 'Sub command: Size {}, src {}, dest {}'.format(self.size, self.src, self.dest)
@@ -229,7 +268,7 @@ class Sub(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'SUB')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -260,18 +299,19 @@ class Sub(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        parts = command.split('.')  # Split the command by period to get the size of the command
-        if len(parts) == 1:  # Use the default size
-            size = OpSize.WORD
-        else:
-            size = OpSize.parse(parts[1])
-
-        # Split the parameters into EA modes
-        params = parameters.split(',')
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        size = line.size
 
-        src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+        src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -322,9 +362,17 @@ class Sub(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "SUB", 2, param_invalid_modes=[[EAMode.ARD],
-                                                                                                [EAMode.ARD,
-                                                                                                 EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "SUB", 2,
+                                               param_invalid_modes=[[EAMode.ARD], [EAMode.ARD, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -437,4 +485,13 @@ class Sub(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Sub, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Sub, 2, OpSize.WORD)
@@ -8,6 +8,7 @@ from ...core.util.split_bits import split_bits
 from ...core.util import opcode_util
 from ..util.parsing import parse_assembly_parameter
 from ..models.assembly_parameter import AssemblyParameter
+from ..models.instruction_line import InstructionLine
 from ..enum.condition_status_code import ConditionStatusCode
 from ..models.memory_value import MemoryValue
 
@@ -51,6 +52,11 @@ class Subq(Opcode):
     # Allowed sizes for this opcode
     valid_sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
 
+    mnemonic = 'SUBQ'
+
+    # first word is 0101 xxx 1 xx xxx xxx
+    first_word_patterns = [(0xF100, 0x5100)]
+
     def __init__(self, params: list, size: OpSize = OpSize.WORD):
         assert len(params) == 2
         assert isinstance(params[0], AssemblyParameter)
@@ -95,6 +101,14 @@ class Subq(Opcode):
 
         return ret_bytes
 
+    def get_decoded_length(self) -> int:
+        """
+        Gets the number of bytes that this instruction was decoded from,
+        the immediate data is in the opcode word so only the dest has extension words
+        :return: The length in bytes
+        """
+        return OpSize.WORD.value + opcode_util.get_extension_length(self.dest, self.size)
+
     def execute(self, simulator: M68K):
         """
         Executes this command in a simulator
@@ -139,17 +153,45 @@ class Subq(Opcode):
 
         total = (raw_total & mask) | preserve
 
+        # set the ccr registorio
+        simulator.set_ccr_deferred(Subq.ccr_flags, self.size, src_val, dest_val, total)
+        
+        # and set the value
+        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=total))
+
+        # set the program counter value
+        simulator.increment_program_counter(to_increment)
+
+    @staticmethod
+    def ccr_flags(size: OpSize, src_val: MemoryValue, dest_val: MemoryValue, total: int) -> tuple:
+        """
+        Computes the condition codes for a quick subtraction
+        :param size: the size of the operation
+        :param src_val: the value of the source
+        :param dest_val: the value of the destination before the subtraction
+        :param total: the masked total, including the preserved upper bits
+        :return: the values for X, N, Z, V and C, as taken by set_ccr_reg
+        """
+        mask = 0xFF
+
+        if size is OpSize.BYTE:
+            mask = 0xFF
+        if size is OpSize.WORD:
+            mask = 0xFFFF
+        if size is OpSize.LONG:
+            mask = 0xFFFFFFFF
+
         # If the subtraction of the masked destination and source value is
         # negative, then a borrow has been generated.
         borrow_bit = (mask & dest_val.get_value_unsigned()) - src_val.get_value_unsigned() < 0
 
         negative_bit = 0
 
-        if self.size is OpSize.BYTE:
+        if size is OpSize.BYTE:
             negative_bit = 0x80
-        elif self.size is OpSize.WORD:
+        elif size is OpSize.WORD:
             negative_bit = 0x8000
-        elif self.size is OpSize.LONG:
+        elif size is OpSize.LONG:
             negative_bit = 0x80000000
 
         negative = total & negative_bit > 0
@@ -163,14 +205,7 @@ class Subq(Opcode):
             if total & negative_bit == 0:
                 overflow = True
 
-        # set the ccr registorio
-        simulator.set_ccr_reg(borrow_bit, negative, (total == 0), overflow, borrow_bit)
-        
-        # and set the value
-        self.dest.set_value(simulator, MemoryValue(OpSize.LONG, unsigned_int=total))
-
-        # set the program counter value
-        simulator.increment_program_counter(to_increment)
+        return borrow_bit, negative, (total == 0), overflow, borrow_bit
 
     def __str__(self):
         # Makes this a bit easier to read in doctest output
@@ -183,7 +218,7 @@ class Subq(Opcode):
         :param command: The command string to check (e.g. 'MOVE.B', 'LEA', etc.)
         :return: Whether the string is an instance of this command type
         """
-        return opcode_util.command_matches(command, 'SUB')
+        return opcode_util.command_matches(command, cls.mnemonic)
 
     @classmethod
     def get_word_length(cls, command: str, parameters: str) -> int:
@@ -211,12 +246,17 @@ class Subq(Opcode):
         :param parameters: The parameters after the command
         :return: The length of the bytes in memory in words, as well as a list of warnings or errors encountered
         """
+        return cls.get_word_length_ir(InstructionLine(command, parameters))
 
-        # Split the parameters into EA modes
-        params = parameters.split(',')
-
-        # src = parse_assembly_parameter(params[0].strip())  # Parse the source and make sure it parsed right
-        dest = parse_assembly_parameter(params[1].strip())
+    @classmethod
+    def get_word_length_ir(cls, line: InstructionLine) -> int:
+        """
+        Gets what the end length of the line will be in memory, the same as get_word_length
+        :param line: The line of assembly code, split into its parts
+        :return: The length of the bytes in memory in words
+        """
+        # src = line.get_param(0)  # Parse the source and make sure it parsed right
+        dest = line.get_param(1)
 
         length = 1  # Always 1 word not counting additions to end
 
@@ -258,9 +298,17 @@ class Subq(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: Whether the given command is valid and a list of issues/warnings encountered
         """
-        return opcode_util.n_param_is_valid(command, parameters, "SUBQ", 2, param_invalid_modes=[[EAMode.ARD],
-                                                                                                [EAMode.ARD,
-                                                                                                 EAMode.IMM]])[:2]
+        return cls.is_valid_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def is_valid_ir(cls, line: InstructionLine) -> (bool, list):
+        """
+        Tests whether the given line is valid, the same as is_valid
+        :param line: The line of assembly code, split into its parts
+        :return: Whether the given command is valid and a list of issues/warnings encountered
+        """
+        return opcode_util.n_param_is_valid_ir(line, "SUBQ", 2,
+                                               param_invalid_modes=[[EAMode.ARD], [EAMode.ARD, EAMode.IMM]])[:2]
 
     @classmethod
     def disassemble_instruction(cls, data: bytearray) -> Opcode:
@@ -362,4 +410,13 @@ class Subq(Opcode):
         :param parameters: The parameters after the command (such as the source and destination of a move)
         :return: The parsed command
         """
-        return opcode_util.n_param_from_str(command, parameters, Subq, 2, OpSize.WORD)
+        return cls.from_ir(InstructionLine(command, parameters))
+
+    @classmethod
+    def from_ir(cls, line: InstructionLine):
+        """
+        Makes a command from a line, the same as from_str
+        :param line: The line of assembly code, split into its parts
+        :return: The parsed command
+        """
+        return opcode_util.n_param_from_ir(line, Subq, 2, OpSize.WORD)
@@ -36,7 +36,12 @@ class Trap(Opcode):
     Condition Codes:
     Not affected.
     """
-    
+
+    mnemonic = 'TRAP'
+
+    # first word is 0100 1110 0100 xxxx
+    first_word_patterns = [(0xFFF0, 0x4E40)]
+
     def __init__(self, param: TrapVectors):
         assert isinstance(param, TrapVectors)
         # max size is 4 bit
@@ -77,30 +82,30 @@ class Trap(Opcode):
 
                 # get the value of A1
                 location = simulator.get_register(Register.A1).get_value_unsigned()
-                value = simulator.memory.get(1, location).get_value_unsigned()
+                value = simulator.memory.read_u8(location)
                 while value != 0:
                     print(chr(value), end='')
                     location += 1
-                    value = simulator.memory.get(1, location).get_value_unsigned()
+                    value = simulator.memory.read_u8(location)
 
             if task is TrapTask.DisplayNullTermStringWithCRLF:
                 # get the value of A1
                 location = simulator.get_register(Register.A1).get_value_unsigned()
-                value = simulator.memory.get(1, location).get_value_unsigned()
+                value = simulator.memory.read_u8(location)
                 while value != 0:
                     print(chr(value), end='')
                     location += 1
-                    value = simulator.memory.get(1, location).get_value_unsigned()
+                    value = simulator.memory.read_u8(location)
                 print('')
 
             if task is TrapTask.DisplayNullTermStringAndReadNumberFromKeyboard:
                 # get the value of A1
                 location = simulator.get_register(Register.A1).get_value_unsigned()
-                value = simulator.memory.get(1, location).get_value_unsigned()
+                value = simulator.memory.read_u8(location)
                 while value != 0:
                     print(chr(value), end='')
                     location += 1
-                    value = simulator.memory.get(1, location).get_value_unsigned()
+                    value = simulator.memory.read_u8(location)
 
                 # read a number from the keyboard
 
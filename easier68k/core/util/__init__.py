@@ -4,6 +4,7 @@ __all__ = [
     'opcode_util',
     'find_module',
     'split_bits',
+    'cycle_timing',
     'input'
 ]
 
@@ -0,0 +1,182 @@
+"""
+Cycle Timing
+
+Tables of the number of clock cycles that instructions take on the 68000,
+from the instruction execution times in the 68000 reference manual.
+
+The time of an instruction is a base time for the opcode and size, plus the time
+it takes to calculate the effective addresses of its operands. The tables are used once
+when an instruction is decoded, and the result is kept in the instance as op.cycles
+so the simulator only has to add that value for each instruction it runs.
+"""
+
+from ..enum.ea_mode import EAMode
+from ..enum.op_size import OpSize
+
+# effective address calculation times
+# mode -> (byte or word cycles, long cycles)
+EA_CYCLES = {
+    EAMode.DRD: (0, 0),
+    EAMode.ARD: (0, 0),
+    EAMode.ARI: (4, 8),
+    EAMode.ARIPI: (4, 8),
+    EAMode.ARIPD: (6, 10),
+    EAMode.AWA: (8, 12),
+    EAMode.ALA: (12, 16),
+    EAMode.IMM: (4, 8)
+}
+
+# the destination of a move doesn't take the extra time for the pre decrement
+MOVE_DEST_EA_CYCLES = dict(EA_CYCLES)
+MOVE_DEST_EA_CYCLES[EAMode.ARIPD] = EA_CYCLES[EAMode.ARI]
+
+# base times of moves, the times of both operands are added to these
+# opcode -> (byte or word cycles, long cycles)
+MOVE_CYCLES = {
+    'Move': (4, 4),
+    'Movea': (4, 4)
+}
+
+# base times of operations on a register or memory destination
+# opcode -> ((byte or word cycles, long cycles) for a register destination,
+#            (byte or word cycles, long cycles) for a memory destination)
+# the time of the memory destination is added to the memory times
+OPERATION_CYCLES = {
+    'Add': ((4, 6), (8, 12)),
+    'Sub': ((4, 6), (8, 12)),
+    'Or': ((4, 6), (8, 12)),
+    'Cmp': ((4, 6), (4, 6)),
+    'Adda': ((8, 6), (8, 6)),
+    'Eor': ((4, 8), (8, 12)),
+    'Neg': ((4, 6), (8, 12)),
+    'Subq': ((4, 8), (8, 12)),
+    'Cmpi': ((8, 14), (8, 12)),
+    'Ori': ((8, 16), (12, 20))
+}
+
+# operations which also add the time of their source when the destination is a register
+SOURCE_EA_OPERATIONS = ['Add', 'Sub', 'Or', 'Cmp', 'Adda']
+
+# operations which take 2 more cycles for a long with a register or immediate source
+LONG_REGISTER_SOURCE_OPERATIONS = ['Add', 'Sub', 'Or', 'Adda']
+
+# operations on an address register that take a different time than on a data register
+# opcode -> (byte or word cycles, long cycles)
+ADDRESS_REGISTER_CYCLES = {
+    'Subq': (8, 8)
+}
+
+# times of opcodes which only depend on the mode of their single operand
+# opcode -> (name of the operand, {mode -> cycles})
+CONTROL_CYCLES = {
+    'Lea': ('src', {EAMode.ARI: 4, EAMode.AWA: 8, EAMode.ALA: 12}),
+    'Jsr': ('dest', {EAMode.ARI: 16, EAMode.AWA: 18, EAMode.ALA: 20})
+}
+
+# times of opcodes which don't depend on their operands
+FIXED_CYCLES = {
+    'Rts': 16,
+    'Trap': 34,
+    'Simhalt': 0,
+    'DC': 0
+}
+
+# times of branches, when the branch is taken and when it isn't for a byte and word displacement
+BRANCH_TAKEN_CYCLES = 10
+BRANCH_NOT_TAKEN_CYCLES = (8, 12)
+
+REGISTER_MODES = [EAMode.DRD, EAMode.ARD]
+
+
+def _size_index(size: OpSize) -> int:
+    return 1 if size == OpSize.LONG else 0
+
+
+def _ea_cycles(param, size: OpSize, table: dict = EA_CYCLES) -> int:
+    return table.get(param.mode, (0, 0))[_size_index(size)]
+
+
+def _timing_name(op) -> str:
+    """
+    Gets the name of the class (or base class) of the opcode that the tables use
+    """
+    for cls in type(op).__mro__:
+        name = cls.__name__
+        if name in MOVE_CYCLES or name in OPERATION_CYCLES or name in CONTROL_CYCLES \
+                or name in FIXED_CYCLES or name == 'branch_code':
+            return name
+    return None
+
+
+def get_cycles(op) -> int:
+    """
+    Gets the number of clock cycles an instruction takes,
+    for a branch this is the time when the branch is taken
+
+    >>> from easier68k.core.opcodes.move import Move
+    >>> from easier68k.core.models.assembly_parameter import AssemblyParameter
+    >>> get_cycles(Move([AssemblyParameter(EAMode.IMM, 1), AssemblyParameter(EAMode.DRD, 0)], OpSize.LONG))
+    12
+
+    >>> get_cycles(Move([AssemblyParameter(EAMode.DRD, 1), AssemblyParameter(EAMode.ARIPD, 0)], OpSize.WORD))
+    8
+
+    >>> from easier68k.core.opcodes.add import Add
+    >>> get_cycles(Add([AssemblyParameter(EAMode.ARI, 0), AssemblyParameter(EAMode.DRD, 1)], OpSize.WORD))
+    8
+
+    >>> get_cycles(Add([AssemblyParameter(EAMode.DRD, 0), AssemblyParameter(EAMode.DRD, 1)], OpSize.LONG))
+    8
+
+    >>> get_cycles(Add([AssemblyParameter(EAMode.DRD, 1), AssemblyParameter(EAMode.ALA, 0x1000)], OpSize.LONG))
+    28
+
+    :param op: the decoded opcode instance
+    :return: the number of cycles
+    """
+    name = _timing_name(op)
+
+    if name in MOVE_CYCLES:
+        size = _size_index(op.size)
+        return MOVE_CYCLES[name][size] + _ea_cycles(op.src, op.size) \
+            + _ea_cycles(op.dest, op.size, MOVE_DEST_EA_CYCLES)
+
+    if name in OPERATION_CYCLES:
+        size = _size_index(op.size)
+        register_cycles, memory_cycles = OPERATION_CYCLES[name]
+
+        if op.dest.mode is EAMode.ARD and name in ADDRESS_REGISTER_CYCLES:
+            return ADDRESS_REGISTER_CYCLES[name][size]
+
+        if op.dest.mode in REGISTER_MODES:
+            cycles = register_cycles[size]
+            if name in SOURCE_EA_OPERATIONS:
+                cycles += _ea_cycles(op.src, op.size)
+            if op.size == OpSize.LONG and name in LONG_REGISTER_SOURCE_OPERATIONS \
+                    and op.src.mode in REGISTER_MODES + [EAMode.IMM]:
+                cycles += 2
+            return cycles
+
+        return memory_cycles[size] + _ea_cycles(op.dest, op.size)
+
+    if name in CONTROL_CYCLES:
+        operand, cycles = CONTROL_CYCLES[name]
+        return cycles.get(getattr(op, operand).mode, 0)
+
+    if name in FIXED_CYCLES:
+        return FIXED_CYCLES[name]
+
+    if name == 'branch_code':
+        return BRANCH_TAKEN_CYCLES
+
+    return 0
+
+
+def get_branch_not_taken_cycles(op) -> int:
+    """
+    Gets the number of clock cycles a branch takes when it isn't taken
+
+    :param op: the decoded branch opcode instance
+    :return: the number of cycles
+    """
+    return BRANCH_NOT_TAKEN_CYCLES[0 if op.size == OpSize.BYTE else 1]
@@ -1,51 +1,99 @@
-# This *is* actually a necessary import due to using "reflection" style code further down
+# This *is* actually a necessary import, importing the opcode modules registers their classes in opcode_classes
 # noinspection PyUnresolvedReferences
 from ..opcodes import *
-from types import ModuleType
-import sys
-
-valid_opcode_classes = [
-    'easier68k.core.opcodes.move.Move',
-    'easier68k.core.opcodes.simhalt.Simhalt',
-    'easier68k.core.opcodes.dc.DC',
-    'easier68k.core.opcodes.lea.Lea',
-    'easier68k.core.opcodes.trap.Trap',
-    'easier68k.core.opcodes.opcode_or.Or',
-    'easier68k.core.opcodes.add.Add',
-    'easier68k.core.opcodes.bcc.Bra',
-    'easier68k.core.opcodes.bcc.Bhi',
-    'easier68k.core.opcodes.bcc.Bls',
-    'easier68k.core.opcodes.bcc.Bcc',
-    'easier68k.core.opcodes.bcc.Bcs',
-    'easier68k.core.opcodes.bcc.Bne',
-    'easier68k.core.opcodes.bcc.Beq',
-    'easier68k.core.opcodes.bcc.Bvc',
-    'easier68k.core.opcodes.bcc.Bvs',
-    'easier68k.core.opcodes.bcc.Bpl',
-    'easier68k.core.opcodes.bcc.Bmi',
-    'easier68k.core.opcodes.bcc.Bge',
-    'easier68k.core.opcodes.bcc.Blt',
-    'easier68k.core.opcodes.bcc.Bgt',
-    'easier68k.core.opcodes.bcc.Ble'
-]
-
-valid_opcodes = [
-    x.split('.')[-1].upper() for x in valid_opcode_classes
-]
+from ..opcodes.opcode import opcode_classes
+
+# the mnemonics of all of the opcodes, in the order their classes were defined
+valid_opcodes = list(opcode_classes)
 
 
 def find_opcode_cls(opcode: str) -> type:  # classes are of type "type" Really python?
     """
-    Finds the proper module and module class based on the opcode
-    :param opcode: The opcode to search for
-    :return: The module and class found (or (None, None) if it doesn't find any)
+    Finds the opcode class for a command, by the mnemonic before its size
+
+    >>> find_opcode_cls('MOVE.B').__name__
+    'Move'
+
+    >>> find_opcode_cls('SUBQ.L').__name__
+    'Subq'
+
+    >>> find_opcode_cls('MOV') is None
+    True
+
+    :param opcode: The opcode to search for (e.g. 'MOVE.B', 'LEA', etc.)
+    :return: The class found (or None if it doesn't find any)
     """
-    for m in valid_opcode_classes:
-        split = m.split('.')
-        mod_name = '.'.join(split[:-1])  # Trims the class name (the last part after the period)
-        mod = sys.modules[mod_name]
-        cls = getattr(mod, split[-1])
-        if cls.command_matches(opcode):
-            return cls
+    cls = opcode_classes.get(opcode.split('.')[0])
+    if cls is not None and cls.command_matches(opcode):
+        return cls
 
     return None
+
+
+# lookup table from every possible first word of an instruction to the
+# opcode classes which could disassemble it, built on first use
+_opcode_decode_table = None
+
+
+def build_opcode_decode_table() -> list:
+    """
+    Builds a table with one entry for each of the 2^16 possible first words of an instruction,
+    holding a tuple of the opcode classes (in the same order as opcode_classes) whose
+    first_word_patterns match that word
+
+    >>> table = build_opcode_decode_table()
+
+    >>> len(table)
+    65536
+
+    >>> [cls.__name__ for cls in table[0x33FC]]
+    ['Move']
+
+    >>> [cls.__name__ for cls in table[0xFFFF]]
+    ['Simhalt']
+
+    >>> [cls.__name__ for cls in table[0x4E4F]]
+    ['Trap']
+
+    >>> table[0x4AFC]
+    ()
+
+    :return: The list of tuples of opcode classes, indexed by the first word
+    """
+    matches = [[] for _ in range(0x10000)]
+
+    for cls in opcode_classes.values():
+        patterns = cls.first_word_patterns
+
+        # nothing known about this opcode, it has to be tried for every word
+        if patterns is None:
+            patterns = [(0x0000, 0x0000)]
+
+        words = set()
+        for mask, value in patterns:
+            # walk through every combination of the bits that aren't covered by the mask
+            free = ~mask & 0xFFFF
+            sub = free
+            while True:
+                words.add(value | sub)
+                if sub == 0:
+                    break
+                sub = (sub - 1) & free
+
+        for word in words:
+            matches[word].append(cls)
+
+    # most words share the same candidates, so share the tuples too
+    shared = {}
+    return [shared.setdefault(tuple(m), tuple(m)) for m in matches]
+
+
+def get_opcode_decode_table() -> list:
+    """
+    Gets the decode table built by build_opcode_decode_table, building it the first time it is used
+    :return: The list of tuples of opcode classes, indexed by the first word
+    """
+    global _opcode_decode_table
+    if _opcode_decode_table is None:
+        _opcode_decode_table = build_opcode_decode_table()
+    return _opcode_decode_table
@@ -2,6 +2,7 @@ from ..enum.ea_mode import EAMode
 from ..util.parsing import parse_assembly_parameter, from_str_util
 from ..enum.op_size import OpSize
 from ..models.memory_value import MemoryValue
+from ..models.instruction_line import InstructionLine
 
 def command_matches(command: str, template: str) -> bool:
     """
@@ -172,6 +173,36 @@ def ea_to_binary_post_op(ea: EAMode, size: OpSize) -> MemoryValue:
         return n
 
 
+def get_extension_length(ea: EAMode, size: OpSize) -> int:
+    """
+    Gets the number of bytes that follow the opcode word for an effective address,
+    which is the length of what ea_to_binary_post_op appends
+
+    >>> get_extension_length(parse_assembly_parameter('#$42'), OpSize.BYTE)
+    2
+
+    >>> get_extension_length(parse_assembly_parameter('#$42'), OpSize.LONG)
+    4
+
+    >>> get_extension_length(parse_assembly_parameter('($242).W'), OpSize.LONG)
+    2
+
+    >>> get_extension_length(parse_assembly_parameter('D0'), OpSize.LONG)
+    0
+
+    :param ea: The effective address
+    :param size: The size of the operation
+    :return: The number of bytes
+    """
+    if ea.mode == EAMode.IMM:
+        return OpSize.WORD.value if size == OpSize.BYTE else size.value
+    if ea.mode == EAMode.ALA:
+        return OpSize.LONG.value
+    if ea.mode == EAMode.AWA:
+        return OpSize.WORD.value
+    return 0
+
+
 def n_param_is_valid(command: str, parameters: str, opcode: str, n: int=2, valid_sizes=[OpSize.LONG, OpSize.WORD, OpSize.BYTE],
                        default_size=OpSize.WORD, param_invalid_modes=[]) -> (bool, list):
     """
@@ -186,9 +217,33 @@ def n_param_is_valid(command: str, parameters: str, opcode: str, n: int=2, valid
     :param param_invalid_modes: list of lists of invalid parameter modes (in order)
     :return: Whether the given command is valid and a list of issues/warnings encountered
     """
+    return n_param_is_valid_ir(InstructionLine(command, parameters), opcode, n, valid_sizes, default_size,
+                               param_invalid_modes)
+
+
+def n_param_is_valid_ir(line: InstructionLine, opcode: str, n: int=2,
+                        valid_sizes=[OpSize.LONG, OpSize.WORD, OpSize.BYTE], default_size=OpSize.WORD,
+                        param_invalid_modes=[]) -> (bool, list):
+    """
+    Tests whether the given line is valid, the same as n_param_is_valid
+
+    >>> n_param_is_valid_ir(InstructionLine('MOVE.B', '#1, D0'), 'MOVE')
+    (True, [])
+
+    >>> n_param_is_valid_ir(InstructionLine('MOVE.B', '#1'), 'MOVE')
+    (False, [('Opcode MOVE must have 2 parameters', 'ERROR')])
+
+    :param line: The line, with its operands parsed
+    :param opcode: The opcode to check for ('MOVE', 'LEA', etc.)
+    :param valid_sizes: valid sizes of the command (empty list or None for no size)
+    :param default_size: the default size for the command (can be None if it doesn't take a command)
+    :param n: the number of parameters to parse
+    :param param_invalid_modes: list of lists of invalid parameter modes (in order)
+    :return: Whether the given command is valid and a list of issues/warnings encountered
+    """
     issues = []
     try:
-        size, params, parts = from_str_util(command, parameters)
+        size, parts = line.size, line.parts
 
         # If we have more than 2 parts something is seriously wrong
         assert len(parts) <= 2, 'Unknown error (more than 1 period in command)'
@@ -203,17 +258,15 @@ def n_param_is_valid(command: str, parameters: str, opcode: str, n: int=2, valid
         else:
             assert len(parts) == 1, "Can't specify a size for command {}".format(opcode)
 
-        assert len(params) == n, 'Opcode {} must have {} parameters'.format(opcode, n)
-
-        parsed = []
+        assert len(line.operands) == n, 'Opcode {} must have {} parameters'.format(opcode, n)
 
         for i in range(n):
-            param = parse_assembly_parameter(params[i])
+            param = line.get_param(i)
             if i < len(param_invalid_modes):
                 assert param.mode not in param_invalid_modes[i], 'Invalid addressing mode'
-            parsed.append(parse_assembly_parameter(params[i]))
     except AssertionError as e:
-        issues.append((e.args[0], 'ERROR'))
+        # some of the checks in parse_assembly_parameter don't have a message
+        issues.append((e.args[0] if e.args else 'Invalid parameter', 'ERROR'))
         return False, issues
 
     return True, issues
@@ -230,7 +283,21 @@ def n_param_from_str(command: str, parameters: str, opcode_cls, n: int=2, defaul
     :param default_size: The default size if no size is specified, or None if this is an unsized opcode
     :return: The parsed command
     """
-    size, params, parts = from_str_util(command, parameters)
+    return n_param_from_ir(InstructionLine(command, parameters), opcode_cls, n, default_size)
+
+
+def n_param_from_ir(line: InstructionLine, opcode_cls, n: int=2, default_size: OpSize =OpSize.WORD):
+    """
+    Makes a command from a line, the same as n_param_from_str,
+    using the operands that were already parsed to validate it
+
+    :param line: The line, with its operands parsed
+    :param opcode_cls: The class of opcode we're parsing to
+    :param n: The number of parameters to parse
+    :param default_size: The default size if no size is specified, or None if this is an unsized opcode
+    :return: The parsed command
+    """
+    size = line.size
 
     if default_size is not None and not size:
         size = default_size
@@ -239,7 +306,7 @@ def n_param_from_str(command: str, parameters: str, opcode_cls, n: int=2, defaul
 
     parsed = []
     for i in range(n):
-        parsed.append(parse_assembly_parameter(params[i].strip()))
+        parsed.append(line.get_param(i))
 
     if size is not None:
         return opcode_cls(parsed, size)
@@ -1,8 +1,12 @@
 # Parsing utils
+import re
 from ..enum.ea_mode import EAMode
 from ..models.assembly_parameter import AssemblyParameter
 from ..enum.op_size import OpSize
 
+# comments start at the first ; or *
+_COMMENT_START = re.compile('[;*]')
+
 def from_str_util(command: str, parameters: str) -> (OpSize, list, list):
     """
     Util method for from_str
@@ -207,14 +211,43 @@ def strip_comments(line: str) -> str:
     :param line: The line to strip comments from
     :return: The stripped line
     """
-    to_return = ''
-    for c in line:
-        if c == ';' or c == '*':
-            break
+    match = _COMMENT_START.search(line)
+    return line if match is None else line[:match.start()]
 
-        to_return += c
 
-    return to_return
+def split_line(line: str) -> (str, str, str):
+    """
+    Splits a line into its label, opcode and opcode contents all at once,
+    the same as get_label, get_opcode and strip_opcode
+
+    >>> split_line('start EQU $400 ; comments!')
+    ('start', 'EQU', '$400')
+
+    >>> split_line('    move.b D0, D1')
+    (None, 'MOVE.B', 'D0, D1')
+
+    >>> split_line('    RTS')
+    (None, 'RTS', '')
+
+    >>> split_line('; start EQU $400') is None
+    True
+
+    :param line: The line to split
+    :return: The label (or None), opcode and contents of the line, or None if the line is empty after removing comments
+    """
+    stripped = strip_comments(line)
+    if not stripped.strip():  # The line is literally empty after removing comments
+        return None
+
+    if stripped.startswith(' '):
+        label = None
+        rest = stripped.strip()
+    else:
+        label, _, rest = stripped.partition(' ')
+        rest = rest.strip()
+
+    opcode, _, contents = rest.partition(' ')
+    return label, opcode.upper(), contents.lstrip(' ')
 
 
 def has_label(line: str) -> bool:
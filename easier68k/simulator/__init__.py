@@ -1,5 +1,13 @@
 __all__ = [
+    'block_translator',
     'clock',
+    'device',
+    'dump',
+    'heatmap',
+    'history',
+    'instruction_cache',
     'm68k',
-    'memory'
+    'memory',
+    'run_result',
+    'snapshot'
 ]
\ No newline at end of file
@@ -0,0 +1,472 @@
+"""
+Block Translator
+
+Translates basic blocks of instructions into Python functions, which can be run
+instead of decoding and executing each instruction on its own through Opcode.execute.
+
+A block is a run of instructions which ends before the first instruction that
+can't be translated. This includes everything that changes the flow of the program
+(Bcc, BRA, JSR, RTS, TRAP, SIMHALT), which are left for step_instruction to run.
+Blocks also end before any breakpoint, and aren't run while there are watchpoints on memory.
+
+The source of each block is generated so that it keeps the registers that it uses in
+local integers and reads and writes the memory bytearray directly (or through raw_read and
+raw_write for memory that isn't flat), then compiled with compile().
+The generated code follows the same steps as the execute method of each opcode, including
+the checks that raise errors, so that the simulator ends up in the same state either way.
+Blocks of instructions that are protected with Memory.protect leave out the checks for
+writes to the block itself, since those writes raise ProtectedMemoryError instead.
+"""
+
+from ..core.enum.op_size import OpSize
+from ..core.enum.ea_mode import EAMode
+from ..core.enum.register import Register, DATA_REGISTERS
+from ..core.models.memory_value import MemoryValue
+from ..core.util.conversions import to_word
+from .memory import UnalignedMemoryAccessError, OutOfBoundsMemoryError, PAGE_SHIFT
+from .instruction_cache import MAX_INSTRUCTION_LENGTH
+
+# the most instructions that are put into a single block
+MAX_BLOCK_INSTRUCTIONS = 64
+
+# should try to make this a constant only defined once
+MAX_MEMORY_LOCATION = 16777216  # 2^24
+
+# opcode class -> function that generates the code for it, loaded on first use
+# since the opcodes import the simulator
+_translators = None
+
+
+class UntranslatableInstructionError(Exception):
+    """
+    Raised while generating the code for an instruction which uses
+    something that the translator doesn't support
+    """
+    pass
+
+
+def _mask(size: OpSize) -> int:
+    return (1 << (8 * size.get_number_of_bytes())) - 1
+
+
+def _msb(size: OpSize) -> int:
+    return 1 << (8 * size.get_number_of_bytes() - 1)
+
+
+class _BlockBuilder:
+    """
+    Builds the source of a single block, while keeping track of which
+    registers it uses and the size of the values in the data registers
+    """
+
+    def __init__(self, start: int, flat: bool = True):
+        self.start = start
+
+        # is memory a flat buffer that can be sliced directly, otherwise it is accessed through raw_read and raw_write
+        self.flat = flat
+
+        # the location of the instruction being translated, and the one after it
+        self.pc = start
+        self.next_pc = start
+
+        # number of instructions translated
+        self.count = 0
+
+        self.lines = []
+        self.temp_count = 0
+
+        # registers that are loaded into locals and registers that are changed
+        self.used = set()
+        self.written = set()
+
+        # data registers that are read before they are written, these
+        # must hold long values when the block starts
+        self.guarded = set()
+
+        # data registers remember the size of the value last set in them (M68K.register_sizes),
+        # so this keeps track of the size of the value in each data register known by the block
+        self.widths = {}
+
+        self.uses_ccr = False
+
+        # the lines checking if a write changed the block, which are left out when the block is protected
+        self.modification_checks = set()
+
+        # program counter value after each instruction -> clock cycles taken up to there
+        self.cycles_at = {start: 0}
+
+    def checkpoint(self):
+        return (len(self.lines), self.temp_count, set(self.used), set(self.written),
+                set(self.guarded), dict(self.widths), self.uses_ccr)
+
+    def rollback(self, checkpoint):
+        (length, self.temp_count, self.used, self.written,
+         self.guarded, self.widths, self.uses_ccr) = checkpoint
+        del self.lines[length:]
+
+    def emit(self, line: str):
+        self.lines.append(line)
+
+    def temp(self) -> str:
+        self.temp_count += 1
+        return 't{}'.format(self.temp_count)
+
+    def read_register(self, register: Register) -> str:
+        """
+        Gets the name of the local holding the value of a register
+        """
+        if register in DATA_REGISTERS and register not in self.widths:
+            self.guarded.add(register)
+            self.widths[register] = OpSize.LONG
+        self.used.add(register)
+        return register.name.lower()
+
+    def write_register(self, register: Register, value: str, width: OpSize):
+        """
+        Sets the value of a register
+        """
+        name = register.name.lower()
+        self.used.add(register)
+        self.written.add(register)
+        self.emit('{} = {}'.format(name, value))
+        if register in DATA_REGISTERS:
+            self.widths[register] = width
+            self.emit('w_{} = {}'.format(name, width.name))
+
+    def read_memory(self, length: int, location: str) -> str:
+        """
+        Reads an unsigned value from memory the same way as Memory.get
+        """
+        loc = self.temp()
+        self.emit('{} = {}'.format(loc, location))
+        self.__check_location(length, loc)
+        value = self.temp()
+        if self.flat:
+            self.emit("{} = int.from_bytes(mem[{}:{} + {}], 'big')".format(value, loc, loc, length))
+        else:
+            self.emit("{} = int.from_bytes(raw_read({}, {}), 'big')".format(value, loc, length))
+        return value
+
+    def write_memory(self, length: int, location: str, value: str):
+        """
+        Writes an unsigned value to memory the same way as Memory.set
+        this must be the last thing that an instruction does other than moving the program counter
+        """
+        loc = self.temp()
+        self.emit('{} = {}'.format(loc, location))
+        self.__check_location(length, loc)
+        # the page is copied into the memory snapshots before it is changed, and protected pages are checked
+        self.emit('if not cow_pages[{} >> {}]:'.format(loc, PAGE_SHIFT))
+        self.emit('    sim.memory.prepare_write({}, {})'.format(loc, length))
+        if self.flat:
+            self.emit("mem[{}:{} + {}] = ({}).to_bytes({}, 'big')".format(loc, loc, length, value, length))
+        else:
+            self.emit("raw_write({}, ({}).to_bytes({}, 'big'))".format(loc, value, length))
+        self.emit('notify({}, {})'.format(loc, length))
+        # if this block was written to, it isn't valid any more so stop running it
+        check = 'if {} < block_end and {} + {} > block_start: pc = {}; return {}'.format(
+            loc, loc, length, self.next_pc, self.count + 1)
+        self.modification_checks.add(check)
+        self.emit(check)
+
+    def __check_location(self, length: int, location: str):
+        if length > 1:
+            self.emit('if {} % {}:'.format(location, length))
+            self.emit('    raise UnalignedMemoryAccessError')
+        self.emit('if {} < 0 or {} + {} > memory_size:'.format(location, location, length))
+        self.emit('    raise OutOfBoundsMemoryError')
+
+    def get_value(self, param, length: OpSize) -> (str, OpSize):
+        """
+        Generates the code for AssemblyParameter.get_value
+        :return: the expression holding the unsigned value and the size of that value
+        """
+        mode = param.mode
+
+        if mode is EAMode.IMM:
+            try:
+                if param.data < 0:
+                    value = MemoryValue(length, signed_int=param.data)
+                else:
+                    value = MemoryValue(length, unsigned_int=param.data)
+            except AssertionError:
+                # let get_value raise this when it is run
+                raise UntranslatableInstructionError
+            return str(value.get_value_unsigned()), length
+
+        if mode is EAMode.DRD:
+            register = Register(param.data)
+            name = self.read_register(register)
+            return name, self.widths[register]
+
+        if mode is EAMode.ARI:
+            location = self.read_register(Register(param.data + Register.A0))
+            return self.read_memory(length.get_number_of_bytes(), location), length
+
+        if mode is EAMode.ALA:
+            return str(param.data), OpSize.LONG
+
+        if mode is EAMode.AWA:
+            return str(to_word(param.data)), OpSize.LONG
+
+        raise UntranslatableInstructionError
+
+    def set_value(self, param, value: str, width: OpSize):
+        """
+        Generates the code for AssemblyParameter.set_value
+        """
+        mode = param.mode
+
+        if mode is EAMode.DRD:
+            self.write_register(Register(param.data), value, width)
+
+        elif mode is EAMode.ARD:
+            self.write_register(Register(param.data + Register.A0), value, OpSize.LONG)
+
+        elif mode is EAMode.ARI:
+            self.emit("assert 0 <= {} <= {}, 'The value must fit in the memory space [0, 2^24]'".format(
+                value, MAX_MEMORY_LOCATION))
+            location = self.read_register(Register(param.data + Register.A0))
+            self.write_memory(width.get_number_of_bytes(), location, value)
+
+        elif mode in [EAMode.ALA, EAMode.AWA]:
+            self.emit("assert 0 <= {} <= 0xFFFFFFFF, 'The value must fit inside of a long word!'".format(value))
+            if mode is EAMode.AWA:
+                masked = self.temp()
+                self.emit('{} = {} & 0xFFFF'.format(masked, value))
+                self.emit('assert {} <= {}'.format(masked, _mask(width)))
+                value = masked
+            self.write_memory(width.get_number_of_bytes(), str(param.data), value)
+
+        else:
+            raise UntranslatableInstructionError
+
+    def set_ccr(self, keep: int, bits: list):
+        """
+        Sets bits of the condition code register
+        :param keep: mask of the bits to keep the value of
+        :param bits: list of (mask, condition expression) for the bits to set
+        """
+        self.uses_ccr = True
+        parts = ['(ccr & {})'.format(keep)]
+        for mask, condition in bits:
+            parts.append('({} if {} else 0)'.format(mask, condition))
+        self.emit('ccr = {}'.format(' | '.join(parts)))
+
+    def source(self) -> str:
+        """
+        Puts together the full source of the block function
+        """
+        used = sorted(self.used)
+        written = sorted(self.written)
+
+        lines = ['def block(sim):',
+                 '    regs = sim.registers',
+                 '    sizes = sim.register_sizes']
+        for register in sorted(self.guarded):
+            lines.append('    if sizes[{}] is not LONG:'.format(int(register)))
+            lines.append('        return 0')
+        if self.flat:
+            lines.append('    mem = sim.memory.memory')
+        else:
+            lines.append('    raw_read = sim.memory.raw_read')
+            lines.append('    raw_write = sim.memory.raw_write')
+        lines.append('    memory_size = len(sim.memory)')
+        lines.append('    notify = sim.memory.notify_write')
+        lines.append('    cow_pages = sim.memory.cow_pages')
+        for register in used:
+            lines.append('    {} = regs[{}]'.format(register.name.lower(), int(register)))
+        for register in written:
+            if register in DATA_REGISTERS:
+                lines.append('    w_{} = None'.format(register.name.lower()))
+        if self.uses_ccr:
+            # condition codes deferred by lazy_flags have to be in the CCR before it is used
+            lines.append('    sim.evaluate_condition_codes()')
+            lines.append('    ccr = regs[{}]'.format(int(Register.CCR)))
+        lines.append('    pc = {}'.format(self.start))
+        lines.append('    try:')
+        lines.extend('        ' + line for line in self.lines)
+        lines.append('        return {}'.format(self.count))
+        lines.append('    finally:')
+        for register in written:
+            name = register.name.lower()
+            if register in DATA_REGISTERS:
+                lines.append('        if w_{} is not None:'.format(name))
+                lines.append('            regs[{}] = {}'.format(int(register), name))
+                lines.append('            sizes[{}] = w_{}'.format(int(register), name))
+            else:
+                lines.append('        regs[{}] = {}'.format(int(register), name))
+        if self.uses_ccr:
+            lines.append('        regs[{}] = ccr'.format(int(Register.CCR)))
+        lines.append('        regs[{}] = pc'.format(int(Register.PC)))
+        lines.append('        sim.add_cycles(cycles_at[pc])')
+        return '\n'.join(lines) + '\n'
+
+
+def _extension_length(param, size: OpSize) -> int:
+    """
+    Gets how many bytes follow the opcode word for a parameter,
+    the same way as the execute methods of MOVE, ADD and OR
+    """
+    if param.mode is EAMode.IMM:
+        return OpSize.WORD.value if size is OpSize.BYTE else size.value
+    if param.mode is EAMode.ALA:
+        return OpSize.LONG.value
+    if param.mode is EAMode.AWA:
+        return OpSize.WORD.value
+    return 0
+
+
+def _translate_move(b: _BlockBuilder, op) -> int:
+    to_increment = OpSize.WORD.value + _extension_length(op.src, op.size) + _extension_length(op.dest, op.size)
+    b.next_pc = b.pc + to_increment
+
+    value, width = b.get_value(op.src, op.size)
+    b.set_value(op.dest, value, width)
+    return to_increment
+
+
+def _translate_lea(b: _BlockBuilder, op) -> int:
+    # this is how far Lea.execute moves the program counter
+    to_increment = 2
+    if op.src.mode in [EAMode.ARI, EAMode.AWA, EAMode.ALA]:
+        to_increment += OpSize.LONG.value
+    b.next_pc = b.pc + to_increment
+
+    value, width = b.get_value(op.src, OpSize.LONG)
+    b.set_value(op.dest, value, width)
+    return to_increment
+
+
+def _translate_add(b: _BlockBuilder, op) -> int:
+    to_increment = OpSize.WORD.value + _extension_length(op.src, op.size) + _extension_length(op.dest, op.size)
+    b.next_pc = b.pc + to_increment
+
+    mask = _mask(op.size)
+    msb = _msb(op.size)
+
+    src, src_width = b.get_value(op.src, op.size)
+    dest, _ = b.get_value(op.dest, op.size)
+
+    raw_total = b.temp()
+    b.emit('{} = {} + {}'.format(raw_total, src, dest))
+    negative = b.temp()
+    b.emit('{} = {} & {} != 0'.format(negative, raw_total, msb))
+
+    b.set_ccr(0xE0, [
+        (0x11, '{} > {}'.format(raw_total, mask)),
+        (0x08, negative),
+        (0x04, '{} & {} == 0'.format(raw_total, mask)),
+        (0x02, '{} != ({} & {} != 0)'.format(negative, src, _msb(src_width)))])
+
+    total = b.temp()
+    b.emit('{} = {} & {}'.format(total, raw_total, mask))
+    b.set_value(op.dest, total, OpSize.LONG)
+    return to_increment
+
+
+def _translate_or(b: _BlockBuilder, op) -> int:
+    to_increment = OpSize.WORD.value + _extension_length(op.src, op.size) + _extension_length(op.dest, op.size)
+    b.next_pc = b.pc + to_increment
+
+    src, src_width = b.get_value(op.src, op.size)
+    dest, _ = b.get_value(op.dest, op.size)
+
+    # the result has the size of the source
+    result = b.temp()
+    b.emit('{} = {} | {}'.format(result, src, dest))
+    b.emit('assert {} <= {}'.format(result, _mask(src_width)))
+
+    b.set_ccr(0xF0, [
+        (0x08, '{} & {} != 0'.format(result, _msb(op.size))),
+        (0x04, '{} == 0'.format(result))])
+
+    b.set_value(op.dest, result, src_width)
+    return to_increment
+
+
+def _get_translators() -> dict:
+    global _translators
+    if _translators is None:
+        from ..core.opcodes.move import Move
+        from ..core.opcodes.lea import Lea
+        from ..core.opcodes.add import Add
+        from ..core.opcodes.opcode_or import Or
+
+        _translators = {
+            Move: _translate_move,
+            Lea: _translate_lea,
+            Add: _translate_add,
+            Or: _translate_or
+        }
+    return _translators
+
+
+def translate_block(simulator, start: int):
+    """
+    Translates the block of instructions starting at the given location
+
+    :param simulator: the simulator to decode the instructions from
+    :param start: the location of the first instruction
+    :return: the compiled block function (or False if the first instruction
+        can't be translated) and the number of bytes that the block was decoded from
+    """
+    translators = _get_translators()
+    b = _BlockBuilder(start, simulator.memory.flat)
+
+    while b.count < MAX_BLOCK_INSTRUCTIONS:
+        # blocks end before breakpoints, so that the simulator can stop there
+        if b.count and b.pc in simulator.breakpoints:
+            break
+
+        try:
+            op = simulator.decode_instruction(b.pc)
+        except Exception:
+            # leave it for step_instruction to report the error
+            break
+
+        translator = translators.get(type(op))
+        if translator is None:
+            break
+
+        checkpoint = b.checkpoint()
+        b.emit('# {}'.format(str(op).replace('\n', ' ')))
+        try:
+            to_increment = translator(b, op)
+        except UntranslatableInstructionError:
+            b.rollback(checkpoint)
+            break
+
+        cycles = b.cycles_at[b.pc] + op.cycles
+        b.pc += to_increment
+        b.cycles_at[b.pc] = cycles
+        b.count += 1
+        b.emit('pc = {}'.format(b.pc))
+
+    if b.count == 0:
+        return False, MAX_INSTRUCTION_LENGTH
+
+    # every instruction in the block was decoded from up to MAX_INSTRUCTION_LENGTH bytes
+    block_end = b.pc + MAX_INSTRUCTION_LENGTH
+
+    # nothing can write to protected instructions, so the block doesn't have to check for it
+    if b.modification_checks and simulator.memory.is_protected(start, b.pc - start):
+        b.lines = [line for line in b.lines if line not in b.modification_checks]
+    source = b.source()
+
+    namespace = {
+        'UnalignedMemoryAccessError': UnalignedMemoryAccessError,
+        'OutOfBoundsMemoryError': OutOfBoundsMemoryError,
+        'BYTE': OpSize.BYTE,
+        'WORD': OpSize.WORD,
+        'LONG': OpSize.LONG,
+        'block_start': start,
+        'block_end': block_end,
+        'cycles_at': b.cycles_at
+    }
+    exec(compile(source, '<block ${:06x}>'.format(start), 'exec'), namespace)
+
+    block = namespace['block']
+    # keep the source around, to make debugging the generated code easier
+    block.source = source
+    return block, block_end - start
@@ -0,0 +1,168 @@
+"""
+Device
+
+Peripherals which are mapped into memory with Memory.add_device,
+so reads and writes to their range of memory go to the device instead of RAM
+
+Two devices are included which don't need any hardware, a Timer which counts clock cycles
+and a Uart which sends and receives bytes through buffers in the simulator.
+"""
+
+import typing
+from abc import ABCMeta, abstractmethod
+from collections import deque
+
+
+class Device(metaclass=ABCMeta):
+    """
+    Base class of the devices that can be mapped into memory
+
+    Accesses are 1, 2 or 4 bytes at an offset from the start of the device which is a multiple
+    of their length, and values are unsigned and big endian like the rest of memory.
+    Bulk accesses like read_block and write_block are made one byte at a time.
+    """
+
+    @abstractmethod
+    def read(self, offset: int, length: int) -> int:
+        """
+        Reads from the device
+        :param offset: the location being read from, relative to the start of the device
+        :param length: the number of bytes being read
+        :return: the unsigned value read
+        """
+        pass
+
+    @abstractmethod
+    def write(self, offset: int, length: int, value: int):
+        """
+        Writes to the device
+        :param offset: the location being written to, relative to the start of the device
+        :param length: the number of bytes being written
+        :param value: the unsigned value written
+        :return:
+        """
+        pass
+
+
+def _get_bytes(register: int, offset: int, length: int) -> int:
+    """
+    Gets length bytes of a long word register at the offset into it
+    """
+    return (register >> ((4 - offset - length) * 8)) & ((1 << (length * 8)) - 1)
+
+
+def _set_bytes(register: int, offset: int, length: int, value: int) -> int:
+    """
+    Sets length bytes of a long word register at the offset into it
+    """
+    shift = (4 - offset - length) * 8
+    mask = ((1 << (length * 8)) - 1) << shift
+    return (register & ~mask) | ((value << shift) & mask)
+
+
+class Timer(Device):
+    """
+    A timer which counts up once every so many clock cycles of the simulator
+
+    Registers, both long words:
+    0 COUNT: the number of ticks, writing to it sets the count from now on
+    4 PERIOD: the number of clock cycles per tick, which is at least 1
+    """
+    COUNT = 0
+    PERIOD = 4
+    LENGTH = 8
+
+    def __init__(self, clock: typing.Callable[[], int], period: int = 1):
+        """
+        Constructor
+        :param clock: gets the current number of clock cycles, like M68K.get_cycles
+        :param period: the number of clock cycles per tick
+        """
+        self.clock = clock
+        self.period = max(period, 1)
+
+        # the count is worked out from the cycle count when it is read,
+        # so the timer doesn't have to be told about every instruction
+        self.start_cycles = clock()
+        self.start_count = 0
+
+    def get_count(self) -> int:
+        """
+        Gets the number of ticks as a long word
+        :return:
+        """
+        ticks = (self.clock() - self.start_cycles) // self.period
+        return (self.start_count + ticks) & 0xFFFFFFFF
+
+    def set_count(self, count: int):
+        """
+        Sets the number of ticks, from which the timer counts up
+        :param count:
+        :return:
+        """
+        self.start_cycles = self.clock()
+        self.start_count = count & 0xFFFFFFFF
+
+    def read(self, offset: int, length: int) -> int:
+        register = self.get_count() if offset < Timer.PERIOD else self.period
+        return _get_bytes(register, offset & 3, length)
+
+    def write(self, offset: int, length: int, value: int):
+        if offset < Timer.PERIOD:
+            self.set_count(_set_bytes(self.get_count(), offset, length, value))
+        else:
+            # keep the count the same while the period changes
+            count = self.get_count()
+            self.period = max(_set_bytes(self.period, offset & 3, length, value), 1)
+            self.set_count(count)
+
+
+class Uart(Device):
+    """
+    A serial port which sends bytes to the output buffer, and receives bytes
+    given to it with receive
+
+    Registers, both bytes:
+    0 DATA: reading takes the next received byte (0 if there are none), writing sends a byte
+    1 STATUS: bit 0 is set while there are received bytes to read, bit 1 is always set since sending never blocks
+    """
+    DATA = 0
+    STATUS = 1
+    LENGTH = 4
+
+    RECEIVE_READY = 1
+    SEND_READY = 2
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # the bytes received and not read yet by the program
+        self.input = deque()
+
+        # the bytes that the program has sent
+        self.output = bytearray()
+
+    def receive(self, data: bytes):
+        """
+        Gives bytes to the device for the program to read
+        :param data:
+        :return:
+        """
+        self.input.extend(data)
+
+    def read(self, offset: int, length: int) -> int:
+        value = 0
+        for location in range(offset, offset + length):
+            value <<= 8
+            if location == Uart.DATA:
+                if self.input:
+                    value |= self.input.popleft()
+            elif location == Uart.STATUS:
+                value |= Uart.SEND_READY | (Uart.RECEIVE_READY if self.input else 0)
+        return value
+
+    def write(self, offset: int, length: int, value: int):
+        for location in range(offset, offset + length):
+            if location == Uart.DATA:
+                self.output.append((value >> ((offset + length - 1 - location) * 8)) & 0xFF)
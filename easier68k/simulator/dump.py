@@ -0,0 +1,141 @@
+"""
+Dump
+
+A compact file for the state of the simulator, written by M68K.save_dump and read by M68K.load_dump
+
+Unlike save_memory, which always writes all 16 MB of memory, a dump only keeps the pages
+of memory which aren't all zeros, and compresses them. It also keeps the registers,
+halted flag and cycle count, so the program can carry on from where the dump was saved.
+
+A dump starts with PREFIX: MAGIC, the version of the format and the DumpCompression of the body.
+The body is HEADER (the number of bytes in memory, the flags and the cycle count),
+the number of registers followed by their values and OpSize values, and then each page
+as its number followed by its bytes, ending with END_PAGE.
+"""
+
+import struct
+import typing
+import zlib
+import lzma
+from .memory import MemorySnapshot, PAGE_SHIFT, PAGE_SIZE
+from .snapshot import Snapshot
+from .history import HALTED_FLAG, AUTO_CYCLE_FLAG
+from ..core.enum.dump_compression import DumpCompression
+from ..core.enum.op_size import OpSize
+
+MAGIC = b'E68KDUMP'
+VERSION = 1
+
+PREFIX = struct.Struct('>8sBB')
+HEADER = struct.Struct('>LBQ')
+PAGE_NUMBER = struct.Struct('>L')
+
+# the page number written after the last page
+END_PAGE = 0xFFFFFFFF
+
+
+class InvalidDumpError(Exception):
+    pass
+
+
+def save_dump(simulator, file: typing.BinaryIO, compression: DumpCompression = DumpCompression.ZLIB):
+    """
+    Writes the state of the simulator to the file as a dump
+    the condition codes must already have been evaluated
+    NOTE: file must be opened as binary or this won't work
+    :param simulator: the M68K to save
+    :param file:
+    :param compression: how to compress the body of the dump
+    :return:
+    """
+    compression = DumpCompression(compression)
+    file.write(PREFIX.pack(MAGIC, VERSION, compression))
+
+    if compression is DumpCompression.ZLIB:
+        compressor = zlib.compressobj(zlib.Z_BEST_COMPRESSION)
+    elif compression is DumpCompression.LZMA:
+        compressor = lzma.LZMACompressor()
+    else:
+        compressor = None
+
+    def write(data):
+        file.write(compressor.compress(data) if compressor is not None else data)
+
+    memory = simulator.memory
+    flags = (HALTED_FLAG if simulator.halted else 0) | (AUTO_CYCLE_FLAG if simulator.clock_auto_cycle else 0)
+    write(HEADER.pack(len(memory), flags, simulator.get_cycles()))
+
+    registers = simulator.registers
+    write(bytes([len(registers)]))
+    write(struct.pack('>{}L'.format(len(registers)), *registers))
+    write(bytes(size.value for size in simulator.register_sizes))
+
+    for page, data in memory.nonzero_pages():
+        write(PAGE_NUMBER.pack(page))
+        write(data)
+    write(PAGE_NUMBER.pack(END_PAGE))
+
+    if compressor is not None:
+        file.write(compressor.flush())
+
+
+def read_dump(file: typing.BinaryIO) -> Snapshot:
+    """
+    Reads a dump written by save_dump
+    NOTE: file must be opened as binary or this won't work
+    :param file:
+    :return: a snapshot with the state of the simulator, whose memory holds every page that isn't all zeros
+    """
+    prefix = file.read(PREFIX.size)
+    if len(prefix) != PREFIX.size:
+        raise InvalidDumpError('The file is too short to be a dump')
+    magic, version, compression = PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise InvalidDumpError('The file is not a dump')
+    if version != VERSION:
+        raise InvalidDumpError('Version {} dumps are not supported'.format(version))
+
+    body = file.read()
+    try:
+        compression = DumpCompression(compression)
+        if compression is DumpCompression.ZLIB:
+            body = zlib.decompress(body)
+        elif compression is DumpCompression.LZMA:
+            body = lzma.decompress(body)
+    except (ValueError, zlib.error, lzma.LZMAError):
+        raise InvalidDumpError('The body of the dump could not be decompressed')
+
+    try:
+        length, flags, cycles = HEADER.unpack_from(body, 0)
+        offset = HEADER.size
+
+        count = body[offset]
+        offset += 1
+        registers = list(struct.unpack_from('>{}L'.format(count), body, offset))
+        offset += 4 * count
+        register_sizes = [OpSize(size) for size in body[offset:offset + count]]
+        offset += count
+
+        memory = MemorySnapshot(length)
+        last_page = (length - 1) >> PAGE_SHIFT
+        while True:
+            page, = PAGE_NUMBER.unpack_from(body, offset)
+            offset += PAGE_NUMBER.size
+            if page == END_PAGE:
+                break
+            if page > last_page or page in memory.pages:
+                raise InvalidDumpError('The dump has an invalid page {}'.format(page))
+            # the last page is cut short when the length isn't a multiple of the page size
+            end = offset + min(PAGE_SIZE, length - (page << PAGE_SHIFT))
+            if end > len(body):
+                raise InvalidDumpError('The dump ends part way through a page')
+            memory.pages[page] = body[offset:end]
+            offset = end
+    except (struct.error, IndexError, ValueError):
+        raise InvalidDumpError('The dump ends early or is corrupt')
+
+    if len(register_sizes) != count:
+        raise InvalidDumpError('The dump ends early or is corrupt')
+
+    return Snapshot(registers, register_sizes, None, None, bool(flags & HALTED_FLAG),
+                    bool(flags & AUTO_CYCLE_FLAG), cycles, memory)
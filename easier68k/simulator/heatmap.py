@@ -0,0 +1,116 @@
+"""
+Heatmap
+
+Counts of the reads and writes to each bucket of memory, made by Memory.enable_heatmap
+to show which parts of memory a program uses the most
+
+The counts are kept in array('Q') so they can be handed to NumPy without copying them.
+Only accesses through the checked Memory methods are counted, that is the instructions'
+operands, not instruction fetches.
+"""
+
+import typing
+from array import array
+
+# the characters used to draw the buckets from least to most accessed, ' ' is never accessed
+SHADES = ' .:-=+*#%@'
+
+# the number of buckets on each line drawn by render
+DEFAULT_WIDTH = 64
+
+
+class Heatmap:
+    """
+    Read and write counts for each bucket of bucket_size bytes of memory
+    """
+
+    def __init__(self, length: int, bucket_size: int):
+        """
+        Constructor
+        :param length: the number of bytes in memory
+        :param bucket_size: the number of bytes counted together, a power of 2 that is at least 4,
+            like 64 for a cache line or PAGE_SIZE for a page
+        """
+        assert bucket_size >= 4 and bucket_size & (bucket_size - 1) == 0, \
+            'The bucket size must be a power of 2 of at least 4 bytes!'
+
+        self.bucket_size = bucket_size
+        self.bucket_shift = bucket_size.bit_length() - 1
+        count = (length + bucket_size - 1) >> self.bucket_shift
+
+        self.reads = array('Q', [0]) * count
+        self.writes = array('Q', [0]) * count
+
+    def count_block(self, counts: array, location: int, length: int):
+        """
+        Counts an access to every bucket in the range of memory [location, location + length)
+        :param counts: reads or writes
+        :param location:
+        :param length:
+        :return:
+        """
+        if length > 0:
+            for bucket in range(location >> self.bucket_shift, ((location + length - 1) >> self.bucket_shift) + 1):
+                counts[bucket] += 1
+
+    def clear(self):
+        """
+        Sets all of the counts back to 0
+        :return:
+        """
+        # in place, since Memory holds on to the arrays
+        self.reads[:] = array('Q', [0]) * len(self.reads)
+        self.writes[:] = array('Q', [0]) * len(self.writes)
+
+    def regions(self) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        """
+        Gets the counts of the buckets which were accessed, in order
+        :return: (first location of the bucket, reads, writes)
+        """
+        for bucket, (reads, writes) in enumerate(zip(self.reads, self.writes)):
+            if reads or writes:
+                yield bucket << self.bucket_shift, reads, writes
+
+    def to_csv(self, file: typing.TextIO):
+        """
+        Writes the buckets which were accessed to a CSV file,
+        with the columns location, reads and writes
+        :param file:
+        :return:
+        """
+        file.write('location,reads,writes\n')
+        for location, reads, writes in self.regions():
+            file.write('{:#08x},{},{}\n'.format(location, reads, writes))
+
+    def to_numpy(self):
+        """
+        Gets the counts as NumPy arrays, which requires NumPy to be installed
+        :return: (reads, writes) uint64 arrays with a count for each bucket,
+            which share the counts without copying them, so they change as memory is accessed
+        """
+        import numpy
+        return numpy.frombuffer(self.reads, dtype=numpy.uint64), numpy.frombuffer(self.writes, dtype=numpy.uint64)
+
+    def render(self, width: int = DEFAULT_WIDTH, reads: bool = True, writes: bool = True) -> str:
+        """
+        Draws the heatmap as text, one line of width buckets at a time
+        lines where no bucket was accessed are left out
+        :param width: the number of buckets on each line
+        :param reads: should reads be counted
+        :param writes: should writes be counted
+        :return: the lines, each starting with the location of its first bucket
+        """
+        counts = [(r if reads else 0) + (w if writes else 0) for r, w in zip(self.reads, self.writes)]
+        most = max(counts, default=0)
+        if not most:
+            return ''
+
+        lines = []
+        for start in range(0, len(counts), width):
+            row = counts[start:start + width]
+            if not any(row):
+                continue
+            # accessed buckets get at least the first shade, and the most accessed the last one
+            shades = ''.join(SHADES[0 if not c else 1 + (c * (len(SHADES) - 2)) // most] for c in row)
+            lines.append('{:06x} |{}|'.format(start << self.bucket_shift, shades))
+        return '\n'.join(lines)
@@ -0,0 +1,242 @@
+"""
+History
+
+Keeps what is needed to undo each instruction that the simulator runs,
+so that M68K.step_back can run the program backwards.
+
+For each instruction only the changes are kept: the registers that it changed
+and the bytes of memory that it wrote over, along with the cycle count and halted flag
+from before it ran. These are stored in fixed size arrays used as ring buffers,
+so that the oldest instructions are forgotten once they are full.
+
+Snapshots of the simulator are also taken every so many instructions. Going back
+a long way restores the nearest snapshot and runs forward from there instead,
+which is also how instructions older than the ring buffers are reached.
+"""
+
+from array import array
+
+# the number of instructions that can be undone one at a time
+DEFAULT_CAPACITY = 100000
+
+# how many instructions are run between the snapshots, and how many snapshots are kept
+SNAPSHOT_INTERVAL = 10000
+MAX_SNAPSHOTS = 16
+
+# room for changed registers and memory writes per instruction in the ring buffers
+# most instructions change the PC and one other register, and write to memory at most once
+REGISTERS_PER_INSTRUCTION = 4
+MEMORY_WRITES_PER_INSTRUCTION = 2
+
+# bits of the flags kept for each instruction
+HALTED_FLAG = 1
+AUTO_CYCLE_FLAG = 2
+
+
+class History:
+    """
+    Ring buffers of the changes made by each instruction, and the periodic snapshots
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, snapshot_interval: int = SNAPSHOT_INTERVAL,
+                 max_snapshots: int = MAX_SNAPSHOTS):
+        """
+        Constructor
+        :param capacity: the number of instructions to keep the changes of
+        :param snapshot_interval: the number of instructions between snapshots, or 0 for none
+        :param max_snapshots: the most snapshots to keep, the oldest are dropped first
+        """
+        assert capacity > 0, 'The history must be able to hold at least one instruction!'
+
+        self.capacity = capacity
+        self.register_capacity = capacity * REGISTERS_PER_INSTRUCTION
+        self.memory_capacity = capacity * MEMORY_WRITES_PER_INSTRUCTION
+        self.snapshot_interval = snapshot_interval
+        self.max_snapshots = max_snapshots
+
+        # per instruction, indexed by its position modulo capacity
+        # the cycle count and flags before it ran, and where its changes start in the other buffers
+        self.cycles = array('Q', bytes(8 * capacity))
+        self.flags = array('B', bytes(capacity))
+        self.register_start = array('Q', bytes(8 * capacity))
+        self.memory_start = array('Q', bytes(8 * capacity))
+
+        # changed registers, indexed by their count modulo register_capacity
+        # the register, and its value and size before the instruction
+        self.register_index = array('B', bytes(self.register_capacity))
+        self.register_value = array('L', [0]) * self.register_capacity
+        self.register_size = array('B', bytes(self.register_capacity))
+
+        # memory writes, indexed by their count modulo memory_capacity
+        # the location, number of bytes and the value that was written over
+        self.memory_location = array('L', [0]) * self.memory_capacity
+        self.memory_length = array('B', bytes(self.memory_capacity))
+        self.memory_value = array('L', [0]) * self.memory_capacity
+
+        # number of instructions run, and the position of the oldest one that can still be undone
+        self.position = 0
+        self.first = 0
+
+        # number of changed registers and memory writes that have been kept
+        self.register_total = 0
+        self.memory_total = 0
+
+        # (position, Snapshot) taken before the instruction at that position ran, oldest first
+        self.snapshots = []
+
+        # the registers before the current instruction ran, while one is running
+        self.__registers = None
+        self.__register_sizes = None
+
+    def begin(self, simulator):
+        """
+        Called before an instruction runs, with the condition codes already evaluated
+        :param simulator:
+        :return:
+        """
+        position = self.position
+
+        if self.snapshot_interval and position % self.snapshot_interval == 0 \
+                and (not self.snapshots or self.snapshots[-1][0] < position):
+            self.snapshots.append((position, simulator.snapshot()))
+            if len(self.snapshots) > self.max_snapshots:
+                del self.snapshots[0]
+
+        i = position % self.capacity
+        self.cycles[i] = simulator.get_cycles()
+        self.flags[i] = (HALTED_FLAG if simulator.halted else 0) \
+            | (AUTO_CYCLE_FLAG if simulator.clock_auto_cycle else 0)
+        self.register_start[i] = self.register_total
+        self.memory_start[i] = self.memory_total
+
+        self.__registers = list(simulator.registers)
+        self.__register_sizes = list(simulator.register_sizes)
+
+    def record_memory(self, location: int, length: int, value: int):
+        """
+        Keeps the value in memory that is about to be written over
+        this is called by Memory.set, and ignored when no instruction is running
+        :param location: the location being written to
+        :param length: the number of bytes being written
+        :param value: the unsigned value of those bytes before the write
+        :return:
+        """
+        if self.__registers is None:
+            return
+
+        i = self.memory_total % self.memory_capacity
+        self.memory_location[i] = location
+        self.memory_length[i] = length
+        self.memory_value[i] = value
+        self.memory_total += 1
+
+    def end(self, simulator):
+        """
+        Called after an instruction ran (or raised an error), with the condition codes already evaluated
+        :param simulator:
+        :return:
+        """
+        before, before_sizes = self.__registers, self.__register_sizes
+        self.__registers = self.__register_sizes = None
+
+        sizes = simulator.register_sizes
+        for register, value in enumerate(simulator.registers):
+            if value != before[register] or sizes[register] is not before_sizes[register]:
+                i = self.register_total % self.register_capacity
+                self.register_index[i] = register
+                self.register_value[i] = before[register]
+                self.register_size[i] = before_sizes[register].value
+                self.register_total += 1
+
+        self.position += 1
+
+        # forget the oldest instructions once their changes have been written over
+        self.first = max(self.first, self.position - self.capacity)
+        while self.first < self.position:
+            i = self.first % self.capacity
+            if self.register_start[i] >= self.register_total - self.register_capacity \
+                    and self.memory_start[i] >= self.memory_total - self.memory_capacity:
+                break
+            self.first += 1
+
+    def oldest(self) -> int:
+        """
+        Gets the position of the oldest instruction that can be stepped back to
+        :return:
+        """
+        if self.snapshots:
+            return min(self.first, self.snapshots[0][0])
+        return self.first
+
+    def pop(self) -> (int, int, list, list):
+        """
+        Removes the changes of the latest instruction
+        :return: the cycle count and flags before it ran, the (register, value, OpSize value) of the registers it changed,
+            and the (location, length, value) of the memory it wrote to, latest first
+        """
+        assert self.position > self.first, 'There are no instructions to step back from!'
+
+        self.position -= 1
+        i = self.position % self.capacity
+
+        registers = []
+        start = self.register_start[i]
+        while self.register_total > start:
+            self.register_total -= 1
+            j = self.register_total % self.register_capacity
+            registers.append((self.register_index[j], self.register_value[j], self.register_size[j]))
+
+        writes = []
+        start = self.memory_start[i]
+        while self.memory_total > start:
+            self.memory_total -= 1
+            j = self.memory_total % self.memory_capacity
+            writes.append((self.memory_location[j], self.memory_length[j], self.memory_value[j]))
+
+        return self.cycles[i], self.flags[i], registers, writes
+
+    def nearest_snapshot(self, position: int):
+        """
+        Gets the latest snapshot taken at or before the position
+        :param position:
+        :return: (position, Snapshot) or None
+        """
+        for snapshot in reversed(self.snapshots):
+            if snapshot[0] <= position:
+                return snapshot
+        return None
+
+    def truncate(self, position: int):
+        """
+        Forgets every instruction from the position onwards, after the simulator
+        was set back to the state it was in before that instruction
+        :param position:
+        :return:
+        """
+        if position >= self.first:
+            i = position % self.capacity
+            self.register_total = self.register_start[i]
+            self.memory_total = self.memory_start[i]
+        else:
+            self.first = position
+        self.position = position
+        self.drop_snapshots(position)
+
+    def clear(self):
+        """
+        Forgets every instruction and snapshot, after the simulator was set to a state
+        which they didn't lead to
+        :return:
+        """
+        self.position = self.first = 0
+        self.register_total = self.memory_total = 0
+        self.snapshots = []
+
+    def drop_snapshots(self, position: int):
+        """
+        Drops the snapshots taken after the position
+        :param position:
+        :return:
+        """
+        while self.snapshots and self.snapshots[-1][0] > position:
+            del self.snapshots[-1]
@@ -0,0 +1,131 @@
+"""
+Instruction Cache
+
+Holds the opcode instances that have already been decoded by the simulator,
+keyed by the program counter value that they were decoded from, so that
+instructions which are run many times (like in a loop) only have to be
+disassembled once.
+
+Entries are dropped when the memory that they were decoded from is written to,
+so that self-modifying code still behaves correctly.
+"""
+
+from bisect import bisect_left, insort
+
+# the most bytes that are read from memory to decode a single instruction
+# 2 bytes for the op and max 2 longs which are each 4 bytes
+MAX_INSTRUCTION_LENGTH = 10
+
+
+class InstructionCache:
+    """
+    Cache of decoded instructions keyed by their location in memory
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # program counter value -> decoded opcode instance
+        self.instructions = {}
+
+        # program counter value -> number of bytes the entry was decoded from
+        self.lengths = {}
+
+        # the program counter values of every entry in order, so that the entries a write
+        # overlaps can be found with a binary search
+        self.starts = []
+
+        # the most bytes that any entry was decoded from, entries that start this far before
+        # a write are the furthest back that could overlap it
+        self.longest = 0
+
+        # how many lookups found or did not find a cached instruction
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, location: int):
+        """
+        Gets the decoded instruction at the given location
+        :param location: the program counter value of the instruction
+        :return: the cached opcode instance, or None if it has not been cached
+        """
+        op = self.instructions.get(location)
+        if op is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return op
+
+    def insert(self, location: int, op, length: int = MAX_INSTRUCTION_LENGTH):
+        """
+        Caches a decoded instruction
+        :param location: the program counter value that the instruction was decoded from
+        :param op: the decoded opcode instance
+        :param length: the number of bytes starting at location that the entry depends on
+        :return:
+        """
+        if location not in self.instructions:
+            insort(self.starts, location)
+
+        self.instructions[location] = op
+        self.lengths[location] = length
+        self.longest = max(self.longest, length)
+
+    def invalidate(self, location: int, length: int):
+        """
+        Drops every cached entry that was decoded from any of the bytes
+        in the range [location, location + length)
+        :param location: the first byte that was written to
+        :param length: the number of bytes that were written
+        :return:
+        """
+        starts = self.starts
+        if not starts:
+            return
+
+        end = location + length
+        first = bisect_left(starts, location - self.longest + 1)
+        last = bisect_left(starts, end, first)
+        if first == last:
+            return
+
+        kept = []
+        for pc in starts[first:last]:
+            if pc + self.lengths[pc] > location:
+                del self.instructions[pc]
+                del self.lengths[pc]
+            else:
+                kept.append(pc)
+        starts[first:last] = kept
+
+    def copy(self):
+        """
+        Makes a new cache holding the same entries, which are shared since they aren't changed once cached
+        the hit and miss counts start over
+        :return:
+        """
+        copied = InstructionCache()
+        copied.instructions = dict(self.instructions)
+        copied.lengths = dict(self.lengths)
+        copied.starts = list(self.starts)
+        copied.longest = self.longest
+        return copied
+
+    def clear(self):
+        """
+        Drops every cached instruction, the hit and miss counts are kept
+        :return:
+        """
+        self.instructions = {}
+        self.lengths = {}
+        self.starts = []
+        self.longest = 0
+
+    def clear_stats(self):
+        """
+        Resets the hit and miss counts
+        :return:
+        """
+        self.hits = 0
+        self.misses = 0
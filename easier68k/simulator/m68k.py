@@ -2,23 +2,75 @@
 Motorola 68k chip definition
 """
 
-from .memory import Memory
+from .memory import Memory, PagedMemory, PAGE_SHIFT
+from .instruction_cache import InstructionCache
+from .block_translator import translate_block, MAX_BLOCK_INSTRUCTIONS
+from .run_result import RunResult
+from .snapshot import Snapshot
+from .history import History, DEFAULT_CAPACITY, SNAPSHOT_INTERVAL, HALTED_FLAG, AUTO_CYCLE_FLAG
+from .dump import save_dump, read_dump, InvalidDumpError
+from ..core.enum.dump_compression import DumpCompression
+from ..core.enum.stop_reason import StopReason
+from ..core.util.cycle_timing import get_cycles, get_branch_not_taken_cycles
 from ..core.enum.register import Register, FULL_SIZE_REGISTERS, ALL_ADDRESS_REGISTERS
 from ..core.enum.condition_status_code import ConditionStatusCode
 from ..core.models.list_file import ListFile
 import typing
 import binascii
+import time
 from ..core.models.memory_value import MemoryValue
 from ..core.enum.op_size import OpSize
 
 MAX_MEMORY_LOCATION = 16777216  # 2^24
 
+# how many instructions run_for runs between checks of the deadline
+DEADLINE_CHECK_INTERVAL = 1024
+
+# table from the first word of an instruction to the opcode classes which could decode it
+# this is loaded on the first step, since the opcodes import this module
+_opcode_decode_table = None
+
+class InvalidInstructionError(Exception):
+    """
+    Raised when no instruction can be decoded at the program counter
+    """
+    pass
+
+
 class M68K:
-    def __init__(self):
+    def __init__(self, translate_blocks: bool = False, lazy_flags: bool = False, paged_memory: bool = False,
+                 memory: Memory = None):
         """
         Constructor
-        """
-        self.memory = Memory()
+        :param translate_blocks: should run() execute translated blocks of instructions
+            where it can instead of executing every instruction on its own
+        :param lazy_flags: should the condition codes set by arithmetic instructions
+            only be computed once the CCR is read
+        :param paged_memory: should memory only allocate the pages that are written to (PagedMemory)
+            instead of all 16 MB at once
+        :param memory: the memory to use instead of making a new one
+        """
+        if memory is None:
+            memory = PagedMemory() if paged_memory else Memory()
+        self.memory = memory
+
+        # decoded instructions keyed by their location in memory
+        # entries are dropped when the memory they were decoded from is written to
+        self.instruction_cache = InstructionCache()
+        self.memory.add_write_listener(self.instruction_cache.invalidate)
+
+        # translated blocks of instructions keyed by the location of their first instruction
+        # False is cached for locations where no block could be translated
+        self.translate_blocks = translate_blocks
+        self.block_cache = InstructionCache()
+        self.memory.add_write_listener(self.block_cache.invalidate)
+
+        # the condition codes of the last instructions that used set_ccr_deferred, when lazy_flags is set
+        # each is (flags function, args, does it set X), the X bit comes from _ccr_pending_extend
+        # when the latest one doesn't set it
+        self.lazy_flags = lazy_flags
+        self._ccr_pending = None
+        self._ccr_pending_extend = None
 
         # has the simulation been halted using SIMHALT or .halt()
         self.halted = False
@@ -27,12 +79,23 @@ class M68K:
         self.clock_auto_cycle = True
         self._clock_cycles = 0
 
-        # todo add events for each clock cycle
-        # this is necessary for implementing breakpoints
-        # and watches for value changes
+        # program counter values that run and run_for stop at before running the instruction there
+        # watchpoints on memory are kept by self.memory
+        self.breakpoints = set()
+
+        # the changes made by each instruction, kept when enable_history is called so that step_back can undo them
+        self.history = None
+
+        # snapshot taken when a list file is loaded, that reload_execution starts over from
+        self._start_snapshot = None
 
         # set up the registers to their default values
-        self.registers = {}
+        # the register file holds the unsigned int value of each register, indexed by Register
+        self.registers = [0] * (max(Register) + 1)
+
+        # the size of the MemoryValue last set in each register through set_register,
+        # so that get_register gives back a value of the same size
+        self.register_sizes = [OpSize.LONG] * (max(Register) + 1)
         self.__init_registers()
 
     def __init_registers(self):
@@ -41,16 +104,43 @@ class M68K:
         :return:
         """
 
-        # loop through all of the full size registers which are just 32 bits / 4 bytes long
-        for register in FULL_SIZE_REGISTERS:
-            self.registers[register] = MemoryValue(OpSize.LONG)
-
-        # set up all of the odd registers (in this case, just the Condition Code Register)
-        # which just uses 5 bits out of the lowermost byte (do we want to allocate it an entire word instead?)
-        self.registers[Register.ConditionCodeRegister] = MemoryValue(OpSize.BYTE)
+        # all of the full size registers are just 32 bits / 4 bytes long
+        # and the Condition Code Register just uses 5 bits out of the lowermost byte
+        for register in Register:
+            self.registers[register] = 0
+            self.register_sizes[register] = OpSize.LONG
+        self.register_sizes[Register.ConditionCodeRegister] = OpSize.BYTE
 
         # Easy68k initializes the step counter (A7) to 0x1000000 by default, so do the same
-        self.set_register(Register.A7, MemoryValue(OpSize.LONG, unsigned_int=0x1000000))
+        self.registers[Register.A7] = 0x1000000
+
+    def get_register_value(self, register: Register) -> int:
+        """
+        Gets the unsigned integer value of a register
+        :param register:
+        :return:
+        """
+        if self._ccr_pending is not None and register == Register.ConditionCodeRegister:
+            self.evaluate_condition_codes()
+        return self.registers[register]
+
+    def set_register_value(self, register: Register, value: int):
+        """
+        Sets the unsigned integer value of a register
+        :param register:
+        :param value:
+        :return:
+        """
+        # the CCR is just a single byte, all other registers are 4 bytes
+        if register == Register.ConditionCodeRegister:
+            assert 0 <= value <= 0xFF, 'The value for the CCR must fit in a single byte!'
+            # the whole CCR is replaced, so the pending condition codes don't matter anymore
+            self._ccr_pending = self._ccr_pending_extend = None
+        else:
+            assert 0 <= value <= 0xFFFFFFFF, 'The value for registers must fit into 4 bytes!'
+            self.register_sizes[register] = OpSize.LONG
+
+        self.registers[register] = value
 
     def get_register(self, register: Register) -> MemoryValue:
         """
@@ -58,7 +148,9 @@ class M68K:
         :param register:
         :return:
         """
-        return self.registers[register]
+        if self._ccr_pending is not None and register == Register.ConditionCodeRegister:
+            self.evaluate_condition_codes()
+        return MemoryValue(self.register_sizes[register], unsigned_int=self.registers[register])
 
     def set_register(self, register: Register, val: MemoryValue):
         """
@@ -84,7 +176,8 @@ class M68K:
         assert 0 <= val.get_value_unsigned() <= 0xFFFFFFFF, 'The value for registers must fit into 4 bytes!'
 
         # set the value
-        self.registers[register] = val
+        self.registers[register] = val.get_value_unsigned()
+        self.register_sizes[register] = OpSize(val.length)
 
     def _set_condition_code_register_value(self, val: MemoryValue):
         """
@@ -96,8 +189,11 @@ class M68K:
         # since the CCR is just a single byte
         assert 0 <= val.get_value_unsigned() <= 0xFF, 'The value for the CCR must fit in a single byte!'
 
+        # the whole CCR is replaced, so the pending condition codes don't matter anymore
+        self._ccr_pending = self._ccr_pending_extend = None
+
         # now set the value
-        self.registers[Register.ConditionCodeRegister] = val
+        self.registers[Register.ConditionCodeRegister] = val.get_value_unsigned()
 
 
     def get_program_counter_value(self) -> int:
@@ -105,9 +201,7 @@ class M68K:
         Gets the 32-bit unsigned integer value for the program counter value
         :return:
         """
-        mv = self.get_register(Register.ProgramCounter)
-        ret = mv.get_value_unsigned()
-        return ret
+        return self.registers[Register.ProgramCounter]
 
 
     def set_address_register_value(self, reg: Register, new_value: MemoryValue):
@@ -122,7 +216,7 @@ class M68K:
         assert reg in ALL_ADDRESS_REGISTERS, 'The register given is not an address register!'
 
         # now set the value of the register
-        self.registers[reg].set_value_unsigned_int(new_value.get_value_unsigned())
+        self.set_register_value(reg, new_value.get_value_unsigned())
 
 
     def set_program_counter_value(self, new_value: int):
@@ -132,7 +226,8 @@ class M68K:
         :param new_value:
         :return:
         """
-        self.set_address_register_value(Register.ProgramCounter, MemoryValue(OpSize.LONG, unsigned_int=new_value))
+        assert 0 <= new_value <= 0xFFFFFFFF, 'The value for registers must fit into 4 bytes!'
+        self.registers[Register.ProgramCounter] = new_value
 
     def increment_program_counter(self, inc: int):
         """
@@ -141,7 +236,7 @@ class M68K:
         :return:
         """
         self.set_program_counter_value(
-            self.get_program_counter_value() + inc)
+            self.registers[Register.ProgramCounter] + inc)
 
     def get_condition_status_code(self, code: ConditionStatusCode) -> bool:
         """
@@ -149,9 +244,11 @@ class M68K:
         :param code:
         :return:
         """
-        ccr = self.get_register(Register.CCR).get_value_unsigned()
+        if self._ccr_pending is not None:
+            self.evaluate_condition_codes()
+
         # ccr is only 1 byte, bit mask away the bit being looked for
-        return (ccr & code) > 0
+        return (self.registers[Register.CCR] & code) > 0
 
     def set_condition_status_code(self, code: ConditionStatusCode, value: bool):
         """
@@ -159,15 +256,13 @@ class M68K:
         :param code:
         :return:
         """
-        ccr = self.get_register(Register.CCR)
-        v = ccr.get_value_unsigned()
+        if self._ccr_pending is not None:
+            self.evaluate_condition_codes()
 
         if value:
-            v |= code
+            self.registers[Register.CCR] |= code
         else:
-            v &= ~code
-
-        self._set_condition_code_register_value(MemoryValue(OpSize.BYTE, unsigned_int=v))
+            self.registers[Register.CCR] &= ~code
 
     def run(self):
         """
@@ -179,8 +274,97 @@ class M68K:
                 # run a single instruction
                 self.step_instruction()
             else:
+                # the instruction at the starting location runs even if there is a breakpoint on it,
+                # so that running again continues from a breakpoint
+                first = True
+                self.memory.watch_hit = None
                 while self.clock_auto_cycle:
-                    self.step_instruction()
+                    if self.breakpoints and not first \
+                            and self.registers[Register.ProgramCounter] in self.breakpoints:
+                        return
+                    first = False
+
+                    if not self.__can_run_blocks():
+                        self.step_instruction()
+                        if self.memory.watch_hit is not None:
+                            return
+                    elif not self.translate_blocks or not self.run_block():
+                        self.step_instruction()
+
+    def run_for(self, max_instructions: int = None, max_cycles: int = None, deadline: float = None) -> RunResult:
+        """
+        Runs instructions until the simulator halts, an instruction raises an error,
+        or one of the given limits is reached
+        :param max_instructions: the most instructions to run, or None for no limit
+        :param max_cycles: the most clock cycles to run for, or None for no limit
+        :param deadline: the time.monotonic() value to stop at, or None for no limit
+            this is checked every DEADLINE_CHECK_INTERVAL instructions
+        :return: the reason for stopping, and the number of instructions and cycles that were run
+            when a watchpoint is hit, the access is in self.memory.watch_hit
+        """
+        infinity = float('inf')
+        instruction_limit = infinity if max_instructions is None else max_instructions
+        cycle_limit = infinity if max_cycles is None else self._clock_cycles + max_cycles
+        next_deadline_check = infinity if deadline is None else 0
+
+        # breakpoints and watchpoints are only checked when there are any
+        # the instruction at the starting location runs even if there is a breakpoint on it
+        breakpoints = self.breakpoints or None
+        registers = self.registers
+        watching = bool(self.memory.watchpoints)
+        self.memory.watch_hit = None
+
+        # blocks only run when they can't go over the instruction limit
+        run_block = self.run_block if self.translate_blocks and self.__can_run_blocks() else None
+        block_limit = instruction_limit - MAX_BLOCK_INSTRUCTIONS
+
+        step = self.step_instruction
+        start_cycles = self._clock_cycles
+        instructions = 0
+        reason = StopReason.BUDGET_EXHAUSTED
+        fault = None
+
+        try:
+            while instructions < instruction_limit and self._clock_cycles < cycle_limit:
+                if self.halted:
+                    reason = StopReason.HALTED
+                    break
+
+                if instructions >= next_deadline_check:
+                    if time.monotonic() >= deadline:
+                        break
+                    next_deadline_check = instructions + DEADLINE_CHECK_INTERVAL
+
+                if breakpoints is not None and instructions \
+                        and registers[Register.ProgramCounter] in breakpoints:
+                    reason = StopReason.BREAKPOINT
+                    break
+
+                if run_block is not None and instructions <= block_limit:
+                    count = run_block()
+                    if count:
+                        instructions += count
+                        continue
+
+                if not step():
+                    raise InvalidInstructionError(
+                        'No instruction could be decoded at {:#x}'.format(self.get_program_counter_value()))
+                instructions += 1
+
+                if watching and self.memory.watch_hit is not None:
+                    reason = StopReason.WATCHPOINT
+                    break
+
+            else:
+                # the limit may have been reached by the instruction which halted
+                if self.halted:
+                    reason = StopReason.HALTED
+
+        except Exception as e:
+            reason = StopReason.FAULT
+            fault = e
+
+        return RunResult(reason, instructions, self._clock_cycles - start_cycles, fault)
 
     def halt(self):
         """
@@ -190,50 +374,297 @@ class M68K:
         self.clock_auto_cycle = False
         self.halted = True
 
-    def step_instruction(self):
+    def add_breakpoint(self, location: int):
+        """
+        Stops run and run_for before running the instruction at the given location
+        :param location: the program counter value to stop at
+        :return:
+        """
+        self.breakpoints.add(location)
+        # translated blocks only stop at their ends, so drop the ones that run over the breakpoint
+        self.block_cache.invalidate(location, 1)
+
+    def remove_breakpoint(self, location: int):
+        """
+        Removes the breakpoint at the given location, if there is one
+        :param location: the program counter value of the breakpoint
+        :return:
+        """
+        if location in self.breakpoints:
+            self.breakpoints.remove(location)
+            # let the blocks which stopped at the breakpoint be translated again past it
+            self.block_cache.invalidate(location, 1)
+
+    def clear_breakpoints(self):
+        """
+        Removes all of the breakpoints
+        :return:
+        """
+        for location in list(self.breakpoints):
+            self.remove_breakpoint(location)
+
+    def step_instruction(self) -> bool:
         """
         Increments the clock until the program
         counter increments
+        :return: whether an instruction was run
+        """
+        if self.halted:
+            return False
+
+        pc_val = self.get_program_counter_value()
+
+        op = self.instruction_cache.get(pc_val)
+        if op is None:
+            op = self.decode_instruction(pc_val)
+            if op is None:
+                return False
+            self.instruction_cache.insert(pc_val, op, op.get_decoded_length())
+
+        if self.history is not None:
+            self.__step_with_history(op)
+            return True
+
+        op.execute(self)
+        self._clock_cycles += op.cycles
+        return True
+
+    def __step_with_history(self, op):
+        """
+        Runs an instruction while keeping its changes in the history
+        the condition codes are evaluated before and after, so that the CCR can be undone like any other register
+        """
+        if self._ccr_pending is not None:
+            self.evaluate_condition_codes()
+        self.history.begin(self)
+        try:
+            op.execute(self)
+            self._clock_cycles += op.cycles
+        finally:
+            if self._ccr_pending is not None:
+                self.evaluate_condition_codes()
+            self.history.end(self)
+
+    def enable_history(self, capacity: int = DEFAULT_CAPACITY, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        """
+        Starts keeping the changes made by each instruction, so that step_back can be used
+        translated blocks aren't run while the history is kept
+        :param capacity: the number of instructions which can be undone one at a time
+        :param snapshot_interval: the number of instructions between the snapshots that step_back
+            can also go back to, or 0 for none
         :return:
         """
-        if not self.halted:
+        self.history = History(capacity, snapshot_interval)
+        self.memory.history = self.history
+
+    def disable_history(self):
+        """
+        Stops keeping the changes made by each instruction, and forgets the ones that were kept
+        :return:
+        """
+        self.history = None
+        self.memory.history = None
+
+    def step_back(self, count: int = 1) -> int:
+        """
+        Undoes the latest instructions that were run since enable_history was called
+        changes made to the registers or memory between instructions (like from the CLI) aren't undone
+        :param count: the number of instructions to undo
+        :return: the number of instructions that were undone, which is less than count
+            if the history doesn't go back that far
+        """
+        assert self.history is not None, 'enable_history must be called before stepping back!'
+        history = self.history
+
+        count = max(0, min(count, history.position - history.oldest()))
+        target = history.position - count
+
+        # going back past the ring buffers, or far enough that running forward from
+        # a snapshot is quicker, starts from the snapshot
+        snapshot = history.nearest_snapshot(target)
+        if snapshot is not None and (target < history.first or target - snapshot[0] < count):
+            position, state = snapshot
+            self.__restore(state)
+            history.truncate(position)
+            while history.position < target and self.step_instruction():
+                pass
+            return count
+
+        if self._ccr_pending is not None:
+            self.evaluate_condition_codes()
+
+        memory = self.memory
+        for _ in range(count):
+            cycles, flags, registers, writes = history.pop()
+
+            for register, value, size in registers:
+                self.registers[register] = value
+                self.register_sizes[register] = OpSize(size)
+
+            for location, length, value in writes:
+                memory.copy_on_write(location >> PAGE_SHIFT)
+                memory.raw_write(location, value.to_bytes(length, 'big'))
+                memory.notify_write(location, length)
+
+            self._clock_cycles = cycles
+            self.halted = bool(flags & HALTED_FLAG)
+            self.clock_auto_cycle = bool(flags & AUTO_CYCLE_FLAG)
+
+        history.drop_snapshots(target)
+        return count
+
+    def __can_run_blocks(self) -> bool:
+        """
+        Translated blocks access memory directly, so they can't be run while there are
+        watchpoints, devices or a heatmap in memory, or while history is kept
+        """
+        memory = self.memory
+        return not memory.watchpoints and not memory.devices and memory.heatmap is None and self.history is None
+
+    def run_block(self) -> int:
+        """
+        Runs the translated block of instructions starting at the program counter,
+        translating it first if it isn't already cached
+        :return: the number of instructions that were run, 0 if there is no block that can be run
+        """
+        if self.halted:
+            return 0
+
+        pc_val = self.get_program_counter_value()
+
+        block = self.block_cache.get(pc_val)
+        if block is None:
+            block, length = translate_block(self, pc_val)
+            self.block_cache.insert(pc_val, block, length)
+
+        if not block:
+            return 0
+
+        return block(self)
+
+    def decode_instruction(self, pc_val: int):
+        """
+        Disassembles the instruction at the given location in memory
+        :param pc_val: the location of the instruction
+        :return: the opcode instance, or None if no opcode matched
+        """
+        global _opcode_decode_table
+        if _opcode_decode_table is None:
             # must be here or we get circular dependency issues
-            from ..core.util.find_module import find_opcode_cls, valid_opcodes
-
-            for op_str in valid_opcodes:
-                op_class = find_opcode_cls(op_str)
-
-                # We don't know this opcode, there's no module for it
-                if op_class is None:
-                    print('Opcode {} is not known: skipping and continuing'.format(op_str))
-                    assert False
-                    continue
-
-                # 10 comes from 2 bytes for the op and max 2 longs which are each 4 bytes
-                # note: this currently has the edge case that it will fail unintelligibly
-                # if encountered at the end of memory
-                pc_val = self.get_program_counter_value()
-                op = op_class.disassemble_instruction(self.memory.memory[pc_val:pc_val+10])
-                if op is not None:
-                    op.execute(self)
-                    # done exeucting after doing an operation
-                    return
+            from ..core.util.find_module import get_opcode_decode_table
+            _opcode_decode_table = get_opcode_decode_table()
+
+        # 10 comes from 2 bytes for the op and max 2 longs which are each 4 bytes
+        # note: this currently has the edge case that it will fail unintelligibly
+        # if encountered at the end of memory
+        data = self.memory.raw_read(pc_val, 10)
+
+        # only try the opcodes that could match the first word
+        for op_class in _opcode_decode_table[int.from_bytes(data[0:2], 'big')]:
+            op = op_class.disassemble_instruction(data)
+            if op is not None:
+                op.cycles = get_cycles(op)
+                if hasattr(op, 'not_taken_cycles'):
+                    op.not_taken_cycles = get_branch_not_taken_cycles(op)
+                return op
+
+        return None
+
+    def get_instruction_cache_stats(self) -> (int, int):
+        """
+        Gets how many times an instruction was found in or missing from the decoded instruction cache
+        :return: the number of hits and the number of misses
+        """
+        return self.instruction_cache.hits, self.instruction_cache.misses
+
+    def clone(self):
+        """
+        Makes a new simulator in the same state as this one, which runs on its own from here
+        With PagedMemory the pages of memory are shared by both until either writes to them,
+        so a simulator with a program loaded can be used as a template to quickly start many sessions.
+        The decoded instructions and translated blocks are shared too, and the protected memory is
+        protected in the clone as well, but not the breakpoints, watchpoints or history
+        :return:
+        """
+        clone = M68K(self.translate_blocks, self.lazy_flags, memory=self.memory.fork())
+
+        # translated blocks of protected code don't check if they were written to
+        for start, end in self.memory.protected:
+            clone.memory.protect(start, end - start)
+
+        clone.instruction_cache = self.instruction_cache.copy()
+        clone.block_cache = self.block_cache.copy()
+        clone.memory.write_listeners = [clone.instruction_cache.invalidate, clone.block_cache.invalidate]
+
+        clone.registers[:] = self.registers
+        clone.register_sizes[:] = self.register_sizes
+        clone._ccr_pending = self._ccr_pending
+        clone._ccr_pending_extend = self._ccr_pending_extend
+        clone.halted = self.halted
+        clone.clock_auto_cycle = self.clock_auto_cycle
+        clone._clock_cycles = self._clock_cycles
+
+        # reload_execution in the clone starts over from the point it was cloned at
+        if self._start_snapshot is not None:
+            clone._start_snapshot = clone.snapshot()
+        return clone
+
+    def snapshot(self) -> Snapshot:
+        """
+        Takes a snapshot of the full state of the simulator, the registers, condition codes,
+        halted flag, cycle count and memory, which can be given to restore to go back to this point
+        memory is only copied one page at a time once it is written to
+        :return:
+        """
+        return Snapshot(list(self.registers), list(self.register_sizes),
+                        self._ccr_pending, self._ccr_pending_extend,
+                        self.halted, self.clock_auto_cycle, self._clock_cycles,
+                        self.memory.snapshot())
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Sets the simulator back to the state it was in when the snapshot was taken
+        a snapshot can be restored any number of times
+        the history is cleared, since the instructions in it didn't lead to the snapshot
+        :param snapshot:
+        :return:
+        """
+        self.__restore(snapshot)
+        if self.history is not None:
+            self.history.clear()
+
+    def __restore(self, snapshot: Snapshot):
+        """
+        Sets the simulator back to the snapshot without changing the history, for step_back
+        """
+        self.registers[:] = snapshot.registers
+        self.register_sizes[:] = snapshot.register_sizes
+        self._ccr_pending = snapshot.ccr_pending
+        self._ccr_pending_extend = snapshot.ccr_pending_extend
+        self.halted = snapshot.halted
+        self.clock_auto_cycle = snapshot.clock_auto_cycle
+        self._clock_cycles = snapshot.clock_cycles
+        self.memory.restore(snapshot.memory)
 
     def reload_execution(self):
         """
         restarts execution of the program
         up to the current program counter location
+
+        The program is started over from the state it was in when the list file was loaded,
+        and run for the same number of clock cycles as it had been run for
         :return:
         """
-        # get the current PC
-        current_pc = self.get_program_counter_value()
+        assert self._start_snapshot is not None, 'A list file must be loaded to reload execution!'
 
-        # reset the PC value
-        # todo, need to store the starting location
+        cycles = self._clock_cycles
+        halted = self.halted
+        self.restore(self._start_snapshot)
 
-        # set the starting PC value
-
-        # run until hits that PC value
+        # run one instruction at a time, so that it stops at the same instruction
+        # SIMHALT doesn't take any cycles, so it is run as well if the simulator was halted
+        while (self._clock_cycles < cycles or (halted and not self.halted)) and self.step_instruction():
+            pass
 
     def get_cycles(self):
         """
@@ -242,6 +673,14 @@ class M68K:
         """
         return self._clock_cycles
 
+    def add_cycles(self, cycles: int):
+        """
+        Adds to the count of clock cycles
+        :param cycles: the number of cycles to add
+        :return:
+        """
+        self._clock_cycles += cycles
+
     def clear_cycles(self):
         """
         Resets the count of clock cycles
@@ -249,17 +688,26 @@ class M68K:
         """
         self._clock_cycles = 0
 
-    def load_list_file(self, list_file: ListFile):
+    def load_list_file(self, list_file: ListFile, protect_code: bool = False):
         """
         Load List File
 
         load the contents of a list file into memory
         using the locations specified inside of the list file
+        any memory protected before this is unprotected first
         :param list_file:
+        :param protect_code: make the instructions of the list file read only, so writing to them
+            raises ProtectedMemoryError, which run_for reports as StopReason.FAULT
         :return:
         """
+        self.memory.clear_protection()
         self.memory.load_list_file(list_file)
+        if protect_code:
+            for key, value in list_file.data.items():
+                if key in list_file.code and value:
+                    self.memory.protect(int(key), len(value) // 2)
         self.set_program_counter_value(int(list_file.starting_execution_address))
+        self._start_snapshot = self.snapshot()
 
     def load_memory(self, file : typing.BinaryIO):
         """
@@ -276,6 +724,34 @@ class M68K:
         """
         self.memory.save_memory(file)
 
+    def save_dump(self, file: typing.BinaryIO, compression: DumpCompression = DumpCompression.ZLIB):
+        """
+        Saves the registers, cycle count and the memory which isn't zeros into the designated file,
+        which is much smaller than the 16 MB written by save_memory
+        NOTE: file must be opened as binary or this won't work
+        :param file:
+        :param compression: how to compress the dump
+        :return:
+        """
+        self.evaluate_condition_codes()
+        save_dump(self, file, compression)
+
+    def load_dump(self, file: typing.BinaryIO):
+        """
+        Loads the state of the simulator from a dump written by save_dump
+        reload_execution starts over from the loaded state, and the history is cleared
+        NOTE: file must be opened as binary or this won't work
+        :param file:
+        :return:
+        """
+        snapshot = read_dump(file)
+        if snapshot.memory.length != len(self.memory) or len(snapshot.registers) != len(self.registers):
+            raise InvalidDumpError('The dump was saved from a different size of memory or registers')
+
+        self.memory.clear()
+        self.restore(snapshot)
+        self._start_snapshot = self.snapshot()
+
 
     def set_ccr_reg(self, extend, negative, zero, overflow, carry): 
         """
@@ -289,6 +765,9 @@ class M68K:
         :param carry:
         :return:
         """
+        if self._ccr_pending is not None:
+            self.evaluate_condition_codes()
+
         if extend is not None:
             extend = bool(extend)
             self.set_condition_status_code(ConditionStatusCode.X, extend)
@@ -309,3 +788,41 @@ class M68K:
             carry = bool(carry)
             self.set_condition_status_code(ConditionStatusCode.C, carry)
     
+
+    def set_ccr_deferred(self, flags, *args, sets_extend: bool = True):
+        """
+        Sets the CCR using the condition codes from flags(*args), which returns the values for
+        X, N, Z, V and C the same way as they are passed to set_ccr_reg.
+        If lazy_flags is set this only keeps track of the call, and the condition codes
+        are computed once something reads the CCR.
+        :param flags: function which computes the condition codes
+        :param args: the operands, result and size of the operation that the condition codes are computed from
+        :param sets_extend: whether flags sets the X bit, otherwise it returns None for it
+        :return:
+        """
+        if not self.lazy_flags:
+            self.set_ccr_reg(*flags(*args))
+            return
+
+        if sets_extend:
+            # every bit is replaced, so nothing before this matters
+            self._ccr_pending_extend = None
+        elif self._ccr_pending is not None and self._ccr_pending[2]:
+            # the X bit comes from the latest operation that set it
+            self._ccr_pending_extend = self._ccr_pending
+
+        self._ccr_pending = (flags, args, sets_extend)
+
+    def evaluate_condition_codes(self):
+        """
+        Computes the condition codes that were deferred by set_ccr_deferred
+        and sets them in the CCR
+        :return:
+        """
+        pending, extend = self._ccr_pending, self._ccr_pending_extend
+        self._ccr_pending = self._ccr_pending_extend = None
+
+        if extend is not None:
+            self.set_ccr_reg(*extend[0](*extend[1]))
+        if pending is not None:
+            self.set_ccr_reg(*pending[0](*pending[1]))
@@ -10,8 +10,39 @@ from ..core.enum.condition_status_code import ConditionStatusCode
 from ..core.enum.system_status_code import SystemStatusCode
 from ..core.models.list_file import ListFile
 import typing
+import weakref
+import os
+import mmap
+import bisect
+from collections import OrderedDict
 from ..core.models.memory_value import MemoryValue
 from ..core.enum.op_size import OpSize
+from ..core.enum.watch_kind import WatchKind
+from .device import Device
+from .heatmap import Heatmap
+
+# memory is split into pages of 2^12 = 4096 bytes for watchpoints and snapshots,
+# so accesses to pages without a watchpoint, or which were already copied for the
+# snapshots, only have to check a single flag
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+# 16777216 = 2^24
+# it is the number of bytes easy68K uses.
+MEMORY_SIZE = 16777216
+
+# number of bytes written to the file at a time by save_memory
+SAVE_CHUNK_SIZE = 1 << 20
+
+# a page of zeros, which pages that were never written to hold
+ZERO_PAGE = bytes(PAGE_SIZE)
+
+# the most program images that PagedMemory.load_list_file keeps around to share with other memories
+MAX_PROGRAM_IMAGES = 16
+
+# the pages of list files loaded into PagedMemory, keyed by the data of the list file
+# page number -> bytes of the page, shared by every memory that the list file is loaded into
+_program_images = OrderedDict()
 
 class UnalignedMemoryAccessError(Exception):
     pass
@@ -22,7 +53,31 @@ class OutOfBoundsMemoryError(Exception):
 class AssignWrongMemorySizeError(Exception):
     pass
 
+class ProtectedMemoryError(Exception):
+    pass
+
+class MemorySnapshot:
+    """
+    The contents of memory at the time that Memory.snapshot was called
+
+    Pages are copied into the snapshot the first time that they are written to
+    after it was taken, so it only holds the pages which have changed since then.
+    """
+
+    def __init__(self, length: int):
+        """
+        Constructor
+        :param length: the number of bytes in memory when the snapshot was taken
+        """
+        self.length = length
+
+        # page number -> bytes of the page when the snapshot was taken
+        self.pages = {}
+
+
 class Memory:
+    # the bytes of memory are stored in self.memory, which can be sliced directly
+    flat = True
 
     def __validateLocation(self, size: OpSize, location: int):
         """
@@ -33,7 +88,7 @@ class Memory:
             size = OpSize(size)
         if(location % size.get_number_of_bytes() != 0):
             raise UnalignedMemoryAccessError
-        if(location < 0 or (location + size.get_number_of_bytes()) > len(self.memory)):
+        if(location < 0 or (location + size.get_number_of_bytes()) > self.length):
             raise OutOfBoundsMemoryError
 
     def __init__(self):
@@ -42,25 +97,590 @@ class Memory:
         """
 
         # all of the memory that is stored by the device
-        # 16777216 = 2^24
-        # it is the number of bytes easy68K uses.
-        self.memory = bytearray(16777216)
+        self._allocate(MEMORY_SIZE)
+        self._init_state()
+
+    def _init_state(self):
+        """
+        Sets up everything other than the contents of memory
+        """
+        # functions called with (location, length) after memory is written to
+        # used by the simulator to drop decoded instructions that are no longer valid
+        self.write_listeners = []
+
+        # watched ranges of memory as (first location, end location, WatchKind)
+        self.watchpoints = []
+
+        # the WatchKind flags of all of the watchpoints in each page
+        self.watched_pages = bytearray(0)
+
+        # (WatchKind, location, number of bytes) of the first access which hit a watchpoint
+        # since this was last set back to None
+        self.watch_hit = None
+
+        # mapped devices as (first location, end location, Device) in order of location,
+        # and their first locations on their own to search with bisect
+        self.devices = []
+        self.device_starts = []
+
+        # 1 for each page with a device in it
+        self.device_pages = bytearray(0)
+
+        # the counts of the accesses to each part of memory, while enable_heatmap is on
+        self.heatmap = None
+
+        # the simulator history which keeps the values written over by set, so they can be undone
+        self.history = None
+
+        # the snapshots that are still in use, which are sent the pages that are about to be written to
+        self.snapshots = weakref.WeakSet()
+
+        # read only ranges of memory as (first location, end location), see protect
+        self.protected = []
+
+        # 1 for each page with a protected range in it
+        self.protected_pages = bytearray(self.__page_count())
+
+        # 1 for each page which every snapshot already has a copy of (or if there are no snapshots)
+        # and which isn't protected, anything writing to memory with raw_write must call copy_on_write
+        # for pages where this is 0, and checked writes call prepare_write instead
+        self.cow_pages = bytearray(b'\x01') * self.__page_count()
+
+        # page number -> the version of memory that the page was last written to in, for the pages
+        # which have been written to, in the order of those versions, so the pages written to since
+        # a version are found from the end without looking at the rest
+        # clear_dirty starts a new version, so the pages changed since then are the ones at the current version
+        self.page_versions = OrderedDict()
+        self.version = 1
+
+    def _allocate(self, length: int):
+        """
+        Replaces the contents of memory with the given number of zeroed bytes
+        this is what the other backends of memory override, along with raw_read and raw_write,
+        and it must set self.length
+        """
+        self.memory = bytearray(length)
+        self.length = length
+
+    def __len__(self) -> int:
+        """
+        Gets the number of bytes in memory
+        """
+        return self.length
+
+    def raw_read(self, location: int, length: int) -> bytes:
+        """
+        Reads bytes from memory without checking the location or watchpoints,
+        bytes past the end of memory are left off like with a slice
+        :param location: the first byte to read
+        :param length: the number of bytes to read
+        :return:
+        """
+        return self.memory[location:location + length]
+
+    def raw_write(self, location: int, data: bytes):
+        """
+        Writes bytes to memory without checking the location,
+        or telling the snapshots, history or write listeners about it
+        :param location: the first byte to write to
+        :param data: the bytes to write, which must fit in memory
+        :return:
+        """
+        self.memory[location:location + len(data)] = data
+
+    def _read_page(self, page: int) -> bytes:
+        """
+        Gets an unchanging copy of a whole page, for the snapshots
+        """
+        return bytes(self.raw_read(page << PAGE_SHIFT, PAGE_SIZE))
+
+    def _write_page(self, page: int, data: bytes):
+        """
+        Sets a whole page to data from _read_page
+        """
+        self.raw_write(page << PAGE_SHIFT, data)
+
+    def _fork_contents(self, parent):
+        """
+        Sets the contents of this new memory to the same as the parent's
+        """
+        self.memory = bytearray(parent.memory)
+        self.length = parent.length
+
+    def fork(self):
+        """
+        Makes a new memory with the same contents as this one, which can be
+        changed without changing this one
+        PagedMemory shares the pages between both until either writes to them, Memory copies everything.
+        The write listeners, watchpoints, devices, snapshots and history are not part of the new memory
+        :return:
+        """
+        forked = self.__class__.__new__(self.__class__)
+        forked._fork_contents(self)
+        forked._init_state()
+        return forked
+
+    def add_write_listener(self, listener: typing.Callable[[int, int], None]):
+        """
+        Adds a function which is called with the location and number of bytes
+        every time that memory is written to
+        :param listener:
+        :return:
+        """
+        self.write_listeners.append(listener)
+
+    def notify_write(self, location: int, length: int):
+        """
+        Tells all of the write listeners that the given range of memory was written to
+        This must be called by anything that writes to memory with raw_write instead of using set
+        """
+        if length > 0:
+            for page in range(location >> PAGE_SHIFT, ((location + length - 1) >> PAGE_SHIFT) + 1):
+                self.__mark_dirty(page)
+
+        for listener in self.write_listeners:
+            listener(location, length)
+
+    def __mark_dirty(self, page: int):
+        """
+        Records that the page was written to in the current version
+        """
+        if self.page_versions.get(page) != self.version:
+            self.page_versions[page] = self.version
+            self.page_versions.move_to_end(page)
+
+    def __pages_since(self, version: int) -> typing.List[int]:
+        """
+        Gets the numbers of the pages written to in the version or later, in order
+        """
+        pages = []
+        for page, page_version in reversed(self.page_versions.items()):
+            if page_version < version:
+                break
+            pages.append(page)
+        pages.sort()
+        return pages
+
+    def dirty_pages(self) -> typing.List[int]:
+        """
+        Gets the numbers of the pages which have been written to since clear_dirty was last called
+        :return:
+        """
+        return self.__pages_since(self.version)
+
+    def clear_dirty(self) -> int:
+        """
+        Starts tracking the pages which are written to over again
+        :return: a token for diff_since, to get the memory which changed after this call
+        """
+        self.version += 1
+        return self.version
+
+    def diff_since(self, token: int) -> typing.List[typing.Tuple[int, int]]:
+        """
+        Gets the ranges of memory which have changed since clear_dirty returned the token
+        this is tracked a page at a time, so the ranges cover whole pages
+        :param token: the value returned by clear_dirty
+        :return: (first location, number of bytes) of each range, in order
+        """
+        ranges = []
+        end = -1
+        for page in self.__pages_since(token):
+            location = page << PAGE_SHIFT
+            if location == end:
+                ranges[-1][1] += PAGE_SIZE
+            else:
+                ranges.append([location, PAGE_SIZE])
+            end = location + PAGE_SIZE
+
+        # the last page can be cut short by the end of memory
+        if ranges and end > len(self):
+            ranges[-1][1] -= end - len(self)
+        return [(location, length) for location, length in ranges]
+
+    def __page_count(self) -> int:
+        return (len(self) + PAGE_SIZE - 1) >> PAGE_SHIFT
+
+    def snapshot(self) -> MemorySnapshot:
+        """
+        Takes a snapshot of all of memory, which can be given to restore to
+        set memory back to the same contents
+        This doesn't copy anything until the memory is written to
+        :return:
+        """
+        snapshot = MemorySnapshot(len(self))
+        self.snapshots.add(snapshot)
+        self.cow_pages[:] = bytes(len(self.cow_pages))
+        return snapshot
+
+    def restore(self, snapshot: MemorySnapshot):
+        """
+        Sets memory back to the contents it had when the snapshot was taken
+        only the pages which were written to since then are copied
+        :param snapshot:
+        :return:
+        """
+        assert snapshot.length == len(self), 'The snapshot was taken of a different size of memory!'
+
+        for page, data in snapshot.pages.items():
+            if not self.cow_pages[page]:
+                self.copy_on_write(page)
+            self._write_page(page, data)
+            self.notify_write(page << PAGE_SHIFT, len(data))
+
+    def copy_on_write(self, page: int):
+        """
+        Copies the page into every snapshot which doesn't have it yet,
+        this must be called before the page is changed
+        :param page: the page number, the location shifted right by PAGE_SHIFT
+        :return:
+        """
+        data = None
+        for snapshot in self.snapshots:
+            if page not in snapshot.pages:
+                if data is None:
+                    data = self._read_page(page)
+                snapshot.pages[page] = data
+        # protected pages keep the flag off, so that writes to them go through prepare_write
+        self.cow_pages[page] = 0 if self.protected_pages[page] else 1
+
+    def prepare_write(self, location: int, length: int):
+        """
+        Gets the range of memory [location, location + length) ready to be written to by a checked write,
+        which is called for the pages where cow_pages is 0
+        :param location: the first byte being written to
+        :param length: the number of bytes being written
+        :return:
+        """
+        end = location + length
+        for page in range(location >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+            if self.protected_pages[page]:
+                for start, protected_end in self.protected:
+                    if location < protected_end and end > start:
+                        raise ProtectedMemoryError('Write of {} byte(s) to protected memory at {:#08x}'
+                                                   .format(length, location))
+        for page in range(location >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+            if not self.cow_pages[page]:
+                self.copy_on_write(page)
+
+    def __copy_all_pages(self):
+        """
+        Copies every page into the snapshots, before all of memory is replaced
+        """
+        for page in range(len(self.cow_pages)):
+            if not self.cow_pages[page]:
+                self.copy_on_write(page)
+
+    def add_watchpoint(self, location: int, length: int = 1, kind: WatchKind = WatchKind.WRITE):
+        """
+        Watches the range of memory [location, location + length)
+        for the given kind of accesses
+        :param location: the first byte to watch
+        :param length: the number of bytes to watch
+        :param kind: the kind of accesses to watch for
+        :return:
+        """
+        assert length > 0, 'A watchpoint must cover at least one byte!'
+        self.watchpoints.append((location, location + length, WatchKind(kind)))
+        self.__update_watched_pages()
+
+    def remove_watchpoint(self, location: int, length: int = 1):
+        """
+        Removes every watchpoint on the range of memory [location, location + length)
+        :param location: the first byte of the watched range
+        :param length: the number of bytes in the watched range
+        :return:
+        """
+        end = location + length
+        self.watchpoints = [w for w in self.watchpoints if w[0] != location or w[1] != end]
+        self.__update_watched_pages()
+
+    def clear_watchpoints(self):
+        """
+        Removes all of the watchpoints
+        :return:
+        """
+        self.watchpoints = []
+        self.__update_watched_pages()
+
+    def __update_watched_pages(self):
+        """
+        Rebuilds the flags of the watched pages from the list of watchpoints
+        """
+        self.watched_pages = bytearray(self.__page_count())
+        for start, end, kind in self.watchpoints:
+            first_page = max(start, 0) >> PAGE_SHIFT
+            last_page = min((end - 1) >> PAGE_SHIFT, len(self.watched_pages) - 1)
+            for page in range(first_page, last_page + 1):
+                self.watched_pages[page] |= kind
+
+    def __check_watchpoints(self, kind: WatchKind, location: int, length: int):
+        """
+        Records the access in watch_hit if it is to any of the watched ranges
+        this is only called for accesses to a page that is watched for the kind of access
+        """
+        if self.watch_hit is not None:
+            return
+        end = location + length
+        for start, watch_end, watch_kind in self.watchpoints:
+            if watch_kind & kind and location < watch_end and end > start:
+                self.watch_hit = (kind, location, length)
+                return
+
+    def protect(self, location: int, length: int):
+        """
+        Makes the range of memory [location, location + length) read only,
+        so that the checked writes to it (set, write, write_block and instructions) raise ProtectedMemoryError
+        load_memory, clear and restoring snapshots still change it, and so does stepping back.
+        Nothing can write to the code in a protected range, so the simulator doesn't have to
+        check whether it is being changed while it runs.
+        :param location: the first byte to protect
+        :param length: the number of bytes to protect
+        :return:
+        """
+        assert length > 0, 'A protected range must cover at least one byte!'
+        assert location >= 0 and location + length <= len(self), 'A protected range must be inside of memory!'
+        self.protected.append((location, location + length))
+        self.__update_protected_pages()
+
+    def unprotect(self, location: int, length: int):
+        """
+        Removes the protected range [location, location + length), made by protect with the same range
+        :param location: the first byte of the protected range
+        :param length: the number of bytes in the protected range
+        :return:
+        """
+        end = location + length
+        removed = [p for p in self.protected if p == (location, end)]
+        self.protected = [p for p in self.protected if p != (location, end)]
+        self.__update_protected_pages()
+        self.__unprotected(removed)
+
+    def clear_protection(self):
+        """
+        Removes all of the protected ranges
+        :return:
+        """
+        removed = self.protected
+        self.protected = []
+        self.__update_protected_pages()
+        self.__unprotected(removed)
+
+    def is_protected(self, location: int, length: int = 1) -> bool:
+        """
+        Checks if every byte in the range of memory [location, location + length) is protected
+        :param location:
+        :param length:
+        :return:
+        """
+        end = location + length
+        for start, protected_end in sorted(self.protected):
+            if start > location:
+                break
+            location = max(location, protected_end)
+            if location >= end:
+                return True
+        return location >= end
+
+    def __update_protected_pages(self):
+        """
+        Rebuilds the flags of the protected pages from the list of protected ranges
+        """
+        self.protected_pages = bytearray(self.__page_count())
+        for start, end in self.protected:
+            for page in range(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+                self.protected_pages[page] = 1
+                # checked writes to this page have to go through prepare_write now
+                self.cow_pages[page] = 0
+
+    def __unprotected(self, ranges: typing.List[typing.Tuple[int, int]]):
+        """
+        Tells the write listeners about ranges that aren't protected any more,
+        since the simulator may have kept code from them on the condition that it wouldn't change
+        """
+        for start, end in ranges:
+            for listener in self.write_listeners:
+                listener(start, end - start)
+
+    def add_device(self, location: int, length: int, device: Device):
+        """
+        Maps a device into the range of memory [location, location + length),
+        accesses to that range go to the device instead of RAM
+        Translated blocks don't run while there are any devices, since they access RAM directly
+        :param location: the first byte of the device, which must be a multiple of 4
+        :param length: the number of bytes that the device covers, which must be a multiple of 4
+        :param device:
+        :return:
+        """
+        assert length > 0 and location % 4 == 0 and length % 4 == 0, 'A device must cover whole long words!'
+        assert location >= 0 and location + length <= len(self), 'A device must be inside of memory!'
+        assert not self.__find_devices(location, length), 'Devices can not overlap!'
+
+        index = bisect.bisect_left(self.device_starts, location)
+        self.devices.insert(index, (location, location + length, device))
+        self.device_starts.insert(index, location)
+        self.__update_device_pages()
+
+    def remove_device(self, device: Device):
+        """
+        Removes a device from memory, which goes back to accessing RAM
+        :param device:
+        :return:
+        """
+        self.devices = [d for d in self.devices if d[2] is not device]
+        self.device_starts = [d[0] for d in self.devices]
+        self.__update_device_pages()
+
+    def __update_device_pages(self):
+        """
+        Rebuilds the flags of the pages with devices from the list of devices
+        """
+        self.device_pages = bytearray(self.__page_count())
+        for start, end, _ in self.devices:
+            for page in range(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+                self.device_pages[page] = 1
+
+    def __find_device(self, location: int):
+        """
+        Gets the device at the location
+        :return: (first location, end location, Device), or None if there is just RAM there
+        """
+        index = bisect.bisect_right(self.device_starts, location) - 1
+        if index >= 0 and location < self.devices[index][1]:
+            return self.devices[index]
+        return None
+
+    def __find_devices(self, location: int, length: int) -> list:
+        """
+        Gets all of the devices in the range of memory [location, location + length)
+        """
+        end = location + length
+        found = []
+        for index in range(max(bisect.bisect_right(self.device_starts, location) - 1, 0), len(self.devices)):
+            device = self.devices[index]
+            if device[0] >= end:
+                break
+            if device[1] > location:
+                found.append(device)
+        return found
+
+    def enable_heatmap(self, bucket_size: int = PAGE_SIZE) -> Heatmap:
+        """
+        Starts counting the reads and writes to each bucket of memory, starting over from zero
+        This replaces read, write_block and the rest on this memory with ones that count,
+        so memory is no slower while it is off
+        Translated blocks don't run while it is on, since they access memory directly
+        :param bucket_size: the number of bytes counted together, a power of 2 that is at least 4
+        :return: the heatmap with the counts
+        """
+        self.disable_heatmap()
+        heatmap = self.heatmap = Heatmap(len(self), bucket_size)
+        reads, writes, shift, count_block = heatmap.reads, heatmap.writes, heatmap.bucket_shift, heatmap.count_block
+        read, write_bytes, read_block, write_block = self.read, self.__write_bytes, self.read_block, self.write_block
+
+        # get, set, the sized accessors and fill go through these
+        def counted_read(length, location, signed=False):
+            value = read(length, location, signed)
+            reads[location >> shift] += 1
+            return value
+
+        def counted_write_bytes(location, data):
+            write_bytes(location, data)
+            writes[location >> shift] += 1
+
+        def counted_read_block(location, length):
+            view = read_block(location, length)
+            count_block(reads, location, length)
+            return view
+
+        def counted_write_block(location, data):
+            write_block(location, data)
+            count_block(writes, location, len(data))
+
+        self.read = counted_read
+        self.__write_bytes = counted_write_bytes
+        self.read_block = counted_read_block
+        self.write_block = counted_write_block
+        return heatmap
+
+    def disable_heatmap(self):
+        """
+        Stops counting accesses, the last heatmap keeps the counts it had
+        :return:
+        """
+        for name in ['read', '_Memory__write_bytes', 'read_block', 'write_block']:
+            self.__dict__.pop(name, None)
+        self.heatmap = None
 
     def save_memory(self, file : typing.BinaryIO):
         """
         saves the raw memory into the designated file
         NOTE: file must be opened as binary or this won't work
         """
-        file.write(self.memory)
+        if self.flat:
+            # write straight from memory without copying it
+            with memoryview(self.memory) as view:
+                for location in range(0, len(self), SAVE_CHUNK_SIZE):
+                    file.write(view[location:location + SAVE_CHUNK_SIZE])
+            return
+
+        for location in range(0, len(self), SAVE_CHUNK_SIZE):
+            file.write(self.raw_read(location, SAVE_CHUNK_SIZE))
 
     def load_memory(self, file : typing.BinaryIO):
         """
         Loads the raw memory from the designated file
         This includes programs
+        The size of memory doesn't change, memory past the end of a shorter file is set to zeros,
+        and a longer file raises OutOfBoundsMemoryError after the part of it that fits was loaded
         NOTE: file must be opened as binary or this won't work
         """
-        self.memory = bytearray(file.read())
+        self.__copy_all_pages()
+
+        loaded = 0
+        if self.flat:
+            # read straight into memory without copying the data
+            with memoryview(self.memory) as view:
+                while loaded < len(self):
+                    count = file.readinto(view[loaded:])
+                    if not count:
+                        break
+                    loaded += count
+        else:
+            while loaded < len(self):
+                data = file.read(min(SAVE_CHUNK_SIZE, len(self) - loaded))
+                if not data:
+                    break
+                self.raw_write(loaded, data)
+                loaded += len(data)
 
+        for location in range(loaded, len(self), SAVE_CHUNK_SIZE):
+            self.raw_write(location, bytes(min(SAVE_CHUNK_SIZE, len(self) - location)))
+
+        self.notify_write(0, len(self))
+
+        if loaded == len(self) and file.read(1):
+            raise OutOfBoundsMemoryError
+
+    def clear(self):
+        """
+        Sets all of memory to zeros
+        :return:
+        """
+        self.__copy_all_pages()
+        self._allocate(len(self))
+        self.notify_write(0, len(self))
+
+    def nonzero_pages(self) -> typing.Iterator[typing.Tuple[int, bytes]]:
+        """
+        Gets the pages of memory which aren't all zeros, in order
+        the last page is shorter when the length of memory isn't a multiple of the page size
+        :return: (page number, bytes of the page)
+        """
+        for page in range(self.__page_count()):
+            data = self.raw_read(page << PAGE_SHIFT, PAGE_SIZE)
+            if data.count(0) != len(data):
+                yield page, data
 
     def load_list_file(self, list_file: ListFile):
         """
@@ -80,14 +700,8 @@ class Memory:
             # so convert back into an integer to represent the index
             location = int(key)
 
-            # decode the data into a ByteArray
-            # and then set it
-            values = bytearray.fromhex(value)
-
-            for i in range(0, len(values), 1):
-                # set one byte at a time
-                val = MemoryValue(OpSize.BYTE, bytes=values[i:i+1])
-                self.set(OpSize.BYTE, location + i, val)
+            # decode the data and write the whole segment at once
+            self.write_block(location, bytes.fromhex(value))
 
     def get(self, size: OpSize, location: int) -> MemoryValue:
         """
@@ -95,16 +709,7 @@ class Memory:
         """
         if not isinstance(size, OpSize):
             size = OpSize(size)
-        self.__validateLocation(size, location)
-        ret = MemoryValue(size)
-        end = location + size.value
-        b = None
-        try:
-            b = self.memory[location:end]
-        except TypeError:
-            pass
-        ret.set_value_bytes(b)
-        return ret
+        return MemoryValue(size, unsigned_int=self.read(size.value, location))
 
     def set(self, size: OpSize, location: int, value: MemoryValue):
         """
@@ -119,4 +724,468 @@ class Memory:
         self.__validateLocation(size, location)
         if value.get_size() != size:
             raise AssignWrongMemorySizeError
-        self.memory[location:location+size.get_number_of_bytes()] = value.get_value_bytes()
+
+        self.__write_bytes(location, value.get_value_bytes())
+
+    def read(self, length: int, location: int, signed: bool = False) -> int:
+        """
+        Reads an integer from memory, with the same checks as get
+        :param length: the number of bytes to read, 1, 2 or 4
+        :param location: the location to read from, which must be a multiple of length
+        :param signed: should the value be read as a two's complement signed integer
+        :return:
+        """
+        if location % length:
+            raise UnalignedMemoryAccessError
+        if location < 0 or location + length > self.length:
+            raise OutOfBoundsMemoryError
+        if self.watchpoints and self.watched_pages[location >> PAGE_SHIFT] & WatchKind.READ:
+            self.__check_watchpoints(WatchKind.READ, location, length)
+        if self.devices and self.device_pages[location >> PAGE_SHIFT]:
+            device = self.__find_device(location)
+            if device is not None:
+                value = device[2].read(location - device[0], length)
+                if signed and value >> (length * 8 - 1):
+                    value -= 1 << (length * 8)
+                return value
+        return int.from_bytes(self.raw_read(location, length), 'big', signed=signed)
+
+    def write(self, length: int, location: int, value: int, signed: bool = False):
+        """
+        Writes an integer to memory, with the same checks as set
+        :param length: the number of bytes to write, 1, 2 or 4
+        :param location: the location to write to, which must be a multiple of length
+        :param value: the value to write, which must fit in length bytes
+        :param signed: is the value a two's complement signed integer
+        :return:
+        """
+        if location % length:
+            raise UnalignedMemoryAccessError
+        if location < 0 or location + length > self.length:
+            raise OutOfBoundsMemoryError
+        try:
+            data = value.to_bytes(length, 'big', signed=signed)
+        except OverflowError:
+            raise AssignWrongMemorySizeError
+        self.__write_bytes(location, data)
+
+    def __write_bytes(self, location: int, data: bytes):
+        """
+        Writes to a location that was already checked, and tells the history,
+        snapshots, watchpoints and write listeners about it
+        """
+        length = len(data)
+
+        if self.devices and self.device_pages[location >> PAGE_SHIFT]:
+            device = self.__find_device(location)
+            if device is not None:
+                # only RAM is kept in the history and snapshots
+                device[2].write(location - device[0], length, int.from_bytes(data, 'big'))
+                if self.watchpoints and self.watched_pages[location >> PAGE_SHIFT] & WatchKind.WRITE:
+                    self.__check_watchpoints(WatchKind.WRITE, location, length)
+                return
+
+        # accesses are aligned, so they are always inside of a single page
+        if not self.cow_pages[location >> PAGE_SHIFT]:
+            self.prepare_write(location, length)
+
+        if self.history is not None:
+            self.history.record_memory(location, length,
+                                       int.from_bytes(self.raw_read(location, length), 'big'))
+
+        self.raw_write(location, data)
+        self.__mark_dirty(location >> PAGE_SHIFT)
+
+        if self.watchpoints and self.watched_pages[location >> PAGE_SHIFT] & WatchKind.WRITE:
+            self.__check_watchpoints(WatchKind.WRITE, location, length)
+
+        for listener in self.write_listeners:
+            listener(location, length)
+
+    def read_u8(self, location: int) -> int:
+        """
+        Reads an unsigned byte
+        """
+        return self.read(1, location)
+
+    def read_u16(self, location: int) -> int:
+        """
+        Reads an unsigned word
+        """
+        return self.read(2, location)
+
+    def read_u32(self, location: int) -> int:
+        """
+        Reads an unsigned long word
+        """
+        return self.read(4, location)
+
+    def read_s8(self, location: int) -> int:
+        """
+        Reads a signed byte
+        """
+        return self.read(1, location, True)
+
+    def read_s16(self, location: int) -> int:
+        """
+        Reads a signed word
+        """
+        return self.read(2, location, True)
+
+    def read_s32(self, location: int) -> int:
+        """
+        Reads a signed long word
+        """
+        return self.read(4, location, True)
+
+    def write_u8(self, location: int, value: int):
+        """
+        Writes an unsigned byte
+        """
+        self.write(1, location, value)
+
+    def write_u16(self, location: int, value: int):
+        """
+        Writes an unsigned word
+        """
+        self.write(2, location, value)
+
+    def write_u32(self, location: int, value: int):
+        """
+        Writes an unsigned long word
+        """
+        self.write(4, location, value)
+
+    def write_s8(self, location: int, value: int):
+        """
+        Writes a signed byte
+        """
+        self.write(1, location, value, True)
+
+    def write_s16(self, location: int, value: int):
+        """
+        Writes a signed word
+        """
+        self.write(2, location, value, True)
+
+    def write_s32(self, location: int, value: int):
+        """
+        Writes a signed long word
+        """
+        self.write(4, location, value, True)
+
+    def read_block(self, location: int, length: int) -> memoryview:
+        """
+        Reads a block of bytes from memory with a single bounds check
+        The returned view doesn't copy the bytes where they are stored together, so it is only valid
+        until memory is next written to, and callers must not write through it
+        :param location: the first byte to read, which doesn't have to be aligned
+        :param length: the number of bytes to read
+        :return:
+        """
+        if location < 0 or length < 0 or location + length > self.length:
+            raise OutOfBoundsMemoryError
+        if not length:
+            return memoryview(b'')
+        if self.watchpoints:
+            self.__check_watchpoints(WatchKind.READ, location, length)
+
+        if self.devices:
+            devices = self.__find_devices(location, length)
+            if devices:
+                # the bytes in devices are read from them one at a time
+                data = bytearray(self.raw_read(location, length))
+                for start, end, device in devices:
+                    for address in range(max(start, location), min(end, location + length)):
+                        data[address - location] = device.read(address - start, 1)
+                return memoryview(bytes(data))
+
+        return self._view(location, length)
+
+    def _view(self, location: int, length: int) -> memoryview:
+        """
+        Gets a view of a range of memory that was already checked, which must not be written through
+        """
+        return memoryview(self.memory)[location:location + length]
+
+    def write_block(self, location: int, data: bytes):
+        """
+        Writes a block of bytes to memory with a single bounds check,
+        and tells the history, snapshots, watchpoints and write listeners about it like set
+        :param location: the first byte to write to, which doesn't have to be aligned
+        :param data: the bytes to write
+        :return:
+        """
+        length = len(data)
+        if location < 0 or location + length > self.length:
+            raise OutOfBoundsMemoryError
+        if not length:
+            return
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+
+        self.prepare_write(location, length)
+
+        if self.history is not None:
+            # the history keeps at most a long word for each write
+            before = self.raw_read(location, length)
+            for offset in range(0, length, 4):
+                self.history.record_memory(location + offset, min(4, length - offset),
+                                           int.from_bytes(before[offset:offset + 4], 'big'))
+
+        self.raw_write(location, data)
+
+        if self.watchpoints:
+            self.__check_watchpoints(WatchKind.WRITE, location, length)
+
+        self.notify_write(location, length)
+
+        if self.devices:
+            # the bytes in devices are written to them one at a time,
+            # the RAM underneath them is hidden so it doesn't matter that it was written to as well
+            for start, end, device in self.__find_devices(location, length):
+                for address in range(max(start, location), min(end, location + length)):
+                    device.write(address - start, 1, data[address - location])
+
+    def fill(self, location: int, length: int, value: int = 0):
+        """
+        Sets a block of memory to the same byte, with a single bounds check
+        :param location: the first byte to set, which doesn't have to be aligned
+        :param length: the number of bytes to set
+        :param value: the unsigned value of the byte
+        :return:
+        """
+        if length < 0:
+            raise OutOfBoundsMemoryError
+        if not 0 <= value <= 0xFF:
+            raise AssignWrongMemorySizeError
+        self.write_block(location, bytes((value,)) * length if value else bytes(length))
+
+
+class PagedMemory(Memory):
+    """
+    Memory which only allocates the pages of PAGE_SIZE bytes that have been written to,
+    reads from any other page give zeros
+
+    This keeps a simulator running a small program down to a few pages of memory,
+    instead of the full 16 MB that Memory allocates
+
+    Pages can be shared with other memories, like ones made with fork or with the same
+    list file loaded, in which case they are held as bytes and copied to a bytearray
+    the first time that they are written to
+    """
+    flat = False
+
+    def _allocate(self, length: int):
+        # page number -> bytearray of the page, bytes of a page shared with other memories,
+        # or None if it is all zeros
+        self.pages = [None] * ((length + PAGE_SIZE - 1) >> PAGE_SHIFT)
+        self.length = length
+
+        # numbers of the pages held as bytearrays, which only this memory uses
+        self.private_pages = set()
+
+    def _read_page(self, page: int) -> bytes:
+        data = self.pages[page]
+        if data is None:
+            return ZERO_PAGE
+        if data.__class__ is bytes:
+            return data
+        # from now on the page is shared with the snapshot
+        data = self.pages[page] = bytes(data)
+        self.private_pages.discard(page)
+        return data
+
+    def _write_page(self, page: int, data: bytes):
+        self.pages[page] = None if data is ZERO_PAGE else data
+        self.private_pages.discard(page)
+
+    def _fork_contents(self, parent):
+        # the pages become shared, so neither memory can change them in place any more
+        pages = parent.pages
+        for page in parent.private_pages:
+            pages[page] = bytes(pages[page])
+        parent.private_pages = set()
+
+        self.pages = list(pages)
+        self.length = parent.length
+        self.private_pages = set()
+
+    def load_list_file(self, list_file: ListFile):
+        """
+        Loads the contents of a list file into memory, the same as Memory.load_list_file
+        The pages of the list file are shared by every memory that it is loaded into,
+        where those pages were all zeros before
+        :param list_file:
+        :return:
+        """
+        image = _get_program_image(list_file, len(self))
+        if image is None or any(self.pages[page] is not None for page in image):
+            super().load_list_file(list_file)
+            return
+
+        for page, data in image.items():
+            if not self.cow_pages[page]:
+                self.copy_on_write(page)
+            self.pages[page] = data
+            self.private_pages.discard(page)
+            self.notify_write(page << PAGE_SHIFT, PAGE_SIZE)
+
+    def _view(self, location: int, length: int) -> memoryview:
+        offset = location & (PAGE_SIZE - 1)
+        if offset + length <= PAGE_SIZE:
+            # the whole block is in a single page, which can be viewed without copying it
+            page = self.pages[location >> PAGE_SHIFT]
+            return memoryview(ZERO_PAGE if page is None else page)[offset:offset + length]
+        return memoryview(self.raw_read(location, length))
+
+    def raw_read(self, location: int, length: int) -> bytes:
+        end = min(location + length, self.length)
+        offset = location & (PAGE_SIZE - 1)
+
+        if offset + length <= PAGE_SIZE:
+            # the whole read is in a single page
+            page = self.pages[location >> PAGE_SHIFT]
+            if page is None:
+                return bytes(max(end - location, 0))
+            return page[offset:offset + end - location]
+
+        data = bytearray()
+        while location < end:
+            offset = location & (PAGE_SIZE - 1)
+            count = min(PAGE_SIZE - offset, end - location)
+            page = self.pages[location >> PAGE_SHIFT]
+            data += bytes(count) if page is None else page[offset:offset + count]
+            location += count
+        return data
+
+    def raw_write(self, location: int, data: bytes):
+        end = location + len(data)
+        start = 0
+        while location < end:
+            offset = location & (PAGE_SIZE - 1)
+            count = min(PAGE_SIZE - offset, end - location)
+            number = location >> PAGE_SHIFT
+            page = self.pages[number]
+            if page is None:
+                chunk = data[start:start + count]
+                if chunk.count(0) == count:
+                    # writing zeros to a page that isn't allocated doesn't change it
+                    location += count
+                    start += count
+                    continue
+                page = self.pages[number] = bytearray(PAGE_SIZE)
+                self.private_pages.add(number)
+            elif page.__class__ is bytes:
+                # copy the shared page before it is changed
+                page = self.pages[number] = bytearray(page)
+                self.private_pages.add(number)
+            page[offset:offset + count] = data[start:start + count]
+            location += count
+            start += count
+
+    def nonzero_pages(self) -> typing.Iterator[typing.Tuple[int, bytes]]:
+        # pages which were never written to are zeros, and don't have to be checked
+        for page, data in enumerate(self.pages):
+            if data is not None and data.count(0) != len(data):
+                yield page, data
+
+    def allocated_pages(self) -> int:
+        """
+        Gets the number of pages that have been allocated
+        :return:
+        """
+        return len(self.pages) - self.pages.count(None)
+
+
+class MappedMemory(Memory):
+    """
+    Memory backed by an mmap of an image file, like the ones written by save_memory
+
+    Opening an image doesn't read it, the pages are read in by the OS as they are used,
+    and writes go to the image without calling save_memory (flush makes sure that they are on disk).
+    An image that is smaller than memory is extended with zeros.
+    """
+
+    def __init__(self, path: str, length: int = MEMORY_SIZE):
+        """
+        Constructor
+        :param path: the image file, which is made if it doesn't exist
+        :param length: the number of bytes in memory
+        """
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            size = os.fstat(fd).st_size
+            if size > length:
+                raise OutOfBoundsMemoryError
+            if size < length:
+                os.ftruncate(fd, length)
+            self.memory = mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+
+        self.path = path
+        self.length = length
+        self._init_state()
+
+    def _allocate(self, length: int):
+        # memory stays mapped to the same image, which is zeroed
+        assert length == self.length, 'The size of a mapped image can not be changed!'
+        for location in range(0, length, SAVE_CHUNK_SIZE):
+            count = min(SAVE_CHUNK_SIZE, length - location)
+            self.memory[location:location + count] = bytes(count)
+
+    def fork(self):
+        """
+        Makes a Memory with a copy of the contents, the image file is only used by this one
+        :return:
+        """
+        forked = Memory.__new__(Memory)
+        forked._fork_contents(self)
+        forked._init_state()
+        return forked
+
+    def flush(self):
+        """
+        Makes sure that everything written to memory has been written to the image file
+        :return:
+        """
+        self.memory.flush()
+
+    def close(self):
+        """
+        Flushes and unmaps the image file, memory can't be used after this
+        :return:
+        """
+        self.memory.flush()
+        self.memory.close()
+
+
+def _get_program_image(list_file: ListFile, length: int) -> dict:
+    """
+    Gets the pages of memory holding the data of a list file, which is built
+    the first time and then reused for every list file with the same data
+    :param list_file:
+    :param length: the number of bytes in the memory it is being loaded into
+    :return: page number -> bytes of the page, or None if the data doesn't fit in memory
+    """
+    key = (length, tuple(sorted(list_file.data.items())))
+    image = _program_images.get(key)
+    if image is not None:
+        _program_images.move_to_end(key)
+        return image
+
+    memory = PagedMemory.__new__(PagedMemory)
+    memory._allocate(length)
+    for location, value in list_file.data.items():
+        location = int(location)
+        values = bytes.fromhex(value)
+        if location < 0 or location + len(values) > length:
+            return None
+        memory.raw_write(location, values)
+
+    image = {page: bytes(data) for page, data in enumerate(memory.pages) if data is not None}
+    _program_images[key] = image
+    if len(_program_images) > MAX_PROGRAM_IMAGES:
+        _program_images.popitem(last=False)
+    return image
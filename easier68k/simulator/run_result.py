@@ -0,0 +1,30 @@
+"""
+Run Result
+
+The outcome of running a batch of instructions with M68K.run_for
+"""
+
+from ..core.enum.stop_reason import StopReason
+
+
+class RunResult:
+    """
+    Why the simulator stopped running, and how much it ran before that
+    """
+
+    def __init__(self, reason: StopReason, instructions: int, cycles: int, fault: Exception = None):
+        """
+        Constructor
+        :param reason: why the simulator stopped
+        :param instructions: the number of instructions that were run
+        :param cycles: the number of clock cycles that were run
+        :param fault: the error that stopped the simulator, if the reason is StopReason.FAULT
+        """
+        self.reason = reason
+        self.instructions = instructions
+        self.cycles = cycles
+        self.fault = fault
+
+    def __str__(self):
+        return 'Run result: {}, instructions {}, cycles {}, fault {}'.format(
+            self.reason, self.instructions, self.cycles, self.fault)
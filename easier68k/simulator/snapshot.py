@@ -0,0 +1,37 @@
+"""
+Snapshot
+
+The full state of the simulator at one point in time, taken with M68K.snapshot
+and given back to M68K.restore to continue from that point again
+"""
+
+from .memory import MemorySnapshot
+
+
+class Snapshot:
+    """
+    Copies of the registers, condition codes, halted flag and cycle count
+    along with the copy-on-write snapshot of memory
+    """
+
+    def __init__(self, registers: list, register_sizes: list, ccr_pending, ccr_pending_extend,
+                 halted: bool, clock_auto_cycle: bool, clock_cycles: int, memory: MemorySnapshot):
+        """
+        Constructor
+        :param registers: copy of M68K.registers
+        :param register_sizes: copy of M68K.register_sizes
+        :param ccr_pending: the condition codes deferred by lazy_flags
+        :param ccr_pending_extend: the deferred condition codes that the X bit comes from
+        :param halted: was the simulator halted
+        :param clock_auto_cycle: was the clock automatically cycling
+        :param clock_cycles: the number of clock cycles run
+        :param memory: the snapshot of memory
+        """
+        self.registers = registers
+        self.register_sizes = register_sizes
+        self.ccr_pending = ccr_pending
+        self.ccr_pending_extend = ccr_pending_extend
+        self.halted = halted
+        self.clock_auto_cycle = clock_auto_cycle
+        self.clock_cycles = clock_cycles
+        self.memory = memory
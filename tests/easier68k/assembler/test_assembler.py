@@ -1,7 +1,7 @@
 import pytest
 import json
 from easier68k.core.models.list_file import ListFile
-from easier68k.assembler.assembler import parse
+from easier68k.assembler.assembler import parse, size_changed_issue
 import os.path
 
 
@@ -31,3 +31,103 @@ def test_basic_test_input():
         assert assembled.data['1042'] == 'ffffffff'
         assert assembled.data['1046'] == 'abcd'
         assert not issues
+
+
+def test_forward_references():
+    # the label and equate are used before they are defined
+    assembled, issues = parse("""start       ORG $400
+            LEA magic, A0
+            MOVE #later, D0
+            SIMHALT
+magic       DC.B $AB, $CD
+later       EQU $1234
+            END start
+""")
+    assert not issues
+    assert assembled.data['1024'] == '41f90000040e'
+    assert assembled.data['1030'] == '303c1234'
+    assert assembled.data['1038'] == 'abcd'
+    assert assembled.symbols['magic'] == 1038
+
+    assembled, issues = parse("""start       ORG $400
+            LEA nowhere, A0
+            SIMHALT
+            END start
+""")
+    assert ('Symbol nowhere is not defined', 'ERROR') in issues
+    assert '1024' not in assembled.data
+    assert assembled.data['1030'] == 'ffffffff'
+
+
+def test_forward_reference_size_change(monkeypatch):
+    from easier68k.core.opcodes.lea import Lea
+
+    # pretend that LEA is shorter once its label is known, like the offset of a branch can be
+    get_word_length_ir = Lea.get_word_length_ir
+    monkeypatch.setattr(Lea, 'get_word_length_ir', classmethod(
+        lambda cls, line: get_word_length_ir(line) - ('$00000000' not in line.contents)))
+
+    assembled, issues = parse("""start       ORG $400
+            LEA later, A0
+later       SIMHALT
+            END start
+""")
+    assert issues == [(size_changed_issue(0x400), 'ERROR')]
+
+
+def test_label_prefixes():
+    # LOOP is the start of LOOP2, which must not be replaced inside of it
+    assembled, issues = parse("""start       ORG $400
+LOOP        LEA LOOP2, A0
+LOOP2       LEA LOOP, A1
+            MOVE.L #COUNT2, D0
+            SIMHALT
+COUNT       EQU 1
+COUNT2      EQU COUNT
+            END start
+""")
+    assert not issues
+    assert assembled.data['1024'] == '41f900000406'
+    assert assembled.data['1030'] == '43f900000400'
+    assert assembled.data['1036'] == '203c00000001'
+
+
+def test_registered_opcodes():
+    from easier68k.simulator.m68k import M68K
+    from easier68k.core.enum.register import Register
+
+    # every opcode in here used to be missing from the assembler and the simulator's decoder
+    assembled, issues = parse("""start       ORG $400
+            MOVEA.L #$1000, A7
+            MOVEA.L #$2000, A1
+            ADDA.L A1, A1
+            MOVE.L #10, D0
+            MOVE.L #3, D4
+            SUB.L D4, D0
+            SUBQ.L #2, D0
+            NEG.L D0
+            MOVE.L #$F0, D1
+            ORI.L #$0F, D1
+            EOR.L D1, D2
+            CMP.L D1, D2
+            CMPI.L #$FF, D2
+            JSR sub
+            SIMHALT
+sub         MOVE.L #7, D3
+            RTS
+            END start
+""")
+    assert not issues
+    assert assembled.data['1050'] == '9084'
+    assert assembled.data['1054'] == '4480'
+
+    sim = M68K()
+    sim.load_list_file(assembled)
+    sim.run()
+
+    assert sim.halted
+    assert sim.get_register_value(Register.D0) == 0xFFFFFFFB
+    assert sim.get_register_value(Register.D2) == 0xFF
+    assert sim.get_register_value(Register.D3) == 7
+    assert sim.get_register_value(Register.A1) == 0x4000
+    assert sim.get_register_value(Register.A7) == 0x1000
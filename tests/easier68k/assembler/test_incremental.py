@@ -0,0 +1,105 @@
+from easier68k.assembler.assembler import parse, size_changed_issue
+from easier68k.assembler.incremental import IncrementalAssembler
+
+
+PROGRAM = [
+    'size        EQU 4',
+    'start       ORG $400',
+    '            LEA later, A0',
+    '            MOVE.W #size, D0',
+    'loop        MOVE.L D0, D1',
+    '            LEA loop, A1',
+    '            JSR done',
+    'later       MOVE.W D1, D2',
+    'done        RTS',
+    '            END start',
+]
+
+
+def assert_equal_to_parse(session: IncrementalAssembler, lines: list):
+    text = '\n'.join(lines)
+    assembled, issues = session.assemble(text)
+    expected, expected_issues = parse(text)
+
+    assert assembled.data == expected.data
+    assert assembled.code == expected.code
+    assert assembled.symbols == expected.symbols
+    assert assembled.starting_execution_address == expected.starting_execution_address
+    assert issues == expected_issues
+
+
+def test_incremental_edits():
+    session = IncrementalAssembler()
+    lines = list(PROGRAM)
+    assert_equal_to_parse(session, lines)
+    assert session.assembled_lines > len(lines) // 2
+
+    # the same size, so only the edited line is assembled
+    lines[4] = 'loop        MOVE.L D0, D3'
+    assert_equal_to_parse(session, lines)
+    assert session.assembled_lines == 1
+
+    # a longer line moves the labels after it, so the lines which use them are assembled again
+    lines[3] = '            MOVE.L #size, D0'
+    assert_equal_to_parse(session, lines)
+    assert session.assembled_lines == 4
+
+    # the equate is used by a line which is otherwise the same
+    lines[0] = 'size        EQU 5'
+    assert_equal_to_parse(session, lines)
+    assert session.assembled_lines == 1
+
+    # issues come out in the same order as parse
+    lines.insert(5, '            LEA missing, A2')
+    lines.insert(6, 'loop        FOO D0')
+    assert_equal_to_parse(session, lines)
+    lines[5] = '            LEA other, A2'
+    assert_equal_to_parse(session, lines)
+
+    # back to the start
+    assert_equal_to_parse(session, PROGRAM)
+
+
+def test_incremental_overlap():
+    # the second ORG puts data in the same place as the first lines
+    session = IncrementalAssembler()
+    lines = [
+        '            ORG $400',
+        '            LEA later, A0',
+        '            MOVE.W D0, D1',
+        '            ORG $400',
+        '            MOVE.L D0, D1',
+        'later       RTS',
+    ]
+    assert_equal_to_parse(session, lines)
+
+    lines[2] = '            MOVE.W D0, D2'
+    assert_equal_to_parse(session, lines)
+
+    lines[1] = '            LEA missing, A0'
+    assert_equal_to_parse(session, lines)
+
+
+def test_incremental_size_change(monkeypatch):
+    from easier68k.core.opcodes.lea import Lea
+
+    # pretend that LEA is shorter once its label is known, like the offset of a branch can be
+    get_word_length_ir = Lea.get_word_length_ir
+    monkeypatch.setattr(Lea, 'get_word_length_ir', classmethod(
+        lambda cls, line: get_word_length_ir(line) - ('$00000000' not in line.contents)))
+
+    session = IncrementalAssembler()
+    lines = [
+        '            ORG $400',
+        '            LEA later, A0',
+        'earlier     MOVE.W D0, D1',
+        'later       LEA earlier, A1',
+    ]
+    assert_equal_to_parse(session, lines)
+    assert (size_changed_issue(0x400), 'ERROR') in session.assemble('\n'.join(lines))[1]
+
+    # patched in place
+    lines[2] = 'earlier     MOVE.W D0, D2'
+    assert_equal_to_parse(session, lines)
+    lines[1] = '            LEA earlier, A0'
+    assert_equal_to_parse(session, lines)
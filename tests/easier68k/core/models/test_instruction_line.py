@@ -0,0 +1,47 @@
+"""
+Tests for the instruction line
+"""
+
+import pytest
+
+from easier68k.core.models.instruction_line import InstructionLine
+from easier68k.core.enum.ea_mode import EAMode
+from easier68k.core.enum.op_size import OpSize
+from easier68k.core.opcodes.move import Move
+
+
+def test_instruction_line():
+    """
+    Tests that a line is split once and its operands are only parsed once
+    :return:
+    """
+    line = InstructionLine('MOVE.L', '#$10, D3', 0x1000)
+
+    assert line.mnemonic == 'MOVE'
+    assert line.size == OpSize.LONG
+    assert line.operands == ['#$10', 'D3']
+
+    src = line.get_param(0)
+    assert src.mode == EAMode.IMM
+    assert src.data == 0x10
+    assert line.get_param(0) is src
+    assert line.get_param(1).mode == EAMode.DRD
+
+    # the opcode classes give the same results from the line as from the text
+    assert Move.is_valid_ir(line) == Move.is_valid('MOVE.L', '#$10, D3')
+    assert Move.get_word_length_ir(line) == Move.get_word_length('MOVE.L', '#$10, D3')
+    assert Move.from_ir(line).assemble() == Move.from_str('MOVE.L', '#$10, D3').assemble()
+
+
+def test_instruction_line_invalid_param():
+    """
+    Tests that an operand which can't be parsed raises its error every time it is asked for
+    :return:
+    """
+    line = InstructionLine('MOVE.W', 'D9, D0')
+
+    for _ in range(2):
+        with pytest.raises(AssertionError):
+            line.get_param(0)
+
+    assert Move.is_valid_ir(line)[0] is False
@@ -0,0 +1,52 @@
+from easier68k.core.util.find_module import valid_opcodes, find_opcode_cls, get_opcode_decode_table
+
+
+def _first_match(classes, data: bytearray):
+    """
+    Disassembles data using the first of the given opcode classes that matches
+    """
+    for cls in classes:
+        try:
+            op = cls.disassemble_instruction(data)
+        except (ValueError, AssertionError):
+            # some opcodes fail loudly on words with invalid sizes or modes
+            continue
+        # branches return 0 when they don't match
+        if op:
+            return op
+    return None
+
+
+def test_decode_table_matches_linear_search():
+    """
+    Every first word should pick the same opcode class from the decode table
+    as it would when searching through all of the opcodes
+    """
+    table = get_opcode_decode_table()
+    all_classes = [find_opcode_cls(op_str) for op_str in valid_opcodes]
+
+    for first_word in range(0, 0x10000, 7):
+        data = bytearray(first_word.to_bytes(2, 'big')) + bytearray.fromhex('ffff00000000ffff')
+
+        expected = _first_match(all_classes, data)
+        actual = _first_match(table[first_word], data)
+
+        assert type(actual) == type(expected), hex(first_word)
+
+
+def test_decode_table_is_cached():
+    assert get_opcode_decode_table() is get_opcode_decode_table()
+
+
+def test_opcode_registry():
+    from easier68k.core.opcodes.opcode import opcode_classes
+
+    for mnemonic in ['SUB', 'SUBQ', 'CMP', 'CMPI', 'NEG', 'EOR', 'MOVEA', 'ADDA', 'ORI', 'JSR', 'RTS']:
+        assert mnemonic in valid_opcodes
+        assert find_opcode_cls(mnemonic + '.L') is opcode_classes[mnemonic]
+        assert opcode_classes[mnemonic].mnemonic == mnemonic
+
+    # base classes aren't opcodes
+    assert 'branch_code' not in [cls.__name__ for cls in opcode_classes.values()]
+    assert find_opcode_cls('NOPE') is None
+    assert find_opcode_cls('TRAP.L') is None
@@ -0,0 +1,126 @@
+import pytest
+
+from easier68k.simulator.m68k import M68K
+from easier68k.simulator.memory import MappedMemory, UnalignedMemoryAccessError
+from easier68k.assembler.assembler import parse
+from easier68k.core.enum.register import Register
+
+
+def _run(text: str, translate_blocks: bool, paged_memory: bool = False, memory=None) -> M68K:
+    list_file, issues = parse(text)
+    assert not issues
+
+    m68k = M68K(translate_blocks=translate_blocks, paged_memory=paged_memory, memory=memory)
+    m68k.load_list_file(list_file)
+    m68k.run()
+    return m68k
+
+
+def _assert_same_state(a: M68K, b: M68K):
+    for register in Register:
+        assert a.get_register(register) == b.get_register(register), register.name
+    assert a.get_register(Register.CCR).get_value_unsigned() == b.get_register(Register.CCR).get_value_unsigned()
+    assert a.get_program_counter_value() == b.get_program_counter_value()
+    assert a.halted == b.halted
+    assert a.get_cycles() == b.get_cycles()
+    assert a.memory.raw_read(0, len(a.memory)) == b.memory.raw_read(0, len(b.memory))
+
+
+def test_translated_matches_interpreted(tmpdir):
+    text = """START ORG $1000
+    MOVE.L #$00345678,D0
+    MOVE.W #$7FFF,D1
+    ADD.W D1,D1
+    LEA ($2000).L,A0
+    MOVE.L D0,(A0)
+    ADD.L (A0),D0
+    OR.W D1,D3
+    MOVE.W D1,($3000).L
+    MOVE.B #$7F,D4
+    ADD.L D4,D5
+    ADD.L #$FFFFFFFF,D5
+    SIMHALT
+    END START
+"""
+    interpreted = _run(text, False)
+    translated = _run(text, True)
+
+    _assert_same_state(interpreted, translated)
+    assert translated.block_cache.get(0x1000)
+
+    # blocks access paged memory through raw_read and raw_write
+    _assert_same_state(interpreted, _run(text, True, paged_memory=True))
+
+    # and slice an mmap of an image file the same as a bytearray
+    mapped = MappedMemory(tmpdir.join('image.raw').strpath)
+    _assert_same_state(interpreted, _run(text, True, memory=mapped))
+    mapped.close()
+
+
+def test_translated_self_modifying():
+    """
+    A block which writes over one of its own instructions
+    has to stop and run the new instruction instead
+    """
+    text = """START ORG $1000
+    LEA ($100C).L,A0
+    MOVE.W #$7001,(A0)
+    MOVE.L #$00000002,D0
+    SIMHALT
+    END START
+"""
+    interpreted = _run(text, False)
+    translated = _run(text, True)
+
+    _assert_same_state(interpreted, translated)
+
+
+def test_translated_protected():
+    """
+    Blocks of protected instructions don't check if they were written to,
+    and are dropped when the instructions are unprotected
+    """
+    list_file, _ = parse("""START ORG $1000
+    MOVE.L #$00000002,D0
+    MOVE.W D0,($2000).L
+    MOVE.L #$00000004,D1
+    SIMHALT
+    END START
+""")
+    m68k = M68K(translate_blocks=True)
+    m68k.load_list_file(list_file)
+    m68k.run()
+    assert 'block_end' in m68k.block_cache.get(0x1000).source
+
+    m68k = M68K(translate_blocks=True)
+    m68k.load_list_file(list_file, protect_code=True)
+    m68k.run()
+    block = m68k.block_cache.get(0x1000)
+    assert 'block_end' not in block.source
+    assert m68k.memory.read_u32(0x2000) == 2
+
+    m68k.memory.clear_protection()
+    assert m68k.block_cache.get(0x1000) is None
+
+
+def test_translated_error():
+    """
+    Errors are raised with the registers and memory in the same state as the interpreter
+    """
+    text = """START ORG $1000
+    MOVE.L #$00000003,D0
+    LEA ($2001).L,A0
+    MOVE.L D0,(A0)
+    SIMHALT
+    END START
+"""
+    states = []
+    for translate_blocks in [False, True]:
+        list_file, _ = parse(text)
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+        with pytest.raises(UnalignedMemoryAccessError):
+            m68k.run()
+        states.append(m68k)
+
+    _assert_same_state(*states)
@@ -0,0 +1,124 @@
+import pytest
+
+from easier68k.simulator.m68k import M68K
+from easier68k.simulator.memory import Memory, PagedMemory
+from easier68k.simulator.device import Device, Timer, Uart
+from easier68k.core.enum.register import Register
+from easier68k.core.enum.op_size import OpSize
+from easier68k.core.models.memory_value import MemoryValue
+
+
+def test_timer():
+    cycles = [100]
+    timer = Timer(lambda: cycles[0], period=4)
+
+    assert timer.read(Timer.COUNT, 4) == 0
+    cycles[0] += 10
+    assert timer.read(Timer.COUNT, 4) == 2
+    assert timer.read(Timer.PERIOD, 4) == 4
+
+    # writing to the count sets it from now on
+    timer.write(Timer.COUNT, 4, 0xFFFFFFFF)
+    cycles[0] += 4
+    assert timer.read(Timer.COUNT, 4) == 0
+    timer.write(Timer.COUNT + 2, 2, 0x1234)
+    assert timer.read(Timer.COUNT, 4) == 0x1234
+    assert timer.read(Timer.COUNT + 3, 1) == 0x34
+
+    # changing the period keeps the count
+    timer.write(Timer.PERIOD, 4, 1)
+    assert timer.read(Timer.COUNT, 4) == 0x1234
+    cycles[0] += 3
+    assert timer.read(Timer.COUNT, 4) == 0x1237
+
+
+def test_uart():
+    uart = Uart()
+    assert uart.read(Uart.STATUS, 1) == Uart.SEND_READY
+    assert uart.read(Uart.DATA, 1) == 0
+
+    uart.receive(b'ab')
+    assert uart.read(Uart.STATUS, 1) == Uart.SEND_READY | Uart.RECEIVE_READY
+    assert uart.read(Uart.DATA, 2) == (ord('a') << 8) | Uart.SEND_READY | Uart.RECEIVE_READY
+    assert uart.read(Uart.DATA, 1) == ord('b')
+    assert uart.read(Uart.STATUS, 1) == Uart.SEND_READY
+
+    uart.write(Uart.DATA, 1, ord('x'))
+    uart.write(Uart.DATA, 2, 0x7900)
+    assert uart.output == b'xy'
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_devices(memory_class):
+    memory = memory_class()
+    uart = Uart()
+    memory.add_device(0xF00000, Uart.LENGTH, uart)
+    memory.add_device(0xF00010, 16, Uart())
+
+    # overlapping devices aren't allowed
+    with pytest.raises(AssertionError):
+        memory.add_device(0xF00000, 4, Uart())
+
+    # accesses to the range go to the device
+    memory.write_u8(0xF00000, ord('h'))
+    memory.set(OpSize.BYTE, 0xF00000, MemoryValue(OpSize.BYTE, unsigned_int=ord('i')))
+    # the last byte goes to the status register, which ignores writes
+    memory.write_block(0xEFFFFF, b'!!?')
+    assert uart.output == b'hi!'
+    assert memory.read_u8(0xEFFFFF) == ord('!')
+    assert memory.read_u8(0xF00000 + Uart.STATUS) == Uart.SEND_READY
+
+    uart.receive(b'\xFF\x01')
+    assert memory.read_s8(0xF00000) == -1
+    assert memory.read_block(0xEFFFFF, 2) == b'!\x01'
+
+    # RAM around the device isn't changed
+    memory.write_u32(0xF00004, 5)
+    assert memory.read_u32(0xF00004) == 5
+
+    memory.remove_device(uart)
+    memory.write_u8(0xF00000, 1)
+    assert memory.read_u8(0xF00000) == 1
+    assert uart.output == b'hi!'
+
+
+def test_program_devices():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    LEA ($F00000).L,A0
+    LEA ($F00010).L,A1
+    MOVE.B #$48,(A0)
+    MOVE.B #$69,(A0)
+    MOVE.B (A0),D1
+    MOVE.L (A1),D2
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks)
+        uart = Uart()
+        uart.receive(b'\x2A')
+        timer = Timer(m68k.get_cycles)
+        m68k.memory.add_device(0xF00000, Uart.LENGTH, uart)
+        m68k.memory.add_device(0xF00010, Timer.LENGTH, timer)
+
+        m68k.load_list_file(list_file)
+        m68k.run()
+
+        assert m68k.halted
+        assert uart.output == b'Hi'
+        assert m68k.get_register_value(Register.D1) == 0x2A
+        # the timer counted the cycles up to the instruction which read it
+        assert 0 < m68k.get_register_value(Register.D2) < m68k.get_cycles()
+
+
+def test_device_must_implement_read_and_write():
+    class ReadOnly(Device):
+        def read(self, offset: int, length: int) -> int:
+            return 0
+
+    with pytest.raises(TypeError):
+        ReadOnly()
@@ -0,0 +1,84 @@
+import io
+import pytest
+
+from easier68k.simulator.m68k import M68K
+from easier68k.simulator.memory import Memory, PagedMemory, PAGE_SIZE
+from easier68k.simulator.heatmap import Heatmap
+from easier68k.core.enum.op_size import OpSize
+from easier68k.core.models.memory_value import MemoryValue
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_heatmap(memory_class):
+    memory = memory_class()
+    heatmap = memory.enable_heatmap(64)
+    assert memory.heatmap is heatmap
+    assert len(heatmap.reads) == 16777216 // 64
+
+    memory.write_u32(0x1000, 1)
+    memory.set(OpSize.WORD, 0x1004, MemoryValue(OpSize.WORD, unsigned_int=2))
+    memory.read_u8(0x1040)
+    memory.get(OpSize.LONG, 0x1040)
+    memory.write_block(0x2030, bytes(0x20))
+    memory.read_block(0x3000, 1)
+    assert list(heatmap.regions()) == [(0x1000, 0, 2), (0x1040, 2, 0), (0x2000, 0, 1), (0x2040, 0, 1),
+                                       (0x3000, 1, 0)]
+
+    file = io.StringIO()
+    heatmap.to_csv(file)
+    assert file.getvalue().splitlines()[:3] == ['location,reads,writes', '0x001000,0,2', '0x001040,2,0']
+
+    # each line is 64 buckets, where the most used is @
+    lines = heatmap.render().splitlines()
+    assert lines == ['001000 |@@' + ' ' * 62 + '|',
+                     '002000 |++' + ' ' * 62 + '|',
+                     '003000 |+' + ' ' * 63 + '|']
+    assert heatmap.render(writes=False).splitlines()[0] == '001000 | @' + ' ' * 62 + '|'
+
+    # nothing is counted while it is off
+    memory.disable_heatmap()
+    memory.write_u32(0x1000, 1)
+    assert memory.heatmap is None
+    assert heatmap.writes[0x1000 // 64] == 2
+    assert 'read' not in memory.__dict__
+
+    heatmap = memory.enable_heatmap()
+    assert len(heatmap.reads) == 16777216 // PAGE_SIZE
+    memory.read_u32(0x1000)
+    heatmap.clear()
+    assert not list(heatmap.regions())
+
+    with pytest.raises(AssertionError):
+        Heatmap(16, 3)
+
+
+def test_heatmap_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    memory = Memory()
+    heatmap = memory.enable_heatmap()
+    reads, writes = heatmap.to_numpy()
+    memory.write_u8(0x5000, 1)
+    assert writes[5] == 1 and writes.dtype == numpy.uint64
+    assert reads.sum() == 0
+
+
+def test_program_heatmap():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    LEA ($200000).L,A0
+    MOVE.L #$00000001,(A0)
+    MOVE.L (A0),D0
+    MOVE.L D0,(A0)
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+        heatmap = m68k.memory.enable_heatmap()
+        m68k.run()
+        assert list(heatmap.regions()) == [(0x200000, 1, 2)]
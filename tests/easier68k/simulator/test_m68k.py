@@ -226,3 +226,676 @@ def test_auto_execute():
     assert m68k.halted
 
 
+
+def test_instruction_cache():
+    m68k = M68K()
+
+    list_file = ListFile()
+
+    list_file.load_from_json("""
+    {
+        "data": {
+            "1024": "33fcabcd00aaaaaa",
+            "1032": "ffffffff"
+        },
+        "startingExecutionAddress": 1024,
+        "symbols": {}
+    }
+        """)
+
+    m68k.load_list_file(list_file)
+
+    # first time the instruction has to be decoded
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (0, 1)
+
+    # running the same instruction again uses the cached instruction
+    m68k.set_program_counter_value(1024)
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (1, 1)
+    assert m68k.memory.get(OpSize.WORD, 0x00aaaaaa).get_value_unsigned() == 0xABCD
+
+    # modify the immediate of the MOVE, which has to drop the cached instruction
+    m68k.memory.set(OpSize.WORD, 1026, MemoryValue(OpSize.WORD, unsigned_int=0x1234))
+    m68k.set_program_counter_value(1024)
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (1, 2)
+    assert m68k.memory.get(OpSize.WORD, 0x00aaaaaa).get_value_unsigned() == 0x1234
+
+    # writing somewhere else keeps the cached instruction
+    m68k.memory.set(OpSize.WORD, 0x2000, MemoryValue(OpSize.WORD, unsigned_int=0x1234))
+    m68k.set_program_counter_value(1024)
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (2, 2)
+
+    # the MOVE is 8 bytes long, so writing to the next instruction keeps it too
+    m68k.memory.set(OpSize.WORD, 1032, MemoryValue(OpSize.WORD, unsigned_int=0xffff))
+    m68k.set_program_counter_value(1024)
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (3, 2)
+
+    # but writing to its last byte drops it
+    m68k.memory.set(OpSize.BYTE, 1031, MemoryValue(OpSize.BYTE, unsigned_int=0xaa))
+    m68k.set_program_counter_value(1024)
+    m68k.step_instruction()
+    assert m68k.get_instruction_cache_stats() == (3, 3)
+
+
+def test_register_values():
+    m68k = M68K()
+
+    # the int and MemoryValue interfaces see the same register file
+    m68k.set_register_value(Register.D3, 0xDEADBEEF)
+    assert m68k.get_register_value(Register.D3) == 0xDEADBEEF
+    assert m68k.get_register(Register.D3).get_value_unsigned() == 0xDEADBEEF
+
+    m68k.set_register(Register.A2, MemoryValue(OpSize.LONG, unsigned_int=0x2000))
+    assert m68k.get_register_value(Register.A2) == 0x2000
+
+    # data registers keep the size of the value that was set
+    m68k.set_register(Register.D1, MemoryValue(OpSize.BYTE, signed_int=-2))
+    assert m68k.get_register_value(Register.D1) == 0xFE
+    assert m68k.get_register(Register.D1).get_value_signed() == -2
+
+    m68k.set_register_value(Register.CCR, 0x1F)
+    assert m68k.get_register(Register.CCR).get_value_unsigned() == 0x1F
+
+    with pytest.raises(AssertionError):
+        m68k.set_register_value(Register.CCR, 0x100)
+
+    with pytest.raises(AssertionError):
+        m68k.set_register_value(Register.D0, 0x100000000)
+
+    # the program counter is a plain int
+    m68k.set_program_counter_value(0x1000)
+    m68k.increment_program_counter(6)
+    assert m68k.get_register_value(Register.PC) == 0x1006
+
+
+def test_lazy_flags():
+    """
+    Deferring the condition codes has to end up with the same CCR as setting them right away
+    """
+    import random
+    from easier68k.core.opcodes.add import Add
+    from easier68k.core.opcodes.sub import Sub
+    from easier68k.core.opcodes.cmp import Cmp
+    from easier68k.core.opcodes.cmpi import Cmpi
+    from easier68k.core.opcodes.neg import Neg
+    from easier68k.core.opcodes.subq import Subq
+    from easier68k.core.opcodes.opcode_or import Or
+    from easier68k.core.opcodes.eor import Eor
+    from easier68k.core.models.assembly_parameter import AssemblyParameter
+    from easier68k.core.enum.ea_mode import EAMode
+
+    rand = random.Random(68000)
+    sizes = [OpSize.BYTE, OpSize.WORD, OpSize.LONG]
+
+    def random_op():
+        size = rand.choice(sizes)
+        src = AssemblyParameter(EAMode.DRD, rand.randint(0, 3))
+        dest = AssemblyParameter(EAMode.DRD, rand.randint(0, 3))
+        imm = AssemblyParameter(EAMode.IMM, rand.randint(0, 0x7F))
+        return rand.choice([
+            lambda: Add([src, dest], size),
+            lambda: Sub([src, dest], size),
+            lambda: Cmp([src, dest], size),
+            lambda: Cmpi([imm, dest], size),
+            lambda: Neg([dest], size),
+            lambda: Subq([AssemblyParameter(EAMode.IMM, rand.randint(1, 8)), dest], size),
+            lambda: Or([src, dest], size),
+            lambda: Eor([src, dest], size),
+        ])()
+
+    eager = M68K()
+    lazy = M68K(lazy_flags=True)
+
+    for _ in range(200):
+        ccr = rand.randint(0, 0x1F)
+        eager.set_register_value(Register.CCR, ccr)
+        lazy.set_register_value(Register.CCR, ccr)
+        for register in DATA_REGISTERS[:4]:
+            size = rand.choice(sizes)
+            value = MemoryValue(size, unsigned_int=rand.randint(0, (1 << (8 * size.value)) - 1))
+            eager.set_register(register, value)
+            lazy.set_register(register, value)
+
+        # run a few instructions before reading the CCR, so that some are never evaluated
+        for _ in range(rand.randint(1, 5)):
+            op = random_op()
+            errors = []
+            for sim in [eager, lazy]:
+                try:
+                    op.execute(sim)
+                    errors.append(None)
+                except AssertionError:
+                    errors.append(AssertionError)
+            assert errors[0] == errors[1]
+
+        for register in DATA_REGISTERS[:4]:
+            assert eager.get_register_value(register) == lazy.get_register_value(register)
+        assert eager.get_register_value(Register.CCR) == lazy.get_register_value(Register.CCR)
+
+
+def test_run_for():
+    from easier68k.core.enum.stop_reason import StopReason
+    from easier68k.simulator.m68k import InvalidInstructionError
+    from easier68k.simulator.memory import UnalignedMemoryAccessError
+    import time
+
+    m68k = M68K()
+
+    list_file = ListFile()
+
+    # MOVE.L #1,D0, MOVE.L #2,D1, MOVE.L #3,D2, SIMHALT
+    list_file.load_from_json("""
+    {
+        "data": {
+            "1024": "203c00000001",
+            "1030": "223c00000002",
+            "1036": "243c00000003",
+            "1042": "ffffffff"
+        },
+        "startingExecutionAddress": 1024,
+        "symbols": {}
+    }
+        """)
+
+    m68k.load_list_file(list_file)
+
+    # stops after the given number of instructions
+    result = m68k.run_for(max_instructions=2)
+    assert result.reason is StopReason.BUDGET_EXHAUSTED
+    assert result.instructions == 2
+    assert m68k.get_program_counter_value() == 1036
+
+    # a deadline in the past stops before running anything
+    result = m68k.run_for(deadline=time.monotonic() - 1)
+    assert result.reason is StopReason.BUDGET_EXHAUSTED
+    assert result.instructions == 0
+
+    # then runs until the SIMHALT
+    result = m68k.run_for(max_instructions=100)
+    assert result.reason is StopReason.HALTED
+    assert result.instructions == 2
+    assert m68k.get_register_value(Register.D2) == 3
+
+    # running off the end of the program into memory that can't be decoded
+    # (zeroed memory is ORI.B #0,D0, so this uses ILLEGAL instead)
+    m68k = M68K()
+    m68k.memory.write_block(0x2000, bytearray.fromhex('4afc'))
+    m68k.set_program_counter_value(0x2000)
+    result = m68k.run_for()
+    assert result.reason is StopReason.FAULT
+    assert isinstance(result.fault, InvalidInstructionError)
+    assert result.instructions == 0
+
+    # errors raised by instructions stop the run
+    m68k = M68K()
+    list_file = ListFile()
+
+    # MOVE.L D0,(A0) with A0 unaligned
+    list_file.load_from_json("""
+    {
+        "data": {
+            "1024": "2080"
+        },
+        "startingExecutionAddress": 1024,
+        "symbols": {}
+    }
+        """)
+    m68k.load_list_file(list_file)
+    m68k.set_register_value(Register.A0, 0x2001)
+    result = m68k.run_for()
+    assert result.reason is StopReason.FAULT
+    assert isinstance(result.fault, UnalignedMemoryAccessError)
+
+
+def test_cycles():
+    from easier68k.core.enum.stop_reason import StopReason
+
+    m68k = M68K()
+
+    list_file = ListFile()
+
+    # MOVE.L #1,D0, MOVE.L #2,D1, MOVE.L D1,($2000).L, SIMHALT
+    list_file.load_from_json("""
+    {
+        "data": {
+            "1024": "203c00000001",
+            "1030": "223c00000002",
+            "1036": "23c100002000",
+            "1042": "ffffffff"
+        },
+        "startingExecutionAddress": 1024,
+        "symbols": {}
+    }
+        """)
+
+    m68k.load_list_file(list_file)
+
+    # a MOVE.L from an immediate to a data register takes 12 cycles
+    m68k.step_instruction()
+    assert m68k.get_cycles() == 12
+
+    # stops once the cycle budget is used up
+    result = m68k.run_for(max_cycles=1)
+    assert result.reason is StopReason.BUDGET_EXHAUSTED
+    assert result.cycles == 12
+
+    # a MOVE.L from a data register to an absolute long address takes 20 cycles
+    result = m68k.run_for()
+    assert result.reason is StopReason.HALTED
+    assert result.cycles == 20
+    assert m68k.get_cycles() == 44
+
+    m68k.clear_cycles()
+    assert m68k.get_cycles() == 0
+
+
+def test_breakpoints():
+    from easier68k.core.enum.stop_reason import StopReason
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    MOVE.L #$00000002,D1
+    MOVE.L #$00000003,D2
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+
+        # blocks translated before the breakpoint is added are dropped
+        m68k.add_breakpoint(0x100C)
+        result = m68k.run_for()
+        assert result.reason is StopReason.BREAKPOINT
+        assert result.instructions == 2
+        assert m68k.get_program_counter_value() == 0x100C
+        assert m68k.get_register_value(Register.D2) == 0
+
+        # running again continues from the breakpoint
+        result = m68k.run_for()
+        assert result.reason is StopReason.HALTED
+        assert m68k.get_register_value(Register.D2) == 3
+
+        # run stops at breakpoints as well
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+        m68k.run_for(max_instructions=1)
+        m68k.add_breakpoint(0x1006)
+        m68k.remove_breakpoint(0x1006)
+        m68k.add_breakpoint(0x100C)
+        m68k.run()
+        assert not m68k.halted
+        assert m68k.get_program_counter_value() == 0x100C
+
+        m68k.clear_breakpoints()
+        m68k.run()
+        assert m68k.halted
+        assert m68k.get_register_value(Register.D2) == 3
+
+
+def test_watchpoints():
+    from easier68k.core.enum.stop_reason import StopReason
+    from easier68k.core.enum.watch_kind import WatchKind
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    MOVE.L D0,($2000).L
+    LEA ($3000).L,A0
+    MOVE.L (A0),D1
+    MOVE.L #$00000003,D2
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+        m68k.memory.add_watchpoint(0x2002, 2, WatchKind.WRITE)
+        m68k.memory.add_watchpoint(0x3000, 4, WatchKind.READ)
+
+        # stops after the instruction that wrote to the watched memory
+        result = m68k.run_for()
+        assert result.reason is StopReason.WATCHPOINT
+        assert result.instructions == 2
+        assert m68k.memory.watch_hit == (WatchKind.WRITE, 0x2000, 4)
+
+        result = m68k.run_for()
+        assert result.reason is StopReason.WATCHPOINT
+        assert result.instructions == 2
+        assert m68k.memory.watch_hit == (WatchKind.READ, 0x3000, 4)
+
+        m68k.memory.clear_watchpoints()
+        result = m68k.run_for()
+        assert result.reason is StopReason.HALTED
+        assert m68k.memory.watch_hit is None
+        assert m68k.get_register_value(Register.D2) == 3
+
+
+def test_snapshots():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    LEA ($2000).L,A0
+    MOVE.L D0,(A0)
+    MOVE.L #$00000002,D0
+    MOVE.L D0,($5004).L
+    MOVE.L D0,(A0)
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks, lazy_flags=True)
+        m68k.load_list_file(list_file)
+
+        m68k.run_for(max_instructions=3)
+        assert m68k.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 1
+        middle = m68k.snapshot()
+
+        m68k.run()
+        assert m68k.halted
+        assert m68k.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 2
+        assert m68k.memory.get(OpSize.LONG, 0x5004).get_value_unsigned() == 2
+        end = m68k.snapshot()
+
+        # only the pages written to after the snapshot are copied
+        assert sorted(middle.memory.pages) == [0x2, 0x5]
+        assert not end.memory.pages
+
+        # a snapshot can be restored more than once
+        for _ in range(2):
+            m68k.restore(middle)
+            assert not m68k.halted
+            assert m68k.get_program_counter_value() == 0x100E
+            assert m68k.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 1
+            assert m68k.memory.get(OpSize.LONG, 0x5004).get_value_unsigned() == 0
+
+            m68k.clock_auto_cycle = True
+            m68k.run()
+            assert m68k.get_register_value(Register.D0) == 2
+            assert m68k.get_cycles() == end.clock_cycles
+
+        # the later snapshot kept the memory that restoring the earlier one wrote over
+        m68k.restore(middle)
+        m68k.restore(end)
+        assert m68k.halted
+        assert m68k.memory.get(OpSize.LONG, 0x5004).get_value_unsigned() == 2
+
+        # reload_execution starts over and runs back to the same point
+        m68k.restore(middle)
+        cycles = m68k.get_cycles()
+        m68k.set_register_value(Register.D5, 5)
+        m68k.reload_execution()
+        assert m68k.get_program_counter_value() == 0x100E
+        assert m68k.get_cycles() == cycles
+        assert m68k.get_register_value(Register.D5) == 0
+        assert m68k.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 1
+
+
+def test_step_back():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    LEA ($2000).L,A0
+    MOVE.L D0,(A0)
+    MOVE.W #$7FFF,D1
+    ADD.W D1,D1
+    MOVE.L #$00000002,D0
+    MOVE.L D0,(A0)
+    MOVE.B D1,($2004).L
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    def state(m68k: M68K):
+        return ([m68k.get_register(r).get_value_unsigned() for r in Register],
+                [m68k.register_sizes[r] for r in Register],
+                m68k.get_cycles(), m68k.halted, bytes(m68k.memory.memory[0x2000:0x2008]))
+
+    # with a ring buffer which holds everything, one which has to fall back to
+    # the snapshots, and without snapshots
+    for capacity, snapshot_interval in [(100, 4), (2, 3), (100, 0)]:
+        m68k = M68K(lazy_flags=True)
+        m68k.load_list_file(list_file)
+        m68k.enable_history(capacity, snapshot_interval)
+
+        states = [state(m68k)]
+        while not m68k.halted:
+            m68k.step_instruction()
+            states.append(state(m68k))
+
+        steps = len(states) - 1
+        if snapshot_interval:
+            # back one instruction at a time, then forward again and all the way back at once
+            for i in range(steps - 1, -1, -1):
+                assert m68k.step_back() == 1
+                assert state(m68k) == states[i]
+            assert m68k.step_back() == 0
+
+            m68k.run()
+            assert state(m68k) == states[-1]
+            assert m68k.step_back(100) == steps
+            assert state(m68k) == states[0]
+
+            m68k.run_for(max_instructions=5)
+            assert m68k.step_back(3) == 3
+            assert state(m68k) == states[2]
+        else:
+            assert m68k.step_back(100) == steps
+            assert state(m68k) == states[0]
+
+
+def test_step_back_after_restore():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.W #$0005,D0
+    MOVE.W #$0006,D1
+    MOVE.W D0,($2000).L
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    m68k = M68K()
+    m68k.load_list_file(list_file)
+    m68k.enable_history(100, 2)
+    start = m68k.snapshot()
+    m68k.run_for(max_instructions=3)
+
+    # the instructions before restore didn't lead to its state, so they can't be undone
+    m68k.restore(start)
+    assert m68k.step_back() == 0
+    assert m68k.get_program_counter_value() == 0x1000
+
+    # the ones after it can
+    m68k.run_for(max_instructions=2)
+    assert m68k.step_back() == 1
+    assert m68k.get_program_counter_value() == 0x1004
+    assert m68k.get_register_value(Register.D0) == 5
+    assert m68k.get_register_value(Register.D1) == 0
+
+
+def test_clone():
+    from easier68k.assembler.assembler import parse
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    LEA ($2000).L,A0
+    MOVE.L D0,(A0)
+    MOVE.L #$00000002,D1
+    MOVE.L D1,(A0)
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    for paged_memory in [False, True]:
+        template = M68K(translate_blocks=True, paged_memory=paged_memory)
+        template.load_list_file(list_file)
+        template.run_for(max_instructions=3)
+
+        clone = template.clone()
+        assert clone.get_program_counter_value() == template.get_program_counter_value()
+        assert clone.get_register_value(Register.D0) == 1
+
+        clone.run()
+        assert clone.halted
+        assert clone.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 2
+
+        # the template is left where it was
+        assert not template.halted
+        assert template.get_program_counter_value() == 0x100E
+        assert template.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 1
+
+        # and clones start over from the point they were cloned at
+        clone.set_register_value(Register.D5, 5)
+        clone.reload_execution()
+        assert clone.halted
+        assert clone.get_register_value(Register.D5) == 0
+        assert clone.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 2
+        assert template.memory.get(OpSize.LONG, 0x2000).get_value_unsigned() == 1
+
+
+def test_dump():
+    import io
+    from easier68k.assembler.assembler import parse
+    from easier68k.core.enum.dump_compression import DumpCompression
+    from easier68k.simulator.dump import InvalidDumpError
+
+    list_file, issues = parse("""START ORG $1000
+    MOVE.L #$00000001,D0
+    LEA ($200000).L,A0
+    MOVE.L D0,(A0)
+    MOVE.W #$7FFF,D1
+    ADD.W D1,D1
+    MOVE.L D1,($5004).L
+    SIMHALT
+    END START
+""")
+    assert not issues
+
+    finished = M68K()
+    finished.load_list_file(list_file)
+    finished.run()
+
+    for compression in DumpCompression:
+        m68k = M68K(lazy_flags=True)
+        m68k.load_list_file(list_file)
+        m68k.run_for(max_instructions=5)
+
+        file = io.BytesIO()
+        m68k.save_dump(file, compression)
+        # only the pages in use are kept, not all 16 MB
+        assert len(file.getvalue()) < 3 * 4096
+
+        for paged_memory in [False, True]:
+            loaded = M68K(paged_memory=paged_memory)
+            loaded.memory.write_u32(0x8000, 5)
+            file.seek(0)
+            loaded.load_dump(file)
+
+            assert loaded.registers == m68k.registers
+            assert loaded.get_register_value(Register.CCR) == m68k.get_register_value(Register.CCR)
+            assert loaded.get_cycles() == m68k.get_cycles()
+            assert loaded.memory.read_u32(0x200000) == 1
+            assert loaded.memory.read_u32(0x8000) == 0
+            assert loaded.memory.raw_read(0x1000, 32) == m68k.memory.raw_read(0x1000, 32)
+
+            # and carries on from where it was saved
+            loaded.run()
+            assert loaded.halted
+            assert loaded.registers == finished.registers
+            assert loaded.get_cycles() == finished.get_cycles()
+            assert loaded.memory.read_u32(0x5004) == 0xFFFE
+
+    # the program that was running before the dump was loaded is forgotten
+    other, issues = parse("""START ORG $1000
+    MOVE.W #$0009,D0
+    MOVE.W D0,($200000).L
+    SIMHALT
+    END START
+""")
+    assert not issues
+    loaded = M68K()
+    loaded.load_list_file(other)
+    loaded.enable_history()
+    loaded.run()
+    file.seek(0)
+    loaded.load_dump(file)
+    assert loaded.step_back(2) == 0
+
+    loaded.run_for(max_instructions=1)
+    loaded.reload_execution()
+    assert loaded.get_program_counter_value() == m68k.get_program_counter_value() + 6
+    assert loaded.memory.read_u32(0x5004) == 0xFFFE
+    assert loaded.memory.read_u32(0x200000) == 1
+    assert loaded.memory.raw_read(0x1000, 32) == m68k.memory.raw_read(0x1000, 32)
+    assert loaded.step_back() == 1
+    assert loaded.registers == m68k.registers
+
+    with pytest.raises(InvalidDumpError):
+        M68K().load_dump(io.BytesIO(bytes(64)))
+    file = io.BytesIO()
+    m68k.save_dump(file)
+    with pytest.raises(InvalidDumpError):
+        M68K().load_dump(io.BytesIO(file.getvalue()[:-4]))
+
+
+def test_protect_code():
+    from easier68k.core.enum.stop_reason import StopReason
+    from easier68k.simulator.memory import ProtectedMemoryError
+    from easier68k.assembler.assembler import parse
+
+    # the third instruction changes the immediate value of the fourth
+    list_file, issues = parse("""START ORG $1000
+    MOVE.W #$0001,($1020).L
+    MOVE.L #$00000002,D0
+    MOVE.W #$0007,($101A).L
+    MOVE.L #$00000004,D0
+    SIMHALT
+    ORG $1020
+    DC.W $FFFF
+    END START
+""")
+    assert not issues
+    # the constants aren't protected, only the instructions
+    assert list_file.is_code(0x1000)
+    assert not list_file.is_code(0x1020)
+
+    for translate_blocks in [False, True]:
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file)
+        assert m68k.run_for().reason is StopReason.HALTED
+        assert m68k.get_register_value(Register.D0) == 7
+
+        m68k = M68K(translate_blocks=translate_blocks)
+        m68k.load_list_file(list_file, protect_code=True)
+        result = m68k.run_for()
+        assert result.reason is StopReason.FAULT
+        assert isinstance(result.fault, ProtectedMemoryError)
+        assert m68k.get_program_counter_value() == 0x100E
+        assert m68k.get_register_value(Register.D0) == 2
+        assert m68k.memory.read_u16(0x1020) == 1
+
+        # clones are protected the same
+        assert isinstance(m68k.clone().run_for().fault, ProtectedMemoryError)
+
+        # loading the program again removes the protection
+        m68k.load_list_file(list_file)
+        m68k.set_register_value(Register.D0, 0)
+        assert m68k.run_for().reason is StopReason.HALTED
+        assert m68k.get_register_value(Register.D0) == 7
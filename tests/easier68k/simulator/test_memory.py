@@ -1,11 +1,13 @@
 import pytest
 
-from easier68k.simulator.memory import Memory, UnalignedMemoryAccessError, OutOfBoundsMemoryError
+from easier68k.simulator.memory import Memory, PagedMemory, MappedMemory, UnalignedMemoryAccessError, \
+    OutOfBoundsMemoryError
 from easier68k.core.models.memory_value import MemoryValue
 from easier68k.core.enum.op_size import OpSize
 
-def test_memory_set_get():
-    memory = Memory()
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_set_get(memory_class):
+    memory = memory_class()
 
     # should start all zeroed out
     # also test get returns appropriate sizes
@@ -68,9 +70,10 @@ def test_memory_set_get():
     memory.get(OpSize.LONG, 0xFFFFFC)
 
 
-def test_memory_save_load(tmpdir):
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_save_load(tmpdir, memory_class):
     # test saving and loading
-    memory = Memory()
+    memory = memory_class()
     path = tmpdir.join('memoryDump.raw').strpath
 
     var = MemoryValue(OpSize.LONG)
@@ -85,9 +88,342 @@ def test_memory_save_load(tmpdir):
     memory.save_memory(open(path, 'wb'))
 
 
-    load_test = Memory()
+    load_test = memory_class()
     load_test.load_memory(open(path, 'rb'))
 
     assert load_test.get(OpSize.LONG, 0x00).get_value_unsigned() == 0xFF00BEEF
     assert load_test.get(OpSize.LONG, 0x001000).get_value_unsigned() == 0x01230000
     assert load_test.get(OpSize.LONG, 0x100000).get_value_unsigned() == 0x456789AB
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_load_size(tmpdir, memory_class):
+    memory = memory_class()
+    memory.write_u32(0x2000, 1)
+    path = tmpdir.join('short.raw').strpath
+
+    # a shorter file doesn't make memory smaller, the rest is zeroed
+    with open(path, 'wb') as file:
+        file.write(b'\x12\x34')
+    with open(path, 'rb') as file:
+        memory.load_memory(file)
+    assert len(memory) == 16777216
+    assert memory.read_u32(0) == 0x12340000
+    assert memory.read_u32(0x2000) == 0
+
+    with open(path, 'wb') as file:
+        file.write(bytes(16777217))
+    with open(path, 'rb') as file:
+        with pytest.raises(OutOfBoundsMemoryError):
+            memory.load_memory(file)
+    assert len(memory) == 16777216
+
+
+def test_mapped_memory(tmpdir):
+    path = tmpdir.join('image.raw').strpath
+
+    # the image is made the size of memory
+    memory = MappedMemory(path)
+    assert len(memory) == 16777216
+    assert memory.read_u32(0x1000) == 0
+    memory.write_u32(0x1000, 0xDEADBEEF)
+    memory.write_block(0xFFFFFD, b'end')
+    memory.close()
+
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert len(data) == 16777216
+    assert data[0x1000:0x1004] == b'\xDE\xAD\xBE\xEF'
+    assert data[-3:] == b'end'
+
+    # and opened again without loading it
+    memory = MappedMemory(path)
+    assert memory.read_u32(0x1000) == 0xDEADBEEF
+
+    snapshot = memory.snapshot()
+    memory.write_u32(0x1000, 0)
+    memory.restore(snapshot)
+    assert memory.read_u32(0x1000) == 0xDEADBEEF
+
+    # forks are copies which don't change the image
+    forked = memory.fork()
+    assert type(forked) is Memory
+    forked.write_u32(0x1000, 1)
+    assert memory.read_u32(0x1000) == 0xDEADBEEF
+
+    # the old api still copies in and out
+    saved = tmpdir.join('saved.raw').strpath
+    with open(saved, 'wb') as file:
+        memory.save_memory(file)
+    with open(saved, 'rb') as file:
+        assert file.read() == data
+    with open(saved, 'rb') as file:
+        forked.load_memory(file)
+    assert forked.read_u32(0x1000) == 0xDEADBEEF
+    memory.close()
+
+    with pytest.raises(OutOfBoundsMemoryError):
+        MappedMemory(path, 0x1000)
+
+
+def test_paged_memory():
+    memory = PagedMemory()
+    assert len(memory) == 16777216
+    assert memory.allocated_pages() == 0
+
+    # reads from pages which were never written to are zeros
+    assert memory.get(OpSize.LONG, 0x123454).get_value_unsigned() == 0
+    assert memory.raw_read(0xFFFFFE, 4) == b'\x00\x00'
+
+    # writing zeros doesn't allocate a page
+    memory.set(OpSize.LONG, 0x2000, MemoryValue(OpSize.LONG, unsigned_int=0))
+    assert memory.allocated_pages() == 0
+
+    memory.set(OpSize.LONG, 0x2FFC, MemoryValue(OpSize.LONG, unsigned_int=0x12345678))
+    memory.set(OpSize.WORD, 0x3000, MemoryValue(OpSize.WORD, unsigned_int=0x9ABC))
+    assert memory.allocated_pages() == 2
+
+    # reads and writes can cross pages
+    assert memory.raw_read(0x2FFE, 4) == b'\x56\x78\x9A\xBC'
+    memory.raw_write(0x3FFF, b'\x01\x02')
+    assert memory.raw_read(0x3FFE, 4) == b'\x00\x01\x02\x00'
+    assert memory.allocated_pages() == 3
+
+    # and it holds the same bytes as the flat memory
+    flat = Memory()
+    flat.raw_write(0x2FFC, memory.raw_read(0x2FFC, 0x1010))
+    assert flat.memory == memory.raw_read(0, len(memory))
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_fork(memory_class):
+    memory = memory_class()
+    memory.set(OpSize.LONG, 0x1000, MemoryValue(OpSize.LONG, unsigned_int=0x12345678))
+
+    forked = memory.fork()
+    assert forked.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0x12345678
+
+    # writes on either side aren't seen by the other
+    forked.set(OpSize.WORD, 0x1000, MemoryValue(OpSize.WORD, unsigned_int=0xBEEF))
+    memory.set(OpSize.WORD, 0x1002, MemoryValue(OpSize.WORD, unsigned_int=0xCAFE))
+    assert memory.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0x1234CAFE
+    assert forked.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0xBEEF5678
+
+    # snapshots of the forked memory don't change the original
+    snapshot = forked.snapshot()
+    forked.set(OpSize.BYTE, 0x1003, MemoryValue(OpSize.BYTE, unsigned_int=0x01))
+    forked.restore(snapshot)
+    assert forked.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0xBEEF5678
+    assert memory.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0x1234CAFE
+
+
+def test_paged_memory_shared_program():
+    from easier68k.core.models.list_file import ListFile
+
+    list_file = ListFile()
+    list_file.insert_data(0x1000, '203c00000001ffffffff')
+    list_file.insert_data(0x5FFE, 'abcd1234')
+
+    first = PagedMemory()
+    first.load_list_file(list_file)
+    second = PagedMemory()
+    second.load_list_file(list_file)
+
+    # the pages of the same list file are shared
+    for page in [0x1, 0x5, 0x6]:
+        assert first.pages[page] is second.pages[page]
+    assert first.get(OpSize.LONG, 0x5FFC).get_value_unsigned() == 0x0000ABCD
+    assert first.get(OpSize.WORD, 0x6000).get_value_unsigned() == 0x1234
+
+    # until one of them writes to the page
+    first.set(OpSize.WORD, 0x1000, MemoryValue(OpSize.WORD, unsigned_int=0x7001))
+    assert first.pages[0x1] is not second.pages[0x1]
+    assert second.get(OpSize.WORD, 0x1000).get_value_unsigned() == 0x203C
+
+    # and it is loaded the same as flat memory
+    flat = Memory()
+    flat.load_list_file(list_file)
+    assert flat.memory == second.raw_read(0, len(second))
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_int_accessors(memory_class):
+    from easier68k.simulator.memory import AssignWrongMemorySizeError
+
+    memory = memory_class()
+
+    memory.write_u32(0x1000, 0xFF00BEEF)
+    assert memory.read_u32(0x1000) == 0xFF00BEEF
+    assert memory.read_s32(0x1000) == -0x00FF4111
+    assert memory.read_u16(0x1002) == 0xBEEF
+    assert memory.read_s16(0x1002) == -0x4111
+    assert memory.read_u8(0x1000) == 0xFF
+    assert memory.read_s8(0x1000) == -1
+    assert memory.get(OpSize.LONG, 0x1000).get_value_unsigned() == 0xFF00BEEF
+
+    memory.write_s16(0x1000, -2)
+    memory.write_s8(0x1003, -128)
+    assert memory.read_u32(0x1000) == 0xFFFEBE80
+    memory.write_s32(0x1004, -1)
+    memory.write_u8(0x1004, 0x12)
+    memory.write_u16(0x1006, 0x3456)
+    assert memory.read_u32(0x1004) == 0x12FF3456
+
+    # the same alignment and bounds checks as get and set
+    with pytest.raises(UnalignedMemoryAccessError):
+        memory.read_u32(0x1002)
+    with pytest.raises(UnalignedMemoryAccessError):
+        memory.write_u16(0x1001, 0)
+    with pytest.raises(OutOfBoundsMemoryError):
+        memory.read_u8(0x1000000)
+    with pytest.raises(OutOfBoundsMemoryError):
+        memory.write_u32(-4, 0)
+
+    # and values have to fit
+    with pytest.raises(AssignWrongMemorySizeError):
+        memory.write_u8(0x1000, 0x100)
+    with pytest.raises(AssignWrongMemorySizeError):
+        memory.write_u16(0x1000, -1)
+    with pytest.raises(AssignWrongMemorySizeError):
+        memory.write_s8(0x1000, 128)
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_blocks(memory_class):
+    from easier68k.simulator.memory import AssignWrongMemorySizeError, PAGE_SIZE
+    from easier68k.core.models.list_file import ListFile
+
+    memory = memory_class()
+    written = []
+    memory.add_write_listener(lambda location, length: written.append((location, length)))
+
+    # blocks don't have to be aligned, and can cross pages
+    data = bytes(range(256)) * 20
+    memory.write_block(PAGE_SIZE - 3, data)
+    assert written == [(PAGE_SIZE - 3, len(data))]
+    assert memory.read_block(PAGE_SIZE - 3, len(data)) == data
+    assert memory.read_u8(PAGE_SIZE) == 3
+
+    view = memory.read_block(0x10001, 3)
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b'\x00\x00\x00'
+
+    memory.fill(PAGE_SIZE, 5, 0xAA)
+    assert memory.read_block(PAGE_SIZE - 1, 7) == b'\x02\xAA\xAA\xAA\xAA\xAA\x08'
+    memory.fill(PAGE_SIZE, 2)
+    assert memory.read_u32(PAGE_SIZE) == 0x0000AAAA
+
+    # a single bounds check for the whole block
+    with pytest.raises(OutOfBoundsMemoryError):
+        memory.read_block(0xFFFFFF, 2)
+    with pytest.raises(OutOfBoundsMemoryError):
+        memory.write_block(-1, b'\x00')
+    with pytest.raises(OutOfBoundsMemoryError):
+        memory.fill(0xFFFFF0, 0x20, 1)
+    with pytest.raises(AssignWrongMemorySizeError):
+        memory.fill(0, 1, 0x100)
+    assert memory.read_block(0xFFFFFF, 1) == b'\x00'
+
+    # snapshots and watchpoints see block writes
+    snapshot = memory.snapshot()
+    memory.add_watchpoint(PAGE_SIZE * 5 + 2)
+    memory.fill(PAGE_SIZE * 4, PAGE_SIZE * 2, 0x55)
+    assert memory.watch_hit is not None
+    memory.restore(snapshot)
+    assert memory.read_block(PAGE_SIZE * 4, PAGE_SIZE * 2) == bytes(PAGE_SIZE * 2)
+
+    # list files are loaded a segment at a time
+    list_file = ListFile()
+    list_file.insert_data(0x8001, 'DEADBEEF')
+    list_file.insert_data(0x9000, '0102')
+    memory.load_list_file(list_file)
+    assert memory.read_block(0x8000, 6) == b'\x00\xDE\xAD\xBE\xEF\x00'
+    assert memory.read_u16(0x9000) == 0x0102
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_dirty_pages(memory_class):
+    from easier68k.simulator.memory import PAGE_SIZE
+
+    memory = memory_class()
+    assert memory.dirty_pages() == []
+
+    memory.write_u8(0x1000, 1)
+    memory.set(OpSize.WORD, 0x5000, MemoryValue(OpSize.WORD, unsigned_int=2))
+    assert memory.dirty_pages() == [1, 5]
+
+    start = memory.clear_dirty()
+    assert memory.dirty_pages() == []
+    assert memory.diff_since(start) == []
+
+    # bulk writes mark every page they cover
+    memory.write_block(PAGE_SIZE * 2 - 1, b'\x01\x02')
+    memory.fill(PAGE_SIZE * 8, PAGE_SIZE * 2, 3)
+    assert memory.dirty_pages() == [1, 2, 8, 9]
+
+    # tokens keep working after later calls to clear_dirty
+    middle = memory.clear_dirty()
+    snapshot = memory.snapshot()
+    memory.write_u32(0xFFFFFC, 4)
+    memory.copy_on_write(0x20)
+    memory.raw_write(0x20000, b'\x05')
+    memory.notify_write(0x20000, 1)
+    assert memory.dirty_pages() == [0x20, 0xFFF]
+    assert memory.diff_since(middle) == [(0x20000, PAGE_SIZE), (0xFFF000, PAGE_SIZE)]
+    assert memory.diff_since(start) == [(PAGE_SIZE, PAGE_SIZE * 2), (PAGE_SIZE * 8, PAGE_SIZE * 2),
+                                        (0x20000, PAGE_SIZE), (0xFFF000, PAGE_SIZE)]
+
+    # restoring a snapshot changes memory too
+    memory.clear_dirty()
+    memory.restore(snapshot)
+    assert memory.dirty_pages() == [0x20, 0xFFF]
+
+
+@pytest.mark.parametrize('memory_class', [Memory, PagedMemory])
+def test_memory_protection(memory_class):
+    from easier68k.simulator.memory import ProtectedMemoryError
+
+    memory = memory_class()
+    memory.write_u32(0x1000, 0x11223344)
+    memory.protect(0x1000, 6)
+    assert memory.is_protected(0x1000, 6)
+    assert not memory.is_protected(0x1000, 8)
+
+    with pytest.raises(ProtectedMemoryError):
+        memory.write_u16(0x1004, 5)
+    with pytest.raises(ProtectedMemoryError):
+        memory.set(OpSize.LONG, 0x1000, MemoryValue(OpSize.LONG, unsigned_int=5))
+    with pytest.raises(ProtectedMemoryError):
+        memory.write_block(0xFFF, b'\x01\x02')
+    assert memory.read_u32(0x1000) == 0x11223344
+    assert memory.read_u8(0xFFF) == 0
+
+    # the rest of the page can still be written to
+    memory.write_u16(0x1006, 6)
+    memory.write_block(0x1008, b'\x07\x08')
+    assert memory.read_block(0x1006, 4) == b'\x00\x06\x07\x08'
+
+    # snapshots are still copied before the protected page is written to
+    snapshot = memory.snapshot()
+    memory.write_u32(0x1008, 9)
+    memory.restore(snapshot)
+    assert memory.read_u32(0x1008) == 0x07080000
+    with pytest.raises(ProtectedMemoryError):
+        memory.write_u8(0x1001, 5)
+
+    memory.protect(0x1006, 2)
+    assert memory.is_protected(0x1000, 8)
+
+    # write listeners are told about the ranges which aren't protected any more
+    unprotected = []
+    memory.add_write_listener(lambda location, length: unprotected.append((location, length)))
+    memory.unprotect(0x1000, 6)
+    assert unprotected == [(0x1000, 6)]
+    memory.write_u16(0x1004, 5)
+    with pytest.raises(ProtectedMemoryError):
+        memory.write_u16(0x1006, 5)
+
+    memory.clear_protection()
+    assert unprotected == [(0x1000, 6), (0x1004, 2), (0x1006, 2)]
+    memory.write_u16(0x1006, 5)
+    assert memory.read_u32(0x1004) == 0x00050005
@@ -15,7 +15,10 @@ test_modules = [
     'easier68k.core.util.conversions',
     'easier68k.core.util.parsing',
     'easier68k.core.util.split_bits',
+    'easier68k.core.util.find_module',
+    'easier68k.core.util.cycle_timing',
     'easier68k.assembler.assembler',
+    'easier68k.assembler.incremental',
     'easier68k.core.opcodes.move',
     'easier68k.core.opcodes.movea',
     'easier68k.core.opcodes.opcode_or',